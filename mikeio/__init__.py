@@ -37,6 +37,7 @@ from .xyz import read_xyz
 from .dataset import Dataset, DataArray
 from .spatial.grid_geometry import Grid1D, Grid2D, Grid3D
 from .eum import ItemInfo, EUMType, EUMUnit
+from .multifile import read_many, extract_track
 
 
 def read(
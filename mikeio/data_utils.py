@@ -106,7 +106,7 @@ class DataUtilsMixin:
                 if dims[0][0] == "t":
                     raise ValueError(f"space axis cannot be selected from dims {dims}")
                 return 0
-            if "frequency" in dims or "directions" in dims:
+            if "frequency" in dims or "directions" in dims or "layer" in dims:
                 space_name = "node" if "node" in dims else "element"
                 return dims.index(space_name)
             else:
@@ -17,6 +17,7 @@ from .spatial.grid_geometry import Grid1D, Grid2D, Grid3D
 from .spatial.FM_geometry import (
     _GeometryFMLayered,
     GeometryFM,
+    GeometryFM3D,
     GeometryFMPointSpectrum,
     GeometryFMVerticalColumn,
     GeometryFMVerticalProfile,
@@ -412,6 +413,7 @@ class _DataArrayPlotterFM(_DataArrayPlotter):
             projection=geometry.projection,
             z=values,
             ax=ax,
+            node_centering=geometry._get_node_centering_matrix,
             **kwargs,
         )
 
@@ -1012,8 +1014,8 @@ class DataArray(DataUtilsMixin, TimeSeries):
         self._values = value
 
     def to_numpy(self) -> np.ndarray:
-        """Values as a np.ndarray (equivalent to values)"""
-        return self._values
+        """Values as a np.ndarray (equivalent to values unless lazily read)"""
+        return np.asarray(self._values)
 
     @property
     def _has_time_axis(self):
@@ -1121,6 +1123,8 @@ class DataArray(DataUtilsMixin, TimeSeries):
         return key
 
     def __setitem__(self, key, value):
+        if not isinstance(self._values, np.ndarray):
+            self._values = self.to_numpy()  # read lazy values into memory
         if self._is_boolean_mask(key):
             mask = key if isinstance(key, np.ndarray) else key.values
             return self._set_by_boolean_mask(self._values, mask, value)
@@ -1243,7 +1247,11 @@ class DataArray(DataUtilsMixin, TimeSeries):
         if axis == 0 and self.dims[0] == "time":
             time = self.time[idx]
             geometry = self.geometry
-            zn = None if self._zn is None else self._zn[idx]
+            zn = None if self._zn is None else np.take(self._zn, idx, axis=0)
+        elif "layer" in self.dims and axis == self.dims.index("layer"):
+            time = self.time
+            geometry = self.geometry
+            zn = None
         else:
             time = self.time
             geometry = GeometryUndefined()
@@ -1255,7 +1263,7 @@ class DataArray(DataUtilsMixin, TimeSeries):
                 node_ids, _ = self.geometry._get_nodes_and_table_for_elements(
                     idx, node_layers="all"
                 )
-                zn = self._zn[:, node_ids]
+                zn = np.take(self._zn, node_ids, axis=1)
 
         if single_index:
             # reduce dims only if singleton idx
@@ -1382,7 +1390,7 @@ class DataArray(DataUtilsMixin, TimeSeries):
         name: Temperature
         dims: (time:3, element:3700)
         time: 1997-09-15 21:00:00 - 1997-09-16 03:00:00 (3 records)
-        geometry: Dfsu2D (3700 elements, 2090 nodes)
+        geometry: Mesh (3700 elements, 2090 nodes)
         """
         da = self
 
@@ -1452,6 +1460,11 @@ class DataArray(DataUtilsMixin, TimeSeries):
         n_nearest : int, optional
             When using IDW interpolation, how many nearest points should
             be used, by default: 3
+        interpolant : Interpolant, tuple or scipy.sparse matrix, optional
+            Reuse pre-calculated interpolant (GeometryFM only),
+            by default GeometryFM.get_interpolant which reuses
+            interpolants for the same mesh and coordinates (up to
+            GeometryFM.max_interpolant_bytes)
 
         Returns
         -------
@@ -1491,9 +1504,11 @@ class DataArray(DataUtilsMixin, TimeSeries):
                 geometry = GeometryUndefined()
             elif isinstance(self.geometry, GeometryFM):
                 if interpolant is None:
-                    interpolant = self.geometry.get_2d_interpolant(
+                    interpolant = self.geometry.get_interpolant(
                         coords, n_nearest=n_nearest, **kwargs
                     )
+                if not isinstance(interpolant, (tuple, list)):
+                    interpolant = (interpolant,)
                 dai = self.geometry.interp2d(self, *interpolant).flatten()
                 if z is None:
                     geometry = GeometryPoint2D(x=x, y=y)
@@ -1577,8 +1592,10 @@ class DataArray(DataUtilsMixin, TimeSeries):
         Parameters
         ----------
         other: Dataset, DataArray, Grid2D, GeometryFM, pd.DatetimeIndex
-        interpolant, optional
-            Reuse pre-calculated index and weights
+        interpolant: Interpolant, tuple or scipy.sparse matrix, optional
+            Reuse pre-calculated interpolant, by default
+            GeometryFM.get_interpolant which reuses interpolants for the
+            same mesh and coordinates (up to GeometryFM.max_interpolant_bytes)
         kwargs: additional kwargs are passed to interpolation method
 
         Examples
@@ -1620,7 +1637,9 @@ class DataArray(DataUtilsMixin, TimeSeries):
             raise NotImplementedError()
 
         if interpolant is None:
-            interpolant = self.geometry.get_2d_interpolant(xy, **kwargs)
+            interpolant = self.geometry.get_interpolant(xy, **kwargs)
+        if not isinstance(interpolant, (tuple, list)):
+            interpolant = (interpolant,)
 
         if isinstance(geom, Grid2D):
             dai = self.geometry.interp2d(
@@ -1798,6 +1817,40 @@ class DataArray(DataUtilsMixin, TimeSeries):
 
         return self.aggregate(axis=axis, func=func, **kwargs)
 
+    def area_average(self, **kwargs) -> "DataArray":
+        """Compute the area-weighted average over the spatial domain
+        (NaN values removed).
+
+        Only 2d flexible mesh data is supported.
+
+        Returns
+        -------
+        DataArray
+            DataArray with area-weighted average values
+
+        See Also
+        --------
+            average : Weighted average
+
+        Examples
+        --------
+        >>> da = mikeio.read("HD2D.dfsu")["Current speed"]
+        >>> da2 = da.area_average()
+        """
+        if not (isinstance(self.geometry, GeometryFM) and self.geometry.is_2d):
+            raise NotImplementedError("Currently only supports 2d flexible mesh data!")
+
+        area = self.geometry.get_element_area()
+
+        def func(x, axis, keepdims):
+            # the element axis is the last axis of 2d flexible mesh data
+            is_valid = ~np.isnan(x)
+            total = np.where(is_valid, x, 0.0) @ area
+            avg = total / (is_valid @ area)
+            return np.expand_dims(avg, axis) if keepdims else avg
+
+        return self.aggregate(axis="space", func=func, **kwargs)
+
     def nanmax(self, axis="time", **kwargs) -> "DataArray":
         """Max value along an axis (NaN removed)
 
@@ -1909,7 +1962,7 @@ class DataArray(DataUtilsMixin, TimeSeries):
 
         with warnings.catch_warnings():  # there might be all-Nan slices, it is ok, so we ignore them!
             warnings.simplefilter("ignore", category=RuntimeWarning)
-            data = func(self.to_numpy(), axis=axis, keepdims=False, **kwargs)
+            data = func(self.values, axis=axis, keepdims=False, **kwargs)
 
         if axis == 0:  # time
             geometry = self.geometry
@@ -2013,6 +2066,73 @@ class DataArray(DataUtilsMixin, TimeSeries):
 
             return Dataset(data=res, validate=False)
 
+    def depth_average(self) -> "DataArray":
+        """Depth average of 3d data
+
+        The values of each water column are averaged weighted by the
+        layer thickness (from the dynamic zn if available); NaN values
+        are skipped.
+
+        Returns
+        -------
+        DataArray
+            depth averaged values on the 2d geometry
+
+        Examples
+        --------
+        >>> da = mikeio.read("oresund_sigma_z.dfsu").Salinity
+        >>> da.depth_average()
+        <mikeio.DataArray>
+        name: Salinity
+        dims: (time:3, element:3700)
+        time: 1997-09-15 21:00:00 - 1997-09-16 03:00:00 (3 records)
+        geometry: Mesh (3700 elements, 2090 nodes)
+        """
+        if not isinstance(self.geometry, GeometryFM3D) or self.dims[-1] != "element":
+            raise ValueError("depth_average is only available for 3d dfsu data")
+
+        return DataArray(
+            data=self.geometry._depth_average(self.to_numpy(), zn=self._zn),
+            time=self.time,
+            item=deepcopy(self.item),
+            geometry=self.geometry.geometry2d,
+            dims=self.dims,
+        )
+
+    def depth_integral(self) -> "DataArray":
+        """Vertical integral of 3d data
+
+        The values of each water column are multiplied by the layer
+        thickness (from the dynamic zn if available) and summed; NaN
+        values are skipped. The item type and unit are not kept, as the
+        unit is the unit of the values times the unit of z.
+
+        Returns
+        -------
+        DataArray
+            depth integrated values on the 2d geometry
+
+        Examples
+        --------
+        >>> da = mikeio.read("oresund_sigma_z.dfsu").Salinity
+        >>> da.depth_integral()
+        <mikeio.DataArray>
+        name: Salinity
+        dims: (time:3, element:3700)
+        time: 1997-09-15 21:00:00 - 1997-09-16 03:00:00 (3 records)
+        geometry: Mesh (3700 elements, 2090 nodes)
+        """
+        if not isinstance(self.geometry, GeometryFM3D) or self.dims[-1] != "element":
+            raise ValueError("depth_integral is only available for 3d dfsu data")
+
+        return DataArray(
+            data=self.geometry._depth_integral(self.to_numpy(), zn=self._zn),
+            time=self.time,
+            item=ItemInfo(self.name),
+            geometry=self.geometry.geometry2d,
+            dims=self.dims,
+        )
+
     # ============= MATH operations ===========
 
     def __radd__(self, other) -> "DataArray":
@@ -978,7 +978,7 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
             if isinstance(
                 self.geometry, GeometryFM
             ):  # TODO remove this when all geometries implements the same method
-                interpolant = self.geometry.get_2d_interpolant(
+                interpolant = self.geometry.get_interpolant(
                     xy, n_nearest=n_nearest, **kwargs
                 )
                 das = [da.interp(x=x, y=y, interpolant=interpolant) for da in self]
@@ -1077,6 +1077,7 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
     def interp_like(
         self,
         other: Union["Dataset", DataArray, Grid2D, GeometryFM, pd.DatetimeIndex],
+        interpolant=None,
         **kwargs,
     ) -> "Dataset":
         """Interpolate in space (and in time) to other geometry (and time axis)
@@ -1087,6 +1088,10 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
         Parameters
         ----------
         other: Dataset, DataArray, Grid2D, GeometryFM, pd.DatetimeIndex
+        interpolant: Interpolant, tuple or scipy.sparse matrix, optional
+            Reuse pre-calculated interpolant, by default
+            GeometryFM.get_interpolant which reuses interpolants for the
+            same mesh and coordinates (up to GeometryFM.max_interpolant_bytes)
         kwargs: additional kwargs are passed to interpolation method
 
         Examples
@@ -1098,6 +1103,9 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
         >>> dse = ds.interp_like(ds2, extrapolate=True)
         >>> dst = ds.interp_like(ds2.time)
 
+        >>> interpolant = ds.geometry.get_interpolant(ds2.geometry.xy)
+        >>> dsi = ds.interp_like(ds2, interpolant=interpolant)
+
         Returns
         -------
         Dataset
@@ -1128,7 +1136,8 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
         else:
             raise NotImplementedError()
 
-        interpolant = self.geometry.get_2d_interpolant(xy, **kwargs)
+        if interpolant is None:
+            interpolant = self.geometry.get_interpolant(xy, **kwargs)
         das = [da.interp_like(geom, interpolant=interpolant) for da in self]
         ds = Dataset(das, validate=False)
 
@@ -1661,6 +1670,36 @@ class Dataset(DataUtilsMixin, TimeSeries, collections.abc.MutableMapping):
         """
         return self.aggregate(axis=axis, func=np.nanstd, **kwargs)
 
+    def depth_average(self) -> "Dataset":
+        """Depth average of 3d data, weighted by the layer thickness
+
+        Returns
+        -------
+        Dataset
+            dataset with depth averaged values on the 2d geometry
+
+        See Also
+        --------
+            DataArray.depth_average : Depth average of a single item
+        """
+        res = {name: da.depth_average() for name, da in self._data_vars.items()}
+        return Dataset(data=res, validate=False)
+
+    def depth_integral(self) -> "Dataset":
+        """Vertical integral of 3d data, the sum of value times layer thickness
+
+        Returns
+        -------
+        Dataset
+            dataset with depth integrated values on the 2d geometry
+
+        See Also
+        --------
+            DataArray.depth_integral : Depth integral of a single item
+        """
+        res = {name: da.depth_integral() for name, da in self._data_vars.items()}
+        return Dataset(data=res, validate=False)
+
     # ============ arithmetic/Math =============
 
     def __radd__(self, other) -> "Dataset":
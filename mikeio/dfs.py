@@ -10,12 +10,21 @@ from mikeio.spatial.geometry import GeometryUndefined
 from .dataset import Dataset
 from .base import TimeSeries
 
-from .dfsutil import _valid_item_numbers, _valid_timesteps, _get_item_info
+from .dfsutil import (
+    _DfsMemoryMap,
+    _get_item_info,
+    _iter_item_time_steps,
+    _read_item_time_steps_mmap,
+    _valid_backend,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
 from .eum import ItemInfo, TimeStepUnit, EUMType, EUMUnit
 from .custom_exceptions import DataDimensionMismatch, ItemNumbersError
 from mikecore.eum import eumQuantity
 from mikecore.DfsFile import DfsSimpleType, TimeAxisType
 from mikecore.DfsFactory import DfsFactory
+from mikecore.DfsFileFactory import DfsFileFactory
 
 
 class _Dfs123(TimeSeries):
@@ -38,6 +47,7 @@ class _Dfs123(TimeSeries):
         self.geometry = GeometryUndefined()
         self._dfs = None
         self._source = None
+        self._mmap = None
 
     def read(
         self,
@@ -47,6 +57,7 @@ class _Dfs123(TimeSeries):
         time_steps=None,
         keepdims=False,
         dtype=np.float32,
+        backend="mikecore",
     ) -> Dataset:
         """
         Read data from a dfs file
@@ -60,6 +71,12 @@ class _Dfs123(TimeSeries):
         keepdims: bool, optional
             When reading a single time step only, should the time-dimension be kept
             in the returned Dataset? by default: False
+        backend: str, optional
+            "mikecore" (default) reads the data with mikecore,
+            "mmap" returns views of a copy-on-write memory map of the
+            (uncompressed) file instead of copies; values are only read
+            from disk when accessed and delete values are not replaced
+            by NaN (compare with the deletevalue of the file)
 
         Returns
         -------
@@ -72,6 +89,7 @@ class _Dfs123(TimeSeries):
                 )
             )
             time = time_steps
+        _valid_backend(backend, dtype)
 
         self._open()
 
@@ -91,29 +109,40 @@ class _Dfs123(TimeSeries):
         if single_time_selected and not keepdims:
             shape = shape[1:]
 
-        data_list = [np.ndarray(shape=shape, dtype=dtype) for item in range(n_items)]
-
-        t_seconds = np.zeros(len(time_steps))
+        if backend == "mmap":
+            data_list, t_seconds = _read_item_time_steps_mmap(
+                self._memory_map(time_steps),
+                [n + 1 for n in item_numbers],
+                time_steps,
+            )
+            data_list = [d.reshape(shape) for d in data_list]
+        else:
+            data_list = [
+                np.ndarray(shape=shape, dtype=dtype) for item in range(n_items)
+            ]
+            t_seconds = np.zeros(len(time_steps))
 
-        for i, it in enumerate(tqdm(time_steps, disable=not self.show_progress)):
-            for item in range(n_items):
+            for i, it in enumerate(tqdm(time_steps, disable=not self.show_progress)):
+                for item in range(n_items):
 
-                itemdata = self._dfs.ReadItemTimeStep(item_numbers[item] + 1, int(it))
+                    itemdata = self._dfs.ReadItemTimeStep(
+                        item_numbers[item] + 1, int(it)
+                    )
 
-                src = itemdata.Data
-                d = src
+                    src = itemdata.Data
+                    d = src
 
-                d[d == self.deletevalue] = np.nan
+                    d[d == self.deletevalue] = np.nan
 
-                if self._ndim == 2:
-                    d = d.reshape(self._ny, self._nx)
+                    if self._ndim == 2:
+                        d = d.reshape(self._ny, self._nx)
 
-                if single_time_selected:
-                    data_list[item] = d
-                else:
-                    data_list[item][i] = d
+                    if single_time_selected:
+                        data_list[item] = d
+                    else:
+                        data_list[item][i] = d
 
-            t_seconds[i] = itemdata.Time
+                t_seconds[i] = itemdata.Time
 
         time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
 
@@ -122,6 +151,79 @@ class _Dfs123(TimeSeries):
         self._dfs.Close()
         return Dataset(data_list, time, items, geometry=self.geometry, validate=False)
 
+    def iter_timesteps(self, *, items=None, time=None, chunk=24, dtype=np.float32):
+        """
+        Iterate over the time steps of a dfs file, a chunk of time steps at a time
+
+        Only one chunk is held in memory, which makes it possible to
+        process files which are larger than the available memory.
+
+        Parameters
+        ---------
+        items: list[int] or list[str], optional
+            Read only selected items, by number (0-based), or by name
+        time: int, str, datetime, pd.TimeStamp, sequence, slice or pd.DatetimeIndex, optional
+            Read only selected time steps, by default None (=all)
+        chunk: int, optional
+            Max number of time steps in each Dataset, by default 24
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float32
+
+        Yields
+        ------
+        Dataset
+            A Dataset with a time dimension for each chunk.
+            The values share a buffer which is overwritten by the next
+            chunk; use copy() to keep them.
+        """
+        if dtype not in [np.float32, np.float64]:
+            raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+
+        shape = self._shape_of_values()
+        dims = ("time",) + ("z", "y", "x")[-self._ndim :]
+
+        dfs = DfsFileFactory.DfsGenericOpen(self._filename)
+        try:
+            item_numbers = _valid_item_numbers(dfs.ItemInfo, items)
+            items = _get_item_info(dfs.ItemInfo, item_numbers)
+            _, time_steps = _valid_timesteps(dfs.FileInfo, time)
+
+            for data, t_seconds in _iter_item_time_steps(
+                dfs,
+                [n + 1 for n in item_numbers],
+                time_steps,
+                shape,
+                chunk=chunk,
+                dtype=dtype,
+                deletevalue=self.deletevalue,
+            ):
+                time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
+                yield Dataset(
+                    list(data),
+                    time,
+                    items,
+                    geometry=self.geometry,
+                    dims=dims,
+                    validate=False,
+                )
+        finally:
+            dfs.Close()
+
+    def _shape_of_values(self):
+        """Shape of the values of a single item-timestep"""
+        if self._ndim == 1:
+            return (self._nx,)
+        elif self._ndim == 2:
+            return (self._ny, self._nx)
+        else:
+            return (self._nz, self._ny, self._nx)
+
+    def _memory_map(self, time_steps):
+        if self._mmap is None or max(time_steps) >= self._mmap.n_timesteps:
+            # (re-)index if the file has grown since it was indexed
+            self._mmap = _DfsMemoryMap(self._filename)
+        return self._mmap
+
     def _read_header(self):
         dfs = self._dfs
         self._n_items = len(dfs.ItemInfo)
@@ -15,7 +15,13 @@ from .dfs import _Dfs123
 from .dataset import Dataset
 from .eum import TimeStepUnit
 from .spatial.grid_geometry import Grid2D
-from .dfsutil import _valid_item_numbers, _valid_timesteps, _get_item_info
+from .dfsutil import (
+    _get_item_info,
+    _read_item_time_steps_mmap,
+    _valid_backend,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
 
 
 def write_dfs2(filename: str, ds: Dataset, title="") -> None:
@@ -231,6 +237,7 @@ class Dfs2(_Dfs123):
         keepdims=False,
         time_steps=None,
         dtype=np.float32,
+        backend="mikecore",
     ) -> Dataset:
         """
         Read data from a dfs2 file
@@ -247,6 +254,12 @@ class Dfs2(_Dfs123):
         area: array[float], optional
             Read only data inside (horizontal) area given as a
             bounding box (tuple with left, lower, right, upper) coordinates
+        backend: str, optional
+            "mikecore" (default) reads the data with mikecore,
+            "mmap" returns views of a copy-on-write memory map of the
+            (uncompressed) file instead of copies; values are only read
+            from disk when accessed and delete values are not replaced
+            by NaN (compare with the deletevalue of the file)
 
         Returns
         -------
@@ -259,6 +272,7 @@ class Dfs2(_Dfs123):
                 )
             )
             time = time_steps
+        _valid_backend(backend, dtype)
 
         self._open()
 
@@ -282,28 +296,45 @@ class Dfs2(_Dfs123):
         if single_time_selected and not keepdims:
             shape = shape[1:]
 
-        data_list = [np.ndarray(shape=shape, dtype=dtype) for item in range(n_items)]
+        if backend == "mmap":
+            data_list, t_seconds = _read_item_time_steps_mmap(
+                self._memory_map(time_steps),
+                [n + 1 for n in item_numbers],
+                time_steps,
+            )
+            data_list = [d.reshape(-1, self._ny, self._nx) for d in data_list]
+            if take_subset:
+                data_list = [
+                    np.take(np.take(d, jj, axis=1), ii, axis=2) for d in data_list
+                ]
+            data_list = [d.reshape(shape) for d in data_list]
+        else:
+            data_list = [
+                np.ndarray(shape=shape, dtype=dtype) for item in range(n_items)
+            ]
 
-        t_seconds = np.zeros(len(time_steps))
+            t_seconds = np.zeros(len(time_steps))
 
-        for i, it in enumerate(tqdm(time_steps, disable=not self.show_progress)):
-            for item in range(n_items):
+            for i, it in enumerate(tqdm(time_steps, disable=not self.show_progress)):
+                for item in range(n_items):
 
-                itemdata = self._dfs.ReadItemTimeStep(item_numbers[item] + 1, int(it))
-                d = itemdata.Data
+                    itemdata = self._dfs.ReadItemTimeStep(
+                        item_numbers[item] + 1, int(it)
+                    )
+                    d = itemdata.Data
 
-                d[d == self.deletevalue] = np.nan
-                d = d.reshape(self._ny, self._nx)
+                    d[d == self.deletevalue] = np.nan
+                    d = d.reshape(self._ny, self._nx)
 
-                if take_subset:
-                    d = np.take(np.take(d, jj, axis=0), ii, axis=-1)
+                    if take_subset:
+                        d = np.take(np.take(d, jj, axis=0), ii, axis=-1)
 
-                if single_time_selected and not keepdims:
-                    data_list[item] = d
-                else:
-                    data_list[item][i] = d
+                    if single_time_selected and not keepdims:
+                        data_list[item] = d
+                    else:
+                        data_list[item][i] = d
 
-            t_seconds[i] = itemdata.Time
+                t_seconds[i] = itemdata.Time
 
         self._dfs.Close()
 
@@ -10,7 +10,13 @@ from mikecore.Projections import Cartography
 import pandas as pd
 
 from . import __dfs_version__
-from .dfsutil import _valid_item_numbers, _valid_timesteps, _get_item_info
+from .dfsutil import (
+    _get_item_info,
+    _read_item_time_steps_mmap,
+    _valid_backend,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
 from .dataset import Dataset
 from .eum import TimeStepUnit
 from .dfs import _Dfs123
@@ -204,6 +210,8 @@ class Dfs3(_Dfs123):
         layers=None,
         keepdims=False,
         time_steps=None,
+        dtype=np.float64,
+        backend="mikecore",
     ) -> Dataset:
         """
         Read data from a dfs3 file
@@ -219,6 +227,15 @@ class Dfs3(_Dfs123):
             bounding box (tuple with left, lower, right, upper) coordinates
         layers: int, str, list[int], optional
             Read only data for specific layers, by default None
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float64;
+            backend="mmap" requires np.float32
+        backend: str, optional
+            "mikecore" (default) reads the data with mikecore,
+            "mmap" returns views of a copy-on-write memory map of the
+            (uncompressed) file instead of copies; values are only read
+            from disk when accessed and delete values are not replaced
+            by NaN (compare with the deletevalue of the file)
 
         Returns
         -------
@@ -232,6 +249,9 @@ class Dfs3(_Dfs123):
         # NOTE:
         # if keepdims is not False:
         #    return NotImplementedError("keepdims is not yet implemented for Dfs3")
+        if dtype not in [np.float32, np.float64]:
+            raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+        _valid_backend(backend, dtype)
 
         # Open the dfs file for reading
         dfs = DfsFileFactory.DfsGenericOpen(self._filename)
@@ -266,32 +286,60 @@ class Dfs3(_Dfs123):
 
         nz = zNum if layers is None else len(layers)
         shape = (nt, nz, yNum, xNum) if nz > 1 else (nt, yNum, xNum)
-        for item in range(n_items):
-            data = np.ndarray(shape=shape, dtype=float)
-            data_list.append(data)
-
-        t_seconds = np.zeros(nt, dtype=float)
-
-        for it_number, it in enumerate(time_steps):
+        if backend == "mmap":
+            data_list, t_seconds = _read_item_time_steps_mmap(
+                self._memory_map(time_steps),
+                [n + 1 for n in item_numbers],
+                time_steps,
+            )
+            data_list = [d.reshape(-1, zNum, yNum, xNum) for d in data_list]
+            deleteValue = np.float32(deleteValue)
+            if layers is not None and layers[0] == "bottom":
+                data_list = [
+                    np.stack(
+                        [
+                            self._get_bottom_values(
+                                np.where(x == deleteValue, np.nan, x)
+                            )
+                            for x in d
+                        ]
+                    )
+                    for d in data_list
+                ]
+            elif layers is not None:
+                layers = layers.astype(int)
+                data_list = [
+                    d[:, layers[0]] if nz == 1 else d[:, layers] for d in data_list
+                ]
+        else:
             for item in range(n_items):
-                itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, int(it))
-                d = itemdata.Data
-
-                d = d.reshape(zNum, yNum, xNum)
-                d[d == deleteValue] = np.nan
-
-                if layers is None:
-                    data_list[item][it_number, :, :, :] = d
-                elif len(layers) == 1:
-                    if layers[0] == "bottom":
-                        data_list[item][it_number, :, :] = self._get_bottom_values(d)
+                data = np.ndarray(shape=shape, dtype=dtype)
+                data_list.append(data)
+
+            t_seconds = np.zeros(nt, dtype=float)
+
+            for it_number, it in enumerate(time_steps):
+                for item in range(n_items):
+                    itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, int(it))
+                    d = itemdata.Data
+
+                    d = d.reshape(zNum, yNum, xNum)
+                    d[d == deleteValue] = np.nan
+
+                    if layers is None:
+                        data_list[item][it_number, :, :, :] = d
+                    elif len(layers) == 1:
+                        if layers[0] == "bottom":
+                            data_list[item][it_number, :, :] = self._get_bottom_values(
+                                d
+                            )
+                        else:
+                            data_list[item][it_number, :, :] = d[layers[0], :, :]
                     else:
-                        data_list[item][it_number, :, :] = d[layers[0], :, :]
-                else:
-                    for l in range(len(layers)):
-                        data_list[item][it_number, l, :, :] = d[layers[l], :, :]
+                        for l in range(len(layers)):
+                            data_list[item][it_number, l, :, :] = d[layers[l], :, :]
 
-            t_seconds[it_number] = itemdata.Time
+                t_seconds[it_number] = itemdata.Time
 
         dfs.Close()
 
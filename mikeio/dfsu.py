@@ -5,6 +5,7 @@ import warnings
 
 from datetime import datetime, timedelta
 from functools import wraps
+from scipy.sparse import csr_matrix
 from tqdm import trange
 
 from mikecore.eum import eumUnit, eumQuantity
@@ -18,10 +19,21 @@ from mikeio.spatial.utils import xy_to_bbox
 
 from . import __dfs_version__
 from .base import EquidistantTimeSeries
-from .dfsutil import _get_item_info, _valid_item_numbers, _valid_timesteps
+from .dfsutil import (
+    _get_item_info,
+    _DfsMemoryMap,
+    _iter_item_time_steps,
+    _read_item_time_steps,
+    _read_item_time_steps_mmap,
+    _time_in_seconds,
+    _valid_backend,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
 from .dataset import Dataset, DataArray
 from .dfs0 import Dfs0
 from .eum import ItemInfo, EUMType, EUMUnit
+from .lazy import _LazyArray, _LazyDfsReader
 from .spatial.FM_geometry import (
     GeometryFM,
     GeometryFM3D,
@@ -31,21 +43,12 @@ from .spatial.FM_geometry import (
     GeometryFMAreaSpectrum,
     GeometryFMLineSpectrum,
 )
-from .spatial.FM_utils import _plot_map
+from .spatial.FM_utils import _plot_map, _to_padded_element_table
 from .spatial.grid_geometry import Grid2D
 
 
-def _write_dfsu(filename: str, data: Dataset):
-
-    filename = str(filename)
-
-    if len(data.time) == 1:
-        dt = 1  # TODO is there any sensible default?
-    else:
-        dt = (data.time[1] - data.time[0]).total_seconds()
-    n_time_steps = len(data.time)
-
-    geometry = data.geometry
+def _create_dfsu(filename: str, geometry, start_time, dt: float, items):
+    """Create a dfsu file with the geometry and items, ready for writing"""
     dfsu_filetype = DfsuFileType.Dfsu2D
 
     if geometry.is_layered:
@@ -55,7 +58,7 @@ def _write_dfsu(filename: str, data: Dataset):
     yn = geometry.node_coordinates[:, 1]
     zn = geometry.node_coordinates[:, 2]
 
-    elem_table = [np.array(e) + 1 for e in geometry.element_table]
+    elem_table = geometry._get_element_table_for_mikecore()
 
     builder = DfsuBuilder.Create(dfsu_filetype)
     if dfsu_filetype != DfsuFileType.Dfsu2D:
@@ -67,18 +70,30 @@ def _write_dfsu(filename: str, data: Dataset):
     factory = DfsFactory()
     proj = factory.CreateProjection(geometry.projection_string)
     builder.SetProjection(proj)
-    builder.SetTimeInfo(data.time[0], dt)
+    builder.SetTimeInfo(start_time, dt)
     builder.SetZUnit(eumUnit.eumUmeter)
 
     if dfsu_filetype != DfsuFileType.Dfsu2D:
         builder.SetNumberOfSigmaLayers(geometry.n_sigma_layers)
 
-    for item in data.items:
+    for item in items:
         builder.AddDynamicItem(item.name, eumQuantity.Create(item.type, item.unit))
 
     builder.ApplicationTitle = "mikeio"
     builder.ApplicationVersion = __dfs_version__
-    dfs = builder.CreateFile(filename)
+    return builder.CreateFile(str(filename))
+
+
+def _write_dfsu(filename: str, data: Dataset):
+
+    if len(data.time) == 1:
+        dt = 1  # TODO is there any sensible default?
+    else:
+        dt = (data.time[1] - data.time[0]).total_seconds()
+    n_time_steps = len(data.time)
+
+    geometry = data.geometry
+    dfs = _create_dfsu(filename, geometry, data.time[0], dt, data.items)
 
     for i in range(n_time_steps):
         if geometry.is_layered:
@@ -203,6 +218,7 @@ class _UnstructuredFile:
             node_ids=node_ids,
             validate=False,
         )
+        self._geometry._index_cache_enabled = True
 
     def _read_dfsu_header(self, dfs):
         """
@@ -283,6 +299,7 @@ class _UnstructuredFile:
                     node_ids=node_ids,
                     validate=False,
                 )
+            self._geometry._index_cache_enabled = True
 
         # items
         n_items = len(dfs.ItemInfo)
@@ -316,21 +333,11 @@ class _UnstructuredFile:
         element_ids = source.ElementIds - 1
         return element_table, element_ids
 
-    @staticmethod
-    def _offset_element_table_by(element_table, offset, copy=True):
-        offset = int(offset)
-        new_elem_table = element_table.copy() if copy else element_table
-        for j in range(len(element_table)):
-            new_elem_table[j] = element_table[j] + offset
-        return new_elem_table
-
     @staticmethod
     def _get_element_table_from_mikecore(element_table):
-        return _UnstructuredFile._offset_element_table_by(element_table, -1)
-
-    @staticmethod
-    def _element_table_to_mikecore(element_table):
-        return _UnstructuredFile._offset_element_table_by(element_table, 1)
+        # padded (n_elements, max_nodes_per_element) table with 0-based node ids
+        table, _ = _to_padded_element_table(element_table)
+        return np.where(table > 0, table - 1, -1)
 
     @property
     def type_name(self):
@@ -646,6 +653,7 @@ class _UnstructuredFile:
             figsize=figsize,
             ax=ax,
             add_colorbar=add_colorbar,
+            node_centering=geometry._get_node_centering_matrix,
         )
 
 
@@ -662,6 +670,7 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
         """
         super().__init__()
         self._filename = str(filename)
+        self._mmap = None
         input = self._filename if dfs is None else dfs
         self._read_header(input)
 
@@ -722,6 +731,8 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
         y=None,
         keepdims=False,
         dtype=np.float32,
+        backend="mikecore",
+        lazy=False,
     ) -> Dataset:
         """
         Read data from a dfsu file
@@ -744,6 +755,19 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
             by default None
         elements: list[int], optional
             Read only selected element ids, by default None
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float32
+        backend: str, optional
+            "mikecore" (default) reads the data with mikecore,
+            "mmap" returns views of a copy-on-write memory map of the
+            (uncompressed) file instead of copies; values are only read
+            from disk when accessed and delete values are not replaced
+            by NaN (compare with the deletevalue of the file)
+        lazy: bool, optional
+            Defer reading: values are read from file (in chunks) when
+            they are accessed. Selections (isel/sel) are applied before
+            reading and reductions like nanmean(axis="time") are
+            computed chunk by chunk, by default False
 
         Returns
         -------
@@ -773,6 +797,9 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
         """
         if dtype not in [np.float32, np.float64]:
             raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+        _valid_backend(backend, dtype)
+        if lazy and backend != "mikecore":
+            raise ValueError("lazy=True can only be used with backend='mikecore'")
 
         # Open the dfs file for reading
         # self._read_dfsu_header(self._filename)
@@ -811,40 +838,45 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
         items = _get_item_info(dfs.ItemInfo, item_numbers, ignore_first=self.is_layered)
         n_items = len(item_numbers)
 
-        deletevalue = self.deletevalue
-
-        data_list = []
-
         n_steps = len(time_steps)
-        shape = (
-            (n_elems,)
-            if (single_time_selected and not keepdims)
-            else (n_steps, n_elems)
-        )
-        for item in range(n_items):
-            # Initialize an empty data block
-            data = np.ndarray(shape=shape, dtype=dtype)
-            data_list.append(data)
-
-        t_seconds = np.zeros(n_steps, dtype=float)
-
-        for i in trange(n_steps, disable=not self.show_progress):
-            it = time_steps[i]
-            for item in range(n_items):
-
-                itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, it)
-                d = itemdata.Data
-                d[d == deletevalue] = np.nan
 
-                if elements is not None:
-                    d = d[elements]
-
-                if single_time_selected and not keepdims:
-                    data_list[item] = d
-                else:
-                    data_list[item][i] = d
-
-            t_seconds[i] = itemdata.Time
+        if lazy:
+            reader = _LazyDfsReader(self._filename, self.deletevalue, dtype)
+            data_list = [
+                _LazyArray(
+                    reader,
+                    n + 1,
+                    dfs.ItemInfo[n].ElementCount,
+                    time_steps,
+                    elements,
+                    time_axis=not (single_time_selected and not keepdims),
+                )
+                for n in item_numbers
+            ]
+            t_seconds = _time_in_seconds(dfs, time_steps)
+        elif backend == "mmap":
+            data_list, t_seconds = _read_item_time_steps_mmap(
+                self._memory_map(time_steps),
+                [n + 1 for n in item_numbers],
+                time_steps,
+                elements=elements,
+            )
+        else:
+            # one contiguous block for all items; each item is a contiguous
+            # (time, element) sub-array which is used directly as DataArray values
+            data = np.empty((n_items, n_steps, n_elems), dtype=dtype)
+            t_seconds = _read_item_time_steps(
+                dfs,
+                [n + 1 for n in item_numbers],
+                time_steps,
+                data,
+                elements=elements,
+                deletevalue=self.deletevalue,
+                disable_progress=not self.show_progress,
+            )
+            data_list = list(data)
+        if single_time_selected and not keepdims and not lazy:
+            data_list = [d[0] for d in data_list]
 
         time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
 
@@ -864,6 +896,139 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
             data_list, time, items, geometry=geometry, dims=dims, validate=False
         )
 
+    def iter_timesteps(
+        self,
+        *,
+        items=None,
+        time=None,
+        elements=None,
+        area=None,
+        chunk=24,
+        dtype=np.float32,
+    ):
+        """
+        Iterate over the time steps of a dfsu file, a chunk of time steps at a time
+
+        Only one chunk is held in memory, which makes it possible to
+        process files which are larger than the available memory.
+
+        Parameters
+        ---------
+        items: list[int] or list[str], optional
+            Read only selected items, by number (0-based), or by name
+        time: int, str, datetime, pd.TimeStamp, sequence, slice or pd.DatetimeIndex, optional
+            Read only selected time steps, by default None (=all)
+        elements: list[int], optional
+            Read only selected element ids, by default None
+        area: list[float], optional
+            Read only data inside (horizontal) area given as a
+            bounding box (tuple with left, lower, right, upper)
+            or as list of coordinates for a polygon, by default None
+        chunk: int, optional
+            Max number of time steps in each Dataset, by default 24
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float32
+
+        Yields
+        ------
+        Dataset
+            A Dataset with data dimensions [t,elements] for each chunk.
+            The values share a buffer which is overwritten by the next
+            chunk; use copy() to keep them.
+
+        Examples
+        --------
+        >>> total = 0.0
+        >>> for ds in dfsu.iter_timesteps(items="Current speed", chunk=100):
+        ...     total += ds[0].to_numpy().sum()
+        """
+        if dtype not in [np.float32, np.float64]:
+            raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+
+        self._validate_elements_and_geometry_sel(elements, area=area)
+        if area is not None:
+            elements = self.geometry._elements_in_area(area)
+            if len(elements) == 0:
+                raise ValueError("No elements in selection!")
+
+        if elements is None:
+            geometry = self.geometry
+            n_elems = geometry.n_elements
+        else:
+            elements = [elements] if np.isscalar(elements) else list(elements)
+            n_elems = len(elements)
+            geometry = self.geometry.elements_to_geometry(elements)
+
+        dfs = DfsuFile.Open(self._filename)
+        try:
+            _, time_steps = _valid_timesteps(dfs, time)
+            item_numbers = _valid_item_numbers(
+                dfs.ItemInfo, items, ignore_first=self.is_layered
+            )
+            items = _get_item_info(
+                dfs.ItemInfo, item_numbers, ignore_first=self.is_layered
+            )
+            if self.is_layered:
+                item_numbers = [it + 1 for it in item_numbers]
+
+            zn_chunks = None
+            if getattr(geometry, "is_layered", False):
+                # the dynamic z-values of the nodes are stored as the first item
+                node_ids = None
+                if elements is not None:
+                    node_ids, _ = self.geometry._get_nodes_and_table_for_elements(
+                        elements
+                    )
+                n_nodes = self.n_nodes if node_ids is None else len(node_ids)
+                zn_chunks = _iter_item_time_steps(
+                    dfs,
+                    [1],
+                    time_steps,
+                    (n_nodes,),
+                    chunk=chunk,
+                    dtype=dtype,
+                    elements=node_ids,
+                    deletevalue=self.deletevalue,
+                )
+
+            dims = ("time", "element")
+            if n_elems == 1:
+                # squeeze point data
+                dims = ("time",)
+
+            for data, t_seconds in _iter_item_time_steps(
+                dfs,
+                [n + 1 for n in item_numbers],
+                time_steps,
+                (n_elems,),
+                chunk=chunk,
+                dtype=dtype,
+                elements=elements,
+                deletevalue=self.deletevalue,
+            ):
+                time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
+                data_list = list(data)
+                if n_elems == 1:
+                    data_list = [np.squeeze(d, axis=-1) for d in data_list]
+                zn = None if zn_chunks is None else next(zn_chunks)[0][0]
+                yield Dataset(
+                    data_list,
+                    time,
+                    items,
+                    geometry=geometry,
+                    zn=zn,
+                    dims=dims,
+                    validate=False,
+                )
+        finally:
+            dfs.Close()
+
+    def _memory_map(self, time_steps):
+        if self._mmap is None or max(time_steps) >= self._mmap.n_timesteps:
+            # (re-)index if the file has grown since it was indexed
+            self._mmap = _DfsMemoryMap(self._filename)
+        return self._mmap
+
     def _validate_elements_and_geometry_sel(self, elements, **kwargs):
         used_kwargs = []
         for kw, val in kwargs.items():
@@ -1110,14 +1275,7 @@ class _Dfsu(_UnstructuredFile, EquidistantTimeSeries):
         # zn have to be Single precision??
         zn = geometry.node_coordinates[:, 2]
 
-        # TODO verify this
-        # elem_table = geometry.element_table
-        elem_table = []
-        for j in range(geometry.n_elements):
-            elem_nodes = geometry.element_table[j]
-            elem_nodes = [nd + 1 for nd in elem_nodes]
-            elem_table.append(np.array(elem_nodes))
-        elem_table = elem_table
+        elem_table = geometry._get_element_table_for_mikecore()
 
         builder = DfsuBuilder.Create(dfsu_filetype)
 
@@ -1223,6 +1381,10 @@ class Dfsu2DH(_Dfsu):
         """
         Extract track data from a dfsu file
 
+        Track points are grouped by the bracketing time steps of the dfsu
+        file, each time step is read once and only for the elements used
+        by the track.
+
         Parameters
         ---------
         track: pandas.DataFrame
@@ -1230,16 +1392,21 @@ class Dfsu2DH(_Dfsu):
             x,y coordinates must be in same coordinate system as dfsu
         track: str
             filename of csv or dfs0 file containing t,x,y
+        track: list
+            several tracks (DataFrame, Dataset or filename) extracted
+            in one pass over the dfsu file; a track without time overlap
+            with the dfsu file gets NaN values (a single track raises
+            ValueError)
         items: list[int] or list[str], optional
             Extract only selected items, by number (0-based), or by name
         method: str, optional
-            Spatial interpolation method ('nearest' or 'inverse_distance')
-            default='nearest'
+            Spatial interpolation method ('nearest', 'inverse_distance'
+            or 'linear'), default='nearest'
 
         Returns
         -------
-        Dataset
-            A dataset with data dimension t
+        Dataset or list[Dataset]
+            A dataset with data dimension t (for each track)
             The first two items will be x- and y- coordinates of track
 
         Examples
@@ -1249,165 +1416,220 @@ class Dfsu2DH(_Dfsu):
         >>> ds = dfsu.extract_track('track_file.dfs0')
 
         >>> ds = dfsu.extract_track('track_file.csv', items=0)
+
+        >>> ds1, ds2 = dfsu.extract_track(['track1.csv', 'track2.csv'])
         """
         if self.is_spectral:
             raise ValueError("Method not supported for spectral dfsu!")
 
-        dfs = DfsuFile.Open(self._filename)
+        is_list = isinstance(track, (list, tuple))
+        tracks = [_parse_track(t) for t in (track if is_list else [track])]
 
-        item_numbers = _valid_item_numbers(dfs.ItemInfo, items)
-        items = _get_item_info(dfs.ItemInfo, item_numbers)
-        n_items = len(item_numbers)
+        dfs = DfsuFile.Open(self._filename)
+        try:
+            item_numbers = _valid_item_numbers(dfs.ItemInfo, items)
+            items = _get_item_info(dfs.ItemInfo, item_numbers)
+            self._n_timesteps = dfs.NumberOfTimeSteps
+
+            if not is_list:
+                _check_track_overlap(tracks[0][0], self.start_time, self.end_time)
+
+            def read_steps(steps, elements):
+                yield from _iter_item_time_steps(
+                    dfs,
+                    [n + 1 for n in item_numbers],
+                    steps,
+                    (len(elements),),
+                    dtype=dtype,
+                    elements=elements,
+                    deletevalue=self.deletevalue,
+                )
 
-        self._n_timesteps = dfs.NumberOfTimeSteps
-        _, time_steps = _valid_timesteps(dfs, time_steps=None)
-
-        deletevalue = self.deletevalue
-
-        if isinstance(track, str):
-            filename = track
-            if os.path.exists(filename):
-                _, ext = os.path.splitext(filename)
-                if ext == ".dfs0":
-                    df = Dfs0(filename).to_dataframe()
-                elif ext == ".csv":
-                    df = pd.read_csv(filename, index_col=0, parse_dates=True)
-                else:
-                    raise ValueError(f"{ext} files not supported (dfs0, csv)")
-
-                times = df.index
-                coords = df.iloc[:, 0:2].to_numpy(copy=True)
+            step_times = self.timestep * np.arange(self.n_timesteps)
+            datasets = _extract_tracks(
+                tracks,
+                self.geometry,
+                self.start_time,
+                step_times,
+                read_steps,
+                items,
+                method=method,
+                dtype=dtype,
+                show_progress=self.show_progress,
+            )
+        finally:
+            dfs.Close()
+
+        return datasets if is_list else datasets[0]
+
+
+def _parse_track(track):
+    """Time and (x, y) coordinates of track given as file, Dataset or DataFrame"""
+    if isinstance(track, str):
+        filename = track
+        if os.path.exists(filename):
+            _, ext = os.path.splitext(filename)
+            if ext == ".dfs0":
+                df = Dfs0(filename).to_dataframe()
+            elif ext == ".csv":
+                df = pd.read_csv(filename, index_col=0, parse_dates=True)
             else:
-                raise ValueError(f"{filename} does not exist")
-        elif isinstance(track, Dataset):
-            times = track.time
-            coords = np.zeros(shape=(len(times), 2))
-            coords[:, 0] = track[0].to_numpy().copy()
-            coords[:, 1] = track[1].to_numpy().copy()
-        else:
-            assert isinstance(track, pd.DataFrame)
-            times = track.index
-            coords = track.iloc[:, 0:2].to_numpy(copy=True)
-
-        assert isinstance(
-            times, pd.DatetimeIndex
-        ), "The index must be a pandas.DatetimeIndex"
-        assert (
-            times.is_monotonic_increasing
-        ), "The time index must be monotonic increasing. Consider df.sort_index() before passing to extract_track()."
-
-        data_list = []
-        data_list.append(coords[:, 0])  # longitude
-        data_list.append(coords[:, 1])  # latitude
-        for item in range(n_items):
-            # Initialize an empty data block
-            data = np.empty(shape=(len(times)), dtype=dtype)
-            data[:] = np.nan
-            data_list.append(data)
-
-        if self.is_geo:
-            lon = coords[:, 0]
-            lon[lon < -180] = lon[lon < -180] + 360
-            lon[lon >= 180] = lon[lon >= 180] - 360
-            coords[:, 0] = lon
-
-        # track end (relative to dfsu)
-        t_rel = (times - self.end_time).total_seconds()
-        # largest idx for which (times - self.end_time)<=0
-        tmp = np.where(t_rel <= 0)[0]
-        if len(tmp) == 0:
-            raise ValueError("No time overlap! Track ends before dfsu starts!")
-        i_end = tmp[-1]
-
-        # track time relative to dfsu start
-        t_rel = (times - self.start_time).total_seconds()
-        tmp = np.where(t_rel >= 0)[0]
-        if len(tmp) == 0:
-            raise ValueError("No time overlap! Track starts after dfsu ends!")
-        i_start = tmp[0]  # smallest idx for which t_rel>=0
-
-        dfsu_step = int(np.floor(t_rel[i_start] / self.timestep))  # first step
-
-        # spatial interpolation
-        n_pts = 1 if method == "nearest" else 5
-        elem_ids, weights = self.geometry.get_2d_interpolant(
-            coords[i_start : (i_end + 1)], n_nearest=n_pts
-        )
-
-        # initialize dfsu data arrays
-        d1 = np.ndarray(shape=(n_items, self.n_elements), dtype=dtype)
-        d2 = np.ndarray(shape=(n_items, self.n_elements), dtype=dtype)
-        t1 = 0.0
-        t2 = 0.0
-
-        # very first dfsu time step
-        step = time_steps[dfsu_step]
-        for item in range(n_items):
-            itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, step)
-            t2 = itemdata.Time - 1e-10
-            # d = to_numpy(itemdata.Data)
-            d = itemdata.Data
-            d[d == deletevalue] = np.nan
-            d2[item, :] = d
-
-        def is_EOF(step):
-            return step >= self.n_timesteps
-
-        # loop over track points
-        for i_interp, i in enumerate(
-            trange(i_start, i_end + 1, disable=not self.show_progress)
-        ):
-            t_rel[i]  # time of point relative to dfsu start
-
-            read_next = t_rel[i] > t2
-
-            while (read_next == True) and (not is_EOF(dfsu_step + 1)):
-                dfsu_step = dfsu_step + 1
-
-                # swap new to old
-                d1, d2 = d2, d1
-                t1, t2 = t2, t1
-
-                step = time_steps[dfsu_step]
-                for item in range(n_items):
-                    itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, step)
-                    t2 = itemdata.Time
-                    # d = to_numpy(itemdata.Data)
-                    d = itemdata.Data
-                    d[d == deletevalue] = np.nan
-                    d2[item, :] = d
+                raise ValueError(f"{ext} files not supported (dfs0, csv)")
 
-                read_next = t_rel[i] > t2
+            times = df.index
+            coords = df.iloc[:, 0:2].to_numpy(copy=True)
+        else:
+            raise ValueError(f"{filename} does not exist")
+    elif isinstance(track, Dataset):
+        times = track.time
+        coords = np.zeros(shape=(len(times), 2))
+        coords[:, 0] = track[0].to_numpy().copy()
+        coords[:, 1] = track[1].to_numpy().copy()
+    else:
+        assert isinstance(track, pd.DataFrame)
+        times = track.index
+        coords = track.iloc[:, 0:2].to_numpy(copy=True)
+
+    assert isinstance(
+        times, pd.DatetimeIndex
+    ), "The index must be a pandas.DatetimeIndex"
+    assert (
+        times.is_monotonic_increasing
+    ), "The time index must be monotonic increasing. Consider df.sort_index() before passing to extract_track()."
+
+    return times, np.asarray(coords, dtype=float)
+
+
+def _check_track_overlap(times, start_time, end_time):
+    """Raise ValueError if a track has no time overlap with the data"""
+    if times[0] > end_time:
+        raise ValueError("No time overlap! Track starts after dfsu ends!")
+    if times[-1] < start_time:
+        raise ValueError("No time overlap! Track ends before dfsu starts!")
+
+
+def _extract_tracks(
+    tracks,
+    geometry,
+    start_time,
+    step_times,
+    read_steps,
+    items,
+    *,
+    method="nearest",
+    dtype=np.float32,
+    show_progress=False,
+    chunk_size=2**20,
+):
+    """Interpolate items in space and time to the points of one or more tracks
 
-            if (read_next == True) and (is_EOF(dfsu_step)):
-                # cannot read next - no more timesteps in dfsu file
-                continue
+    Parameters
+    ----------
+    tracks : list[(pd.DatetimeIndex, np.ndarray)]
+        time and (x, y) coordinates of each track
+    geometry : GeometryFM
+        2d geometry of the data
+    start_time : datetime
+        time of step_times = 0
+    step_times : np.ndarray
+        increasing time in seconds of each time step
+    read_steps : callable
+        read_steps(steps, elements) yields (data, t_seconds) with data
+        of shape (n_items, n_steps_in_chunk, n_elements) for consecutive
+        chunks of the steps
+    items : list[ItemInfo]
+        items of the data
+    chunk_size : int, optional
+        max number of track points interpolated at once
+
+    Returns
+    -------
+    list[Dataset]
+        x, y and the items for each track
+    """
+    if method == "linear":
+        kwargs = dict(method="linear")
+    else:
+        kwargs = dict(n_nearest=1 if method == "nearest" else 5)
+
+    # all tracks in one pass, sorted by time
+    t = np.concatenate(
+        [(times - start_time).total_seconds().to_numpy() for times, _ in tracks]
+    )
+    xy = np.concatenate([coords for _, coords in tracks])
+    if geometry.is_geo:
+        lon = xy[:, 0]
+        lon[lon < -180] = lon[lon < -180] + 360
+        lon[lon >= 180] = lon[lon >= 180] - 360
+    order = np.argsort(t, kind="stable")
+
+    values = np.full((len(items), len(t)), np.nan)
+    in_time = (t[order] >= step_times[0]) & (t[order] <= step_times[-1])
+    order = order[in_time]
+    n_points = len(order)
+
+    for start in trange(0, n_points, chunk_size, disable=not show_progress):
+        idx = order[start : start + chunk_size]
+        if n_points <= chunk_size:
+            matrix = geometry.get_interpolant(xy[idx], **kwargs).matrix
+        else:
+            matrix = geometry.get_2d_interpolant(xy[idx], sparse=True, **kwargs)
+        values[:, idx] = _interp_track_chunk(
+            t[idx], step_times, read_steps, matrix, len(items)
+        )
 
-            w = (t_rel[i] - t1) / self.timestep  # time-weight
-            eid = elem_ids[i_interp]
-            if np.any(eid > 0):
-                dati = (1 - w) * np.dot(d1[:, eid], weights[i_interp])
-                dati = dati + w * np.dot(d2[:, eid], weights[i_interp])
-            else:
-                dati = np.empty(shape=n_items, dtype=dtype)
-                dati[:] = np.nan
+    datasets = []
+    offset = 0
+    for times, coords in tracks:
+        n = len(times)
+        data_list = [xy[offset : offset + n, 0], xy[offset : offset + n, 1]]
+        data_list += [v.astype(dtype) for v in values[:, offset : offset + n]]
+        offset += n
 
-            for item in range(n_items):
-                data_list[item + 2][i] = dati[item]
+        if geometry.is_geo:
+            items_out = [ItemInfo("Longitude"), ItemInfo("Latitude")]
+        else:
+            items_out = [ItemInfo("x"), ItemInfo("y")]
+        datasets.append(Dataset(data_list, times, items_out + list(items)))
+    return datasets
 
-        dfs.Close()
 
-        items_out = []
-        if self.is_geo:
-            items_out.append(ItemInfo("Longitude"))
-            items_out.append(ItemInfo("Latitude"))
-        else:
-            items_out.append(ItemInfo("x"))
-            items_out.append(ItemInfo("y"))
-        for item in items:
-            items_out.append(item)
+def _interp_track_chunk(t, step_times, read_steps, matrix, n_items):
+    """Linear in time interpolation of the spatially interpolated values
 
-        return Dataset(data_list, times, items_out)
+    Each time step contributes to the (consecutive) points after it with
+    weight 1-w and to the points before it with weight w; the values of a
+    time step are only needed for the elements used by the matrix.
+    """
+    # remove unused elements
+    matrix = matrix.tocsr()
+    elements, cols = np.unique(matrix.indices, return_inverse=True)
+    matrix = csr_matrix(
+        (matrix.data, cols, matrix.indptr), shape=(matrix.shape[0], len(elements))
+    )
+
+    # bracketing time steps k, k+1 and time weight w of each point
+    n_steps = len(step_times)
+    k = np.searchsorted(step_times, t, side="right") - 1
+    k = np.clip(k, 0, max(n_steps - 2, 0))
+    dt = np.diff(step_times)[k] if n_steps > 1 else np.ones(len(t))
+    w = (t - step_times[k]) / dt
+
+    values = np.zeros((n_items, len(t)))
+    steps = np.unique(np.concatenate([k, np.minimum(k + 1, n_steps - 1)]))
+    i = 0
+    for data, _ in read_steps(steps, elements):
+        for d in np.moveaxis(data, 1, 0):
+            step = steps[i]
+            i += 1
+            # points with this step as first (k) and second (k+1) bracketing step
+            for lo, hi, wt in (
+                (*np.searchsorted(k, [step, step + 1]), 1 - w),
+                (*np.searchsorted(k, [step - 1, step]), w),
+            ):
+                if hi > lo:
+                    values[:, lo:hi] += wt[lo:hi] * (matrix[lo:hi] @ d.T).T
+    return values
 
 
 class Mesh(_UnstructuredFile):
@@ -1472,9 +1694,7 @@ class Mesh(_UnstructuredFile):
         else:
             geometry = self.geometry.elements_to_geometry(elements)
             quantity = eumQuantity.Create(EUMType.Bathymetry, EUMUnit.meter)
-            elem_table = _UnstructuredFile._element_table_to_mikecore(
-                geometry.element_table
-            )
+            elem_table = geometry._get_element_table_for_mikecore()
 
         nc = geometry.node_coordinates
         builder.SetNodes(nc[:, 0], nc[:, 1], nc[:, 2], geometry.codes)
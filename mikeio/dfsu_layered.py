@@ -5,12 +5,22 @@ from tqdm import trange
 from functools import wraps
 from scipy.spatial import cKDTree
 
-from mikecore.DfsuFile import DfsuFile, DfsuFileType
-from .dfsu import _Dfsu
+from mikecore.DfsFileFactory import DfsFileFactory
+from mikecore.DfsuFile import DfsuFileType
+from .dfsu import _Dfsu, _create_dfsu
 from .dataset import Dataset, DataArray
 from .spatial.FM_geometry import GeometryFM3D
 from .custom_exceptions import InvalidGeometry
-from .dfsutil import _get_item_info, _valid_item_numbers, _valid_timesteps
+from .dfsutil import (
+    _get_item_info,
+    _read_item_time_steps,
+    _read_item_time_steps_mmap,
+    _time_in_seconds,
+    _valid_backend,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
+from .lazy import _LazyArray, _LazyDfsReader
 from .spatial.FM_utils import _plot_vertical_profile
 from .interpolation import get_idw_interpolant, interp2d
 from .eum import ItemInfo, EUMType
@@ -106,7 +116,10 @@ class DfsuLayered(_Dfsu):
         layers=None,
         keepdims=False,
         time_steps=None,
-        dtype=np.float32
+        dtype=np.float32,
+        layout="element",
+        backend="mikecore",
+        lazy=False,
     ) -> Dataset:
         """
         Read data from a dfsu file
@@ -131,11 +144,34 @@ class DfsuLayered(_Dfsu):
             Read only data for specific layers, by default None
         elements: list[int], optional
             Read only selected element ids, by default None
+        layout: str, optional
+            "element" (default) for data dimensions [t,elements] or
+            "columns" (3d files only) for data dimensions [t,elements,layers]
+            with the values of each water column of the selected elements
+            from bottom (layer 0) to top on the 2d geometry; layers missing
+            in a column (z-layers below the bottom) are NaN, see
+            geometry.layer_mask; zn is not read
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float32
+        backend: str, optional
+            "mikecore" (default) reads the data with mikecore,
+            "mmap" returns views of a copy-on-write memory map of the
+            (uncompressed) file instead of copies; values are only read
+            from disk when accessed and delete values are not replaced
+            by NaN (compare with the deletevalue of the file); a
+            selection of elements (e.g. layers="top") or
+            layout="columns" returns copies
+        lazy: bool, optional
+            Defer reading: values (and zn) are read from file (in chunks)
+            when they are accessed. Selections (isel/sel) are applied
+            before reading and reductions like nanmean(axis="time") are
+            computed chunk by chunk, by default False
 
         Returns
         -------
         Dataset
             A Dataset with data dimensions [t,elements]
+            (or [t,elements,layers] for layout="columns")
 
         Examples
         --------
@@ -148,6 +184,8 @@ class DfsuLayered(_Dfsu):
         1:  U velocity <u velocity component> (meter per sec)
         2:  V velocity <v velocity component> (meter per sec)
         3:  Current speed <Current Speed> (meter per sec)
+        >>> ds = dfsu.read(layout="columns")  # 3d file
+        >>> depth_mean = np.nanmean(ds["Salinity"].to_numpy(), axis=-1)
         >>> dfsu.read(time="1985-08-06 12:00,1985-08-07 00:00")
         <mikeio.Dataset>
         Dimensions: (5, 884)
@@ -160,16 +198,25 @@ class DfsuLayered(_Dfsu):
         """
         if dtype not in [np.float32, np.float64]:
             raise ValueError("Invalid data type. Choose np.float32 or np.float64")
-
-        # Open the dfs file for reading
-        # self._read_dfsu_header(self._filename)
-        dfs = DfsuFile.Open(self._filename)
+        _valid_backend(backend, dtype)
+        if layout not in ("element", "columns"):
+            raise ValueError(f"layout must be 'element' or 'columns', not {layout}")
+        if layout == "columns" and not isinstance(self.geometry, GeometryFM3D):
+            raise NotImplementedError("layout='columns' is only available for 3d dfsu")
+        if lazy and backend != "mikecore":
+            raise ValueError("lazy=True can only be used with backend='mikecore'")
+        if lazy and layout != "element":
+            raise ValueError("lazy=True can only be used with layout='element'")
+
+        # Open the dfs file for reading, the mesh is already known from the
+        # header so there is no need to parse it again (as DfsuFile.Open does)
+        dfs = DfsFileFactory.DfsGenericOpen(self._filename)
         # time may have changes since we read the header
         # (if engine is continuously writing to this file)
         # TODO: add more checks that this is actually still the same file
         # (could have been replaced in the meantime)
 
-        self._n_timesteps = dfs.NumberOfTimeSteps
+        self._n_timesteps = dfs.FileInfo.TimeAxis.NumberOfTimeSteps
         if time_steps is not None:
             warnings.warn(
                 FutureWarning(
@@ -178,7 +225,7 @@ class DfsuLayered(_Dfsu):
             )
             time = time_steps
 
-        single_time_selected, time_steps = _valid_timesteps(dfs, time)
+        single_time_selected, time_steps = _valid_timesteps(dfs.FileInfo, time)
 
         self._validate_elements_and_geometry_sel(
             elements, area=area, layers=layers, x=x, y=y, z=z
@@ -186,70 +233,125 @@ class DfsuLayered(_Dfsu):
         if elements is None:
             elements = self._parse_geometry_sel(area=area, layers=layers, x=x, y=y, z=z)
 
+        node_ids = None
         if elements is None:
             n_elems = self.n_elements
             n_nodes = self.n_nodes
             geometry = self.geometry
         else:
-            elements = list(elements)
+            elements = np.atleast_1d(elements)
             n_elems = len(elements)
             geometry = self.geometry.elements_to_geometry(elements)
-            if self.is_layered:  # and items[0].name == "Z coordinate":
+            if hasattr(geometry, "is_layered") and geometry.is_layered:
+                # zn is only needed for the nodes of the selected elements
                 node_ids, _ = self.geometry._get_nodes_and_table_for_elements(elements)
                 n_nodes = len(node_ids)
 
+        if layout == "columns":
+            columns, col_pos, layer_pos = self.geometry._column_positions(elements)
+            geometry = self.geometry.geometry2d
+            if elements is not None:
+                geometry = geometry.elements_to_geometry(columns)
+
         item_numbers = _valid_item_numbers(
             dfs.ItemInfo, items, ignore_first=self.is_layered
         )
         items = _get_item_info(dfs.ItemInfo, item_numbers, ignore_first=self.is_layered)
-        if self.is_layered:
-            # we need the zn item too
-            item_numbers = [it + 1 for it in item_numbers]
-            if hasattr(geometry, "is_layered") and geometry.is_layered:
-                item_numbers.insert(0, 0)
-        n_items = len(item_numbers)
-
-        deletevalue = self.deletevalue
-
-        data_list = []
-
+        # file item numbers (1-based), the first item is zn
+        item_numbers = [n + 2 for n in item_numbers]
+        read_zn = hasattr(geometry, "is_layered") and geometry.is_layered
         n_steps = len(time_steps)
-        item0_is_node_based = False
-        for item in range(n_items):
-            # Initialize an empty data block
-            if hasattr(geometry, "is_layered") and geometry.is_layered and item == 0:
-                # and items[item].name == "Z coordinate":
-                item0_is_node_based = True
-                data = np.ndarray(shape=(n_steps, n_nodes), dtype=dtype)
-            else:
-                data = np.ndarray(shape=(n_steps, n_elems), dtype=dtype)
-            data_list.append(data)
-
-        t_seconds = np.zeros(n_steps, dtype=float)
-
-        if single_time_selected and not keepdims:
-            data = data[0]
-
-        for i in trange(n_steps, disable=not self.show_progress):
-            it = time_steps[i]
-            for item in range(n_items):
-
-                itemdata = dfs.ReadItemTimeStep(item_numbers[item] + 1, it)
-                d = itemdata.Data
-                d[d == deletevalue] = np.nan
 
-                if elements is not None:
-                    if item == 0 and item0_is_node_based:
-                        d = d[node_ids]
-                    else:
-                        d = d[elements]
-
-                if single_time_selected and not keepdims:
-                    data_list[item] = d
-                else:
-                    data_list[item][i] = d
+        # only the selected elements (and the nodes of these) are kept; with
+        # layout="columns" the values are scattered into the NaN padded
+        # (column, layer) arrays instead of copying a flat read
+        if layout == "columns":
+            shape = (len(item_numbers), n_steps, len(columns), self.n_layers)
+            data = np.full(shape, np.nan, dtype=dtype)
+            out_index = np.ravel_multi_index(
+                (col_pos, layer_pos), (len(columns), self.n_layers)
+            )
+        if lazy:
+            reader = _LazyDfsReader(self._filename, self.deletevalue, dtype)
+            time_axis = not (single_time_selected and not keepdims)
+            data_list = [
+                _LazyArray(
+                    reader,
+                    n,
+                    dfs.ItemInfo[n - 1].ElementCount,
+                    time_steps,
+                    elements,
+                    time_axis=time_axis,
+                )
+                for n in item_numbers
+            ]
+            if read_zn:
+                zn = _LazyArray(
+                    reader,
+                    1,
+                    dfs.ItemInfo[0].ElementCount,
+                    time_steps,
+                    node_ids,
+                    time_axis=time_axis,
+                )
+            t_seconds = _time_in_seconds(dfs, time_steps)
+        elif backend == "mmap":
+            mmap_index = self._memory_map(time_steps)
+            if layout == "columns":
+                # one item at a time to bound the memory of the selection
+                for j, item_number in enumerate(item_numbers):
+                    (d,), t_seconds = _read_item_time_steps_mmap(
+                        mmap_index,
+                        [item_number],
+                        time_steps,
+                        elements=elements,
+                    )
+                    data[j].reshape(n_steps, -1)[:, out_index] = d
+                    del d
+                data_list = list(data)
+            else:
+                data_list, t_seconds = _read_item_time_steps_mmap(
+                    mmap_index,
+                    item_numbers,
+                    time_steps,
+                    elements=elements,
+                )
+            if read_zn:
+                zn, _ = _read_item_time_steps_mmap(
+                    mmap_index,
+                    [1],
+                    time_steps,
+                    elements=node_ids,
+                )
+        else:
+            if layout != "columns":
+                data = np.empty((len(item_numbers), n_steps, n_elems), dtype=dtype)
+            t_seconds = _read_item_time_steps(
+                dfs,
+                item_numbers,
+                time_steps,
+                data,
+                elements=elements,
+                out_index=out_index if layout == "columns" else None,
+                deletevalue=self.deletevalue,
+                disable_progress=not self.show_progress,
+            )
+            data_list = list(data)
+            if read_zn:
+                zn = np.empty((1, n_steps, n_nodes), dtype=dtype)
+                _read_item_time_steps(
+                    dfs,
+                    [1],
+                    time_steps,
+                    zn,
+                    elements=node_ids,
+                    deletevalue=self.deletevalue,
+                )
+        if read_zn:
+            data_list = [zn if lazy else zn[0]] + data_list
 
-            t_seconds[i] = itemdata.Time
+        if single_time_selected and not keepdims and layout != "columns" and not lazy:
+            data_list = [d[0] for d in data_list]
 
         time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
 
@@ -257,7 +359,15 @@ class DfsuLayered(_Dfsu):
 
         dims = ("time", "element") if not single_time_selected else ("element",)
 
-        if elements is not None and len(elements) == 1:
+        if layout == "columns":
+            dims = dims + ("layer",)
+            if single_time_selected and not keepdims:
+                data_list = [d[0] for d in data_list]
+            if len(columns) == 1:
+                # squeeze single column
+                dims = tuple([d for d in dims if d != "element"])
+                data_list = [np.squeeze(d, axis=-2) for d in data_list]
+        elif elements is not None and len(elements) == 1:
             # squeeze point data
             dims = tuple([d for d in dims if d != "element"])
             data_list = [np.squeeze(d, axis=-1) for d in data_list]
@@ -448,3 +558,81 @@ class Dfsu3D(DfsuLayered):
             # title = "Surface extracted from 3D file"
             surf_da.to_dfs(filename)
             # self.write(filename, ds2, elements=top_el, title=title)
+
+    def depth_average(self, filename=None, *, items=None, time=None):
+        """
+        Depth average items of a 3d dfsu file
+
+        The file is processed one time step at a time, the layer
+        thicknesses are calculated from the dynamic zn of each time step.
+        With a filename, the result is written directly to a 2d dfsu
+        file, otherwise a 2d Dataset is returned.
+
+        Parameters
+        ----------
+        filename: str, optional
+            Output 2d dfsu file name, by default None (return Dataset);
+            the selected time steps must be equidistant
+        items: list[int] or list[str], optional
+            Depth average only selected items, by number (0-based), or by name
+        time: int, str, datetime, pd.TimeStamp, sequence, slice or pd.DatetimeIndex, optional
+            Depth average only selected time steps, by default None (=all)
+
+        Returns
+        -------
+        Dataset or None
+            depth averaged data on the 2d geometry (if no filename is given)
+
+        See Also
+        --------
+        DataArray.depth_average
+
+        Examples
+        --------
+        >>> dfsu.depth_average(items="Salinity")
+        >>> dfsu.depth_average("oresund_avg.dfsu")
+        """
+        geometry = self.geometry
+        dfs = DfsFileFactory.DfsGenericOpen(self._filename)
+        _, time_steps = _valid_timesteps(dfs.FileInfo, time)
+        item_numbers = _valid_item_numbers(dfs.ItemInfo, items, ignore_first=True)
+        items = _get_item_info(dfs.ItemInfo, item_numbers, ignore_first=True)
+        t_seconds = np.asarray(time_steps) * self.timestep
+        times = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
+        deletevalue = self.deletevalue
+
+        out = None
+        if filename is None:
+            shape = (len(time_steps), self.geometry2d.n_elements)
+            data_list = [np.ndarray(shape=shape, dtype=np.float32) for _ in items]
+        else:
+            if len(np.unique(np.diff(time_steps))) > 1:
+                raise ValueError(
+                    "Selected time steps must be equidistant to write a dfsu file"
+                )
+            dt = (times[1] - times[0]).total_seconds() if len(times) > 1 else 1
+            out = _create_dfsu(filename, self.geometry2d, times[0], dt, items)
+
+        try:
+            for i in trange(len(time_steps), disable=not self.show_progress):
+                it = time_steps[i]
+                zn = dfs.ReadItemTimeStep(1, it).Data
+                dz = geometry._calc_dz(zn=zn)
+                for j, item in enumerate(item_numbers):
+                    d = dfs.ReadItemTimeStep(item + 2, it).Data
+                    d[d == deletevalue] = np.nan
+                    d = geometry._depth_average(d, dz=dz)
+                    if out is None:
+                        data_list[j][i] = d
+                    else:
+                        d[np.isnan(d)] = deletevalue
+                        out.WriteItemTimeStepNext(0, d.astype(np.float32))
+        finally:
+            dfs.Close()
+            if out is not None:
+                out.Close()
+
+        if out is None:
+            return Dataset(
+                data_list, times, items, geometry=self.geometry2d, validate=False
+            )
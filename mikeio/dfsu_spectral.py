@@ -8,7 +8,12 @@ from mikecore.DfsuFile import DfsuFile, DfsuFileType
 
 from .dfsu import _Dfsu
 from .dataset import Dataset, DataArray
-from .dfsutil import _get_item_info, _valid_item_numbers, _valid_timesteps
+from .dfsutil import (
+    _get_item_info,
+    _iter_item_time_steps,
+    _valid_item_numbers,
+    _valid_timesteps,
+)
 from .spectral_utils import plot_2dspectrum, calc_m0_from_spectrum
 
 
@@ -211,6 +216,117 @@ class DfsuSpectral(_Dfsu):
             data_list, time, items, geometry=geometry, dims=dims, validate=False
         )
 
+    def iter_timesteps(
+        self,
+        *,
+        items=None,
+        time=None,
+        elements=None,
+        nodes=None,
+        area=None,
+        chunk=24,
+        dtype=np.float32,
+    ):
+        """
+        Iterate over the time steps of a spectral dfsu file, a chunk of time steps at a time
+
+        Only one chunk is held in memory, which makes it possible to
+        process files which are larger than the available memory.
+
+        Parameters
+        ---------
+        items: list[int] or list[str], optional
+            Read only selected items, by number (0-based), or by name
+        time: int, str, datetime, pd.TimeStamp, sequence, slice or pd.DatetimeIndex, optional
+            Read only selected time steps, by default None (=all)
+        elements: list[int], optional
+            Read only selected element ids (spectral area files only)
+        nodes: list[int], optional
+            Read only selected node ids (spectral line files only)
+        area: list[float], optional
+            Read only data inside (horizontal) area (spectral area files
+            only) given as a bounding box (tuple with left, lower, right, upper)
+            or as list of coordinates for a polygon, by default None
+        chunk: int, optional
+            Max number of time steps in each Dataset, by default 24
+        dtype: np.float32 or np.float64, optional
+            data type of the returned values, by default np.float32
+
+        Yields
+        ------
+        Dataset
+            A Dataset with dimensions [t,elements/nodes,frequencies,directions]
+            for each chunk. The values share a buffer which is overwritten
+            by the next chunk; use copy() to keep them.
+
+        Examples
+        --------
+        >>> m0 = []
+        >>> for ds in dfs.iter_timesteps(nodes=[0, 4], chunk=100):
+        ...     m0.append(ds[0].to_numpy().sum(axis=(-2, -1)))
+        """
+        if dtype not in [np.float32, np.float64]:
+            raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+
+        if self._type == DfsuFileType.DfsuSpectral2D:
+            self._validate_elements_and_geometry_sel(elements, area=area)
+            if elements is None:
+                elements = self._parse_geometry_sel(area=area, x=None, y=None)
+        elif area is not None:
+            raise ValueError(f"Argument area is not supported for {self._type}")
+
+        geometry, pts = self._parse_elements_nodes(elements, nodes)
+
+        # dims with time axis, also for chunks with a single time step
+        _, shape, dims = self._get_spectral_data_shape(2, pts)
+        has_pts = self._type != DfsuFileType.DfsuSpectral0D
+        read_pts = None
+        if has_pts:
+            # values are stored with the point (element/node) axis last
+            *spec_shape, n_pts = shape
+            if pts is None:
+                n_sel = n_pts
+            else:
+                # flat indices of the selected points for each spectral value
+                pts = np.asarray(pts, dtype=int)
+                n_sel = len(pts)
+                offsets = np.arange(int(np.prod(spec_shape))) * n_pts
+                read_pts = (offsets[:, None] + pts[None, :]).ravel()
+            shape = (*spec_shape, n_sel)
+
+        dfs = DfsuFile.Open(self._filename)
+        try:
+            _, time_steps = _valid_timesteps(dfs, time)
+            item_numbers = _valid_item_numbers(dfs.ItemInfo, items)
+            items = _get_item_info(dfs.ItemInfo, item_numbers)
+
+            for data, t_seconds in _iter_item_time_steps(
+                dfs,
+                [n + 1 for n in item_numbers],
+                time_steps,
+                shape,
+                chunk=chunk,
+                dtype=dtype,
+                elements=read_pts,
+                deletevalue=self.deletevalue,
+            ):
+                time = pd.to_datetime(t_seconds, unit="s", origin=self.start_time)
+                if has_pts:
+                    data = np.moveaxis(data, -1, 2)
+                    if n_sel == 1:
+                        # squeeze point data
+                        data = np.squeeze(data, axis=2)
+                yield Dataset(
+                    list(data),
+                    time,
+                    items,
+                    geometry=geometry,
+                    dims=dims,
+                    validate=False,
+                )
+        finally:
+            dfs.Close()
+
     def _parse_elements_nodes(self, elements, nodes):
         if self._type == DfsuFileType.DfsuSpectral0D:
             if elements is not None or nodes is not None:
@@ -1,7 +1,9 @@
+import mmap
 from datetime import datetime
 from typing import Iterable, List, Tuple, Union
 import numpy as np
 import pandas as pd
+from tqdm import trange
 from .eum import EUMType, EUMUnit, ItemInfo, TimeAxisType
 from .custom_exceptions import ItemsError
 
@@ -187,3 +189,416 @@ def _get_item_info(
         item = ItemInfo(name, itemtype, unit, data_value_type)
         items.append(item)
     return items
+
+
+def _read_item_time_steps(
+    dfs,
+    item_numbers: List[int],
+    time_steps: List[int],
+    data: np.ndarray,
+    *,
+    elements=None,
+    out_index=None,
+    deletevalue: float = None,
+    disable_progress: bool = True,
+) -> np.ndarray:
+    """Read item-timesteps into a preallocated buffer
+
+    A single item data buffer is reused for each item. If no element
+    subset is requested and the output is float32 the values are read
+    directly into the output buffer, otherwise the subset/cast is written
+    into it. Delete values are replaced by NaN in place.
+
+    With out_index the values are scattered into the output buffer, which
+    may be larger than the number of values read (e.g. padded with NaN).
+
+    Parameters
+    ----------
+    dfs : DfsFile or DfsuFile
+        open dfs file
+    item_numbers : list[int]
+        item numbers (1-based, as in the file)
+    time_steps : list[int]
+        time step indices (0-based)
+    data : np.ndarray
+        output buffer with shape (n_items, n_steps, n_values)
+        (n_values may be multidimensional, e.g. (ny, nx), if contiguous)
+    elements : list[int], optional
+        read only these values of each item-timestep, by default None (=all)
+    out_index : list[int], optional
+        position in the (flattened) values of each item-timestep of data
+        to write each read value to, by default None (=consecutive)
+    deletevalue : float, optional
+        value to be replaced by NaN, by default None
+    disable_progress : bool, optional
+        hide progress bar, by default True
+
+    Returns
+    -------
+    np.ndarray
+        time in seconds relative to start time for each time step
+    """
+    n_items = len(item_numbers)
+    n_steps = len(time_steps)
+    if data.shape[:2] != (n_items, n_steps):
+        raise ValueError(
+            f"Buffer shape {data.shape} does not match ({n_items}, {n_steps}, ...)"
+        )
+    if data.ndim < 3 or not data[0, 0].flags.c_contiguous:
+        raise ValueError("The values of each item-timestep must be contiguous")
+
+    if elements is not None:
+        elements = np.asarray(elements, dtype=int)
+    if out_index is not None:
+        out_index = np.asarray(out_index, dtype=int)
+    direct = elements is None and out_index is None and data.dtype == np.float32
+    if deletevalue is not None:
+        deletevalue = data.dtype.type(np.float32(deletevalue))
+
+    itemdatas = [dfs.ItemInfo[n - 1].CreateEmptyItemData() for n in item_numbers]
+    t_seconds = np.zeros(n_steps, dtype=float)
+
+    for i in trange(n_steps, disable=disable_progress):
+        it = time_steps[i]
+        for item, itemdata in enumerate(itemdatas):
+            d = data[item, i].reshape(-1)
+            if direct:
+                itemdata.Data = d
+            dfs.ReadItemTimeStep(itemdata, it)
+            if out_index is not None:
+                values = itemdata.Data
+                d[out_index] = values if elements is None else values[elements]
+            elif elements is not None:
+                # fancy indexing and copy is faster than np.take(out=d),
+                # which buffers the output
+                d[:] = itemdata.Data[elements]
+            elif not direct:
+                d[:] = itemdata.Data
+            if deletevalue is not None:
+                d[d == deletevalue] = np.nan
+
+        t_seconds[i] = itemdata.Time
+
+    return t_seconds
+
+
+def _iter_item_time_steps(
+    dfs,
+    item_numbers: List[int],
+    time_steps: List[int],
+    shape: Tuple[int],
+    *,
+    chunk: int = 24,
+    dtype=np.float32,
+    elements=None,
+    deletevalue: float = None,
+):
+    """Read item-timesteps chunk by chunk into one reused buffer
+
+    Parameters
+    ----------
+    dfs : DfsFile or DfsuFile
+        open dfs file
+    item_numbers : list[int]
+        item numbers (1-based, as in the file)
+    time_steps : list[int]
+        time step indices (0-based)
+    shape : tuple[int]
+        shape of the values of each item-timestep (after element selection)
+    chunk : int, optional
+        max number of time steps per chunk, by default 24
+    dtype : np.float32 or np.float64, optional
+        data type of the buffer, by default np.float32
+    elements : list[int], optional
+        read only these values of each item-timestep, by default None (=all)
+    deletevalue : float, optional
+        value to be replaced by NaN, by default None
+
+    Yields
+    ------
+    (np.ndarray, np.ndarray)
+        view of the buffer with shape (n_items, n_steps_in_chunk, *shape)
+        and time in seconds relative to start time for each time step;
+        the buffer is overwritten by the next chunk
+    """
+    if int(chunk) != chunk or chunk < 1:
+        raise ValueError(f"chunk must be a positive integer, not {chunk}")
+    chunk = int(chunk)
+    n_steps = len(time_steps)
+    buffer = np.empty((len(item_numbers), min(chunk, n_steps), *shape), dtype=dtype)
+    for start in range(0, n_steps, chunk):
+        steps = time_steps[start : start + chunk]
+        data = buffer[:, : len(steps)]
+        t_seconds = _read_item_time_steps(
+            dfs,
+            item_numbers,
+            steps,
+            data,
+            elements=elements,
+            deletevalue=deletevalue,
+        )
+        yield data, t_seconds
+
+
+def _read_time_axis(dfs) -> pd.DatetimeIndex:
+    """Time of each time step of an open dfs file with an equidistant calendar axis"""
+    time_axis = dfs.FileInfo.TimeAxis
+    if time_axis.TimeAxisType != TimeAxisType.EquidistantCalendar:
+        raise ValueError("Only files with an equidistant calendar axis are supported")
+    t_seconds = time_axis.StartTimeOffset + time_axis.TimeStep * np.arange(
+        time_axis.NumberOfTimeSteps
+    )
+    return pd.to_datetime(t_seconds, unit="s", origin=time_axis.StartDateTime)
+
+
+def _read_time_steps_into(
+    dfs,
+    item_numbers: List[int],
+    time_steps: List[int],
+    positions: np.ndarray,
+    data: np.ndarray,
+    *,
+    elements=None,
+    deletevalue: float = None,
+) -> None:
+    """Read item-timesteps into given time positions of a preallocated buffer
+
+    Parameters
+    ----------
+    dfs : DfsFile or DfsuFile
+        open dfs file
+    item_numbers : list[int]
+        item numbers (1-based, as in the file)
+    time_steps : list[int]
+        time step indices (0-based) in the file
+    positions : np.ndarray
+        increasing time indices in data for each of the time steps
+    data : np.ndarray
+        output buffer with shape (n_items, n_time, n_values)
+    elements : list[int], optional
+        read only these values of each item-timestep, by default None (=all)
+    deletevalue : float, optional
+        value to be replaced by NaN, by default None
+    """
+    positions = np.asarray(positions, dtype=int)
+    # split in runs of consecutive positions which are contiguous in data
+    starts = np.concatenate(([0], np.nonzero(np.diff(positions) != 1)[0] + 1))
+    stops = np.append(starts[1:], len(positions))
+    for start, stop in zip(starts, stops):
+        if stop > start:
+            pos = positions[start]
+            _read_item_time_steps(
+                dfs,
+                item_numbers,
+                time_steps[start:stop],
+                data[:, pos : pos + stop - start],
+                elements=elements,
+                deletevalue=deletevalue,
+            )
+
+
+class _DfsMemoryMap:
+    """Memory map of the dynamic item-timestep records of a dfs file
+
+    The byte offset of every item-timestep record is indexed once, values
+    are then returned as float32 views of a copy-on-write memory map of
+    the file (changes are never written back to the file). Only uncompressed files with an equidistant
+    time axis and float items are supported; the inferred record layout
+    is checked for every record before it is used.
+
+    Parameters
+    ----------
+    filename : str
+        full path to the dfs file
+    """
+
+    # an equidistant timestep starts with this marker
+    _TIMESTEP_MARKER = bytes.fromhex("fe51c3ff")
+    # each item-timestep record: 1 byte tag + int32 number of values
+    _RECORD_TAG = b"\x01"
+    _RECORD_HEADER_SIZE = 5
+
+    def __init__(self, filename):
+        from mikecore.DfsFile import DfsSimpleType
+        from mikecore.DfsFileFactory import DfsFileFactory
+
+        self._filename = str(filename)
+        dfs = DfsFileFactory.DfsGenericOpen(self._filename)
+        try:
+            fileinfo = dfs.FileInfo
+            timeaxis = fileinfo.TimeAxis
+            if fileinfo.IsFileCompressed:
+                raise ValueError("backend='mmap' is not supported for compressed files")
+            if timeaxis.TimeAxisType not in (
+                TimeAxisType.EquidistantRelative,
+                TimeAxisType.EquidistantCalendar,
+            ):
+                raise ValueError(
+                    "backend='mmap' is only supported for files with an equidistant time axis"
+                )
+            if any(info.DataType != DfsSimpleType.Float for info in dfs.ItemInfo):
+                raise ValueError("backend='mmap' is only supported for float items")
+
+            self.n_timesteps = timeaxis.NumberOfTimeSteps
+            self._start_time_offset = timeaxis.StartTimeOffset
+            self._timestep = timeaxis.TimeStep
+            self._counts = [info.ElementCount for info in dfs.ItemInfo]
+            if self.n_timesteps == 0:
+                raise ValueError("backend='mmap' requires at least one time step")
+
+            # sample records to verify the layout with: first, last and middle
+            samples = {(0, 0), (self.n_timesteps - 1, len(self._counts) - 1)}
+            samples.add((self.n_timesteps // 2, len(self._counts) // 2))
+            expected = {
+                (it, item): dfs.ReadItemTimeStep(item + 1, it).Data.tobytes()
+                for it, item in samples
+            }
+        finally:
+            dfs.Close()
+
+        self._mm = np.memmap(self._filename, dtype=np.uint8, mode="c")
+        self._offsets = self._find_offsets(expected)
+
+    def _record_header(self, item):
+        return self._RECORD_TAG + np.int32(self._counts[item]).tobytes()
+
+    def _find_offsets(self, expected):
+        """Byte offsets (n_timesteps, n_items) of the record values"""
+        sizes = np.array(self._counts, dtype=np.int64) * 4 + self._RECORD_HEADER_SIZE
+        item_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        step_size = sizes.sum() + len(self._TIMESTEP_MARKER)
+
+        mm = self._mm
+        prefix = self._TIMESTEP_MARKER + self._record_header(0)
+        first = expected[(0, 0)][:64]
+        n_bytes = len(mm)
+        with open(self._filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                start = m.find(prefix + first)
+        if start < 0:
+            raise ValueError(f"Could not index the records of {self._filename}")
+
+        first_value = start + len(prefix)
+        offsets = (
+            first_value
+            + step_size * np.arange(self.n_timesteps, dtype=np.int64)[:, None]
+            + item_offsets[None, :]
+        )
+        if offsets[-1, -1] + self._counts[-1] * 4 > n_bytes:
+            raise ValueError(f"Could not index the records of {self._filename}")
+
+        # every record header and timestep marker must be where expected
+        headers = offsets - self._RECORD_HEADER_SIZE
+        ok = np.all(mm[headers] == self._RECORD_TAG[0])
+        for item in range(len(self._counts)):
+            count = mm[headers[:, item, None] + np.arange(1, 5)]
+            ok = ok and np.all(count.view(np.int32).ravel() == self._counts[item])
+        marker = mm[headers[:, 0, None] - 4 + np.arange(4)]
+        ok = ok and np.all(marker == np.frombuffer(self._TIMESTEP_MARKER, np.uint8))
+        for (it, item), values in expected.items():
+            o = offsets[it, item]
+            ok = ok and mm[o : o + len(values)].tobytes() == values
+        if not ok:
+            raise ValueError(
+                f"Unexpected record layout in {self._filename}, use backend='mikecore'"
+            )
+        return offsets
+
+    def time_in_seconds(self, time_steps):
+        return self._start_time_offset + self._timestep * np.asarray(time_steps, float)
+
+    def item_values(self, item_number):
+        """Values of all time steps of an item
+
+        Parameters
+        ----------
+        item_number : int
+            item number (1-based, as in the file)
+
+        Returns
+        -------
+        np.ndarray
+            view (n_timesteps, n_values) of the memory mapped file
+        """
+        item = item_number - 1
+        step_size = (
+            self._offsets[1, 0] - self._offsets[0, 0] if self.n_timesteps > 1 else 0
+        )
+        return np.ndarray(
+            shape=(self.n_timesteps, self._counts[item]),
+            dtype="<f4",
+            buffer=self._mm,
+            offset=int(self._offsets[0, item]),
+            strides=(int(step_size), 4),
+        )
+
+
+def _read_item_time_steps_mmap(
+    mmap_index: _DfsMemoryMap,
+    item_numbers: List[int],
+    time_steps: List[int],
+    *,
+    elements=None,
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Read item-timesteps as views of a memory mapped file
+
+    A selection of time steps given as a contiguous range and no element
+    selection gives views without copying, values are read from disk when
+    they are accessed. Delete values are not replaced by NaN, as that
+    would read all values.
+
+    Parameters
+    ----------
+    mmap_index : _DfsMemoryMap
+        indexed dfs file
+    item_numbers : list[int]
+        item numbers (1-based, as in the file)
+    time_steps : list[int]
+        time step indices (0-based)
+    elements : list[int], optional
+        read only these values of each item-timestep, by default None (=all)
+
+    Returns
+    -------
+    list[np.ndarray]
+        (n_steps, n_values) array for each item
+    np.ndarray
+        time in seconds relative to start time for each time step
+    """
+    time_steps = np.asarray(time_steps, dtype=int)
+    steps = time_steps
+    if len(time_steps) > 0 and np.all(np.diff(time_steps) == 1):
+        steps = slice(time_steps[0], time_steps[-1] + 1)
+
+    data_list = []
+    for item_number in item_numbers:
+        d = mmap_index.item_values(item_number)[steps]
+        if elements is not None:
+            d = np.take(d, elements, axis=1)
+        data_list.append(d)
+
+    return data_list, mmap_index.time_in_seconds(time_steps)
+
+
+def _valid_backend(backend: str, dtype=np.float32) -> str:
+    if backend not in ("mikecore", "mmap"):
+        raise ValueError(f"backend must be 'mikecore' or 'mmap', not '{backend}'")
+    if backend == "mmap" and dtype != np.float32:
+        raise ValueError("backend='mmap' only supports dtype=np.float32")
+    return backend
+
+
+def _time_in_seconds(dfs, time_steps) -> np.ndarray:
+    """Time (in seconds relative to start time) of time steps without reading data"""
+    timeaxis = dfs.FileInfo.TimeAxis
+    if timeaxis.TimeAxisType in (
+        TimeAxisType.EquidistantRelative,
+        TimeAxisType.EquidistantCalendar,
+    ):
+        return timeaxis.StartTimeOffset + timeaxis.TimeStep * np.asarray(
+            time_steps, dtype=float
+        )
+    # non-equidistant: read time from the smallest item
+    counts = [info.ElementCount for info in dfs.ItemInfo]
+    item_number = int(np.argmin(counts)) + 1
+    return np.array([dfs.ReadItemTimeStep(item_number, it).Time for it in time_steps])
@@ -1,4 +1,6 @@
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable, List, Union
 import math
 import numpy as np
@@ -12,10 +14,15 @@ from tqdm import trange, tqdm
 
 from mikecore.DfsFileFactory import DfsFileFactory
 from mikecore.DfsBuilder import DfsBuilder
-from mikecore.DfsFile import DfsDynamicItemInfo, DfsFile
+from mikecore.DfsFile import DfsDynamicItemInfo, DfsFile, DfsSimpleType
 from mikecore.eum import eumQuantity
 from . import __dfs_version__
-from .dfsutil import _valid_item_numbers, _get_item_info
+from .dfsutil import (
+    _get_item_info,
+    _iter_item_time_steps,
+    _read_item_time_steps,
+    _valid_item_numbers,
+)
 from .eum import EUMType, ItemInfo
 
 
@@ -664,7 +671,15 @@ def avg_time(infilename: str, outfilename: str, skipna=True):
 
 
 def quantile(
-    infilename: str, outfilename: str, q, *, items=None, skipna=True, buffer_size=1.0e9
+    infilename: str,
+    outfilename: str,
+    q,
+    *,
+    items=None,
+    skipna=True,
+    buffer_size=1.0e9,
+    parallel=1,
+    approx_bins=None,
 ):
     """Create temporal quantiles of all items in dfs file
 
@@ -684,17 +699,358 @@ def quantile(
     buffer_size: float, optional
         for huge files the quantiles need to be calculated for chunks of
         elements. buffer_size gives the maximum amount of memory available
-        for the computation in bytes, by default 1e9 (=1GB)
+        for the computation in bytes, by default 1e9 (=1GB).
+        The file is read once; if the data does not fit in the buffer
+        the chunks are spilled to a temporary file on disk.
+    parallel: int, optional
+        number of chunks processed concurrently, by default 1
+    approx_bins: int, optional
+        approximate the quantiles from a histogram of each element
+        with this number of bins (between the element's min and max value)
+        instead of sorting the full time series; the error is at most
+        one bin width. Needs memory for the histograms only,
+        by default None (=exact quantiles)
 
     Examples
     --------
     >>> quantile("in.dfsu", "IQR.dfsu", q=[0.25,0.75])
 
-    >>> quantile("huge.dfsu", "Q01.dfsu", q=0.1, buffer_size=5.0e9)
+    >>> quantile("huge.dfsu", "Q01.dfsu", q=0.1, buffer_size=5.0e9, parallel=4)
+
+    >>> quantile("huge.dfsu", "Q99.dfsu", q=0.99, approx_bins=1000)
 
     >>> quantile("with_nans.dfsu", "Q05.dfsu", q=0.5, skipna=False)
     """
-    func = np.nanquantile if skipna else np.quantile
+    dfs_i = DfsFileFactory.DfsGenericOpen(infilename)
+
+    dfs_o = None
+    try:
+        is_dfsu_3d = dfs_i.ItemInfo[0].Name == "Z coordinate"
+
+        item_numbers = _valid_item_numbers(dfs_i.ItemInfo, items)
+
+        if is_dfsu_3d and 0 in item_numbers:
+            item_numbers.remove(0)  # Remove Zn item for special treatment
+
+        qvec = [q] if np.isscalar(q) else q
+        qtxt = [f"Quantile {q}" for q in qvec]
+        core_items = [dfs_i.ItemInfo[i] for i in item_numbers]
+        items = _get_repeated_items(core_items, prefixes=qtxt)
+
+        if is_dfsu_3d:
+            items.insert(0, dfs_i.ItemInfo[0])
+
+        dfs_o = _clone(infilename, outfilename, items=items)
+
+        if approx_bins is None:
+            qdata = _quantile_exact(
+                dfs_i,
+                item_numbers,
+                qvec,
+                skipna=skipna,
+                buffer_size=buffer_size,
+                parallel=parallel,
+            )
+        else:
+            qdata = _quantile_histogram(
+                dfs_i,
+                item_numbers,
+                qvec,
+                skipna=skipna,
+                n_bins=approx_bins,
+                buffer_size=buffer_size,
+            )
+
+        if is_dfsu_3d:
+            znitemdata = dfs_i.ReadItemTimeStep(1, 0)
+            # TODO should this be static Z coordinates instead?
+            dfs_o.WriteItemTimeStepNext(0.0, znitemdata.Data)
+
+        for item_q in qdata:
+            for darray in item_q:
+                dfs_o.WriteItemTimeStepNext(0.0, darray.astype(np.float32))
+    finally:
+        if dfs_o is not None:
+            dfs_o.Close()
+        dfs_i.Close()
+
+
+def _buffer_dtype(dfs: DfsFile, item_numbers: List[int]):
+    """float64 if any of the items are stored in double precision"""
+    is_double = [dfs.ItemInfo[i].DataType == DfsSimpleType.Double for i in item_numbers]
+    return np.float64 if any(is_double) else np.float32
+
+
+def _quantile_exact(
+    dfs: DfsFile,
+    item_numbers: List[int],
+    qvec,
+    *,
+    skipna: bool,
+    buffer_size: float,
+    parallel: int,
+) -> np.ndarray:
+    """Quantiles (n_items, n_q, n_data) computed chunk by chunk of elements
+
+    The file is read once. If all chunks do not fit in the buffer they are
+    spilled to a temporary file with each chunk stored contiguously.
+    """
+    dtype = _buffer_dtype(dfs, item_numbers)
+
+    n_items = len(item_numbers)
+    n_time_steps = dfs.FileInfo.TimeAxis.NumberOfTimeSteps
+    n_data = dfs.ItemInfo[item_numbers[0]].ElementCount
+    file_item_numbers = [i + 1 for i in item_numbers]
+    time_steps = list(range(n_time_steps))
+    deletevalue = dfs.FileInfo.DeleteValueFloat
+
+    # each worker holds a chunk and a working copy
+    ci = _ChunkInfo.from_dfs(dfs, item_numbers, buffer_size / parallel)
+    qdata = np.empty((n_items, len(qvec), n_data))
+
+    if ci.n_chunks == 1 and parallel == 1:
+        data = np.empty((n_items, n_time_steps, n_data), dtype=dtype)
+        _read_item_time_steps(
+            dfs,
+            file_item_numbers,
+            time_steps,
+            data,
+            deletevalue=deletevalue,
+            disable_progress=not show_progress,
+        )
+        for item in range(n_items):
+            qdata[item] = _quantile(data[item], qvec, skipna=skipna)
+        return qdata
+
+    def calc_chunk_quantiles(get_chunk, e1):
+        e2 = ci.stop(e1)
+        data = get_chunk(e1, e2)
+        for item in range(n_items):
+            qdata[item, :, e1:e2] = _quantile(data[item], qvec, skipna=skipna)
+
+    def calc_quantiles(get_chunk):
+        starts = range(0, n_data, ci.chunk_size)
+        if parallel > 1:
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                list(
+                    executor.map(lambda e1: calc_chunk_quantiles(get_chunk, e1), starts)
+                )
+        else:
+            for e1 in starts:
+                calc_chunk_quantiles(get_chunk, e1)
+
+    if ci.n_chunks == 1:
+        # all data fits in memory, split in chunks for the workers only
+        ci = _ChunkInfo(n_data, min(parallel, n_data))
+        chunks = np.empty((n_items, n_time_steps, n_data), dtype=dtype)
+        _read_item_time_steps(
+            dfs,
+            file_item_numbers,
+            time_steps,
+            chunks,
+            deletevalue=deletevalue,
+            disable_progress=not show_progress,
+        )
+        calc_quantiles(lambda e1, e2: chunks[:, :, e1:e2])
+        return qdata
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        chunks = np.memmap(
+            os.path.join(tmpdir, "chunks.dat"),
+            dtype=dtype,
+            mode="w+",
+            shape=(ci.n_chunks, n_items, n_time_steps, ci.chunk_size),
+        )
+        try:
+            # scatter blocks of time steps into the chunks
+            steps_per_block = int(buffer_size / (8 * n_items * n_data))
+            steps_per_block = min(max(steps_per_block, 1), n_time_steps)
+            blocks = _iter_item_time_steps(
+                dfs,
+                file_item_numbers,
+                time_steps,
+                (n_data,),
+                chunk=steps_per_block,
+                dtype=dtype,
+                deletevalue=deletevalue,
+            )
+            t1 = 0
+            for block, _ in tqdm(blocks, disable=not show_progress):
+                t0, t1 = t1, t1 + block.shape[1]
+                e1 = 0
+                for chunk in range(ci.n_chunks):
+                    e2 = ci.stop(e1)
+                    chunks[chunk, :, t0:t1, : e2 - e1] = block[:, :, e1:e2]
+                    e1 = e2
+
+            calc_quantiles(
+                lambda e1, e2: np.array(chunks[e1 // ci.chunk_size, :, :, : e2 - e1])
+            )
+        finally:
+            # the memory map must be closed before its file can be removed
+            del chunks
+
+    return qdata
+
+
+def _quantile(data: np.ndarray, qvec, skipna=True) -> np.ndarray:
+    """Quantiles along the first axis of 2d data, (n_q, n_columns)
+
+    Same result as np.nanquantile/np.quantile(data, q, axis=0) with the
+    default linear interpolation, but sorts all columns at once instead
+    of handling one column at a time.
+    """
+    data = np.sort(data, axis=0)  # NaNs are sorted last
+    n_values = np.count_nonzero(~np.isnan(data), axis=0)
+    has_nan = n_values < data.shape[0]
+    n_values = np.maximum(n_values, 1)
+
+    qdata = np.empty((len(qvec), data.shape[1]))
+    for j, qj in enumerate(qvec):
+        index = qj * (n_values - 1)
+        lower = np.floor(index).astype(int)
+        upper = np.minimum(lower + 1, n_values - 1)
+        a = np.take_along_axis(data, lower[None, :], axis=0)[0].astype(np.float64)
+        b = np.take_along_axis(data, upper[None, :], axis=0)[0].astype(np.float64)
+        gamma = index - lower
+        # as np.quantile (numerically stable lerp)
+        diff_b_a = b - a
+        qdata[j] = np.where(
+            gamma >= 0.5, b - diff_b_a * (1 - gamma), a + diff_b_a * gamma
+        )
+    if not skipna:
+        qdata[:, has_nan] = np.nan
+
+    return qdata
+
+
+def _quantile_histogram(
+    dfs: DfsFile,
+    item_numbers: List[int],
+    qvec,
+    *,
+    skipna: bool,
+    n_bins: int,
+    buffer_size: float,
+) -> np.ndarray:
+    """Quantiles (n_items, n_q, n_data) approximated from a histogram per element
+
+    The file is read twice: first for the range of each element and then
+    to count the values in each bin. The quantile is interpolated within
+    the bin, so the error is at most (max-min)/n_bins.
+    """
+    n_items = len(item_numbers)
+    n_time_steps = dfs.FileInfo.TimeAxis.NumberOfTimeSteps
+    n_data = dfs.ItemInfo[item_numbers[0]].ElementCount
+
+    if 4 * n_items * n_data * n_bins > buffer_size:
+        raise ValueError(
+            f"Histograms with {n_bins} bins do not fit in buffer_size={buffer_size:.0f} bytes, use fewer bins or increase buffer_size"
+        )
+
+    def iter_blocks():
+        return _iter_item_time_steps(
+            dfs,
+            [i + 1 for i in item_numbers],
+            list(range(n_time_steps)),
+            (n_data,),
+            chunk=min(256, n_time_steps),
+            dtype=_buffer_dtype(dfs, item_numbers),
+            deletevalue=dfs.FileInfo.DeleteValueFloat,
+        )
+
+    vmin = np.full((n_items, n_data), np.nan)
+    vmax = np.full((n_items, n_data), np.nan)
+    n_nan = np.zeros((n_items, n_data), dtype=int)
+    for block, _ in iter_blocks():
+        vmin = np.fmin(vmin, np.fmin.reduce(block, axis=1))
+        vmax = np.fmax(vmax, np.fmax.reduce(block, axis=1))
+        n_nan += np.isnan(block).sum(axis=1)
+
+    width = (vmax - vmin) / n_bins
+    width[~(width > 0)] = 1.0  # constant or all NaN
+
+    counts = np.zeros((n_items * n_data, n_bins), dtype=np.int32)
+    offset = np.arange(n_items * n_data) * n_bins
+    for block, _ in iter_blocks():
+        for step in range(block.shape[1]):
+            values = block[:, step].ravel()
+            has_value = ~np.isnan(values)
+            bins = (values[has_value] - vmin.ravel()[has_value]) / width.ravel()[
+                has_value
+            ]
+            bins = np.clip(bins.astype(int), 0, n_bins - 1)
+            # a single value per element, so no repeated indices
+            counts.ravel()[offset[has_value] + bins] += 1
+
+    counts = counts.reshape(n_items, n_data, n_bins)
+    n_valid = n_time_steps - n_nan
+    qdata = np.empty((n_items, len(qvec), n_data))
+    for item in range(n_items):
+        cdf = np.cumsum(counts[item], axis=1)
+
+        def order_statistic(k):
+            """k'th smallest value, placed evenly within its bin"""
+            bins = np.argmax(cdf > k[:, None], axis=1)
+            in_bin = np.take_along_axis(counts[item], bins[:, None], axis=1)[:, 0]
+            below = np.take_along_axis(cdf, bins[:, None], axis=1)[:, 0] - in_bin
+            frac = (k - below + 0.5) / np.maximum(in_bin, 1)
+            return vmin[item] + (bins + frac) * width[item]
+
+        for j, qj in enumerate(qvec):
+            # interpolate between the order statistics (as np.quantile)
+            rank = qj * np.maximum(n_valid[item] - 1, 0)
+            k = np.floor(rank)
+            k1 = np.minimum(k + 1, np.maximum(n_valid[item] - 1, 0))
+            lower = order_statistic(k)
+            upper = order_statistic(k1)
+            values = lower + (rank - k) * (upper - lower)
+            values = np.clip(values, vmin[item], vmax[item])
+            if not skipna:
+                values[n_nan[item] > 0] = np.nan
+            qdata[item, j] = values
+
+    return qdata
+
+
+def stats(
+    infilename: str,
+    outfilename: str,
+    stats=("min", "max", "mean", "std"),
+    *,
+    items=None,
+    skipna=True,
+):
+    """Create temporal statistics of all items in dfs file
+
+    Each time step is read only once and the statistics are accumulated
+    in double precision, so any number of statistics can be computed
+    in a single pass over the file.
+
+    Parameters
+    ----------
+    infilename : str
+        input filename
+    outfilename : str
+        output filename
+    stats: list[str], optional
+        statistics to compute, any of "min", "max", "mean", "std"
+        (population standard deviation) and "count" (number of values)
+        or exceedance counts like "count>0.5", "count<=-1.0",
+        by default ["min", "max", "mean", "std"]
+    items: List[str] or List[int], optional
+        Process only selected items, by number (0-based) or name, by default: all
+    skipna : bool, optional
+        exclude NaN/delete values when computing the result, default True
+
+    Examples
+    --------
+    >>> stats("in.dfsu", "stats.dfsu")
+
+    >>> stats("HD.dfsu", "wet.dfsu", stats=["max", "count>0.1"], items="Total water depth")
+    """
+    stats = [stats] if isinstance(stats, str) else list(stats)
+    thresholds = {stat: _parse_count_stat(stat) for stat in stats}
 
     dfs_i = DfsFileFactory.DfsGenericOpen(infilename)
 
@@ -705,82 +1061,104 @@ def quantile(
     if is_dfsu_3d and 0 in item_numbers:
         item_numbers.remove(0)  # Remove Zn item for special treatment
 
-    n_items_in = len(item_numbers)
-
-    n_time_steps = dfs_i.FileInfo.TimeAxis.NumberOfTimeSteps
-
-    # TODO: better handling of different item sizes (zn...)
-
-    ci = _ChunkInfo.from_dfs(dfs_i, item_numbers, buffer_size)
-
-    qvec = [q] if np.isscalar(q) else q
-    qtxt = [f"Quantile {q}" for q in qvec]
     core_items = [dfs_i.ItemInfo[i] for i in item_numbers]
-    items = _get_repeated_items(core_items, prefixes=qtxt)
+    items = _get_repeated_items(core_items, prefixes=stats)
+    for j, item in enumerate(items):
+        if stats[j % len(stats)].startswith("count"):
+            # counts have no unit
+            items[j] = ItemInfo(item.name)
 
     if is_dfsu_3d:
         items.insert(0, dfs_i.ItemInfo[0])
 
     dfs_o = _clone(infilename, outfilename, items=items)
 
-    n_items_out = len(items)
-    if is_dfsu_3d:
-        n_items_out = n_items_out - 1
-
-    datalist = []
-    outdatalist = []
-
-    for item in item_numbers:
-        indata = _read_item(dfs_i, item, 0)
-        for _ in qvec:
-            outdatalist.append(np.zeros_like(indata))
-        datalist.append(np.zeros((n_time_steps, ci.chunk_size)))
-
-    e1 = 0
-    for _ in range(ci.n_chunks):
-        e2 = ci.stop(e1)
-        # the last chunk may be smaller than the rest:
-        chunk_end = ci.chunk_end(e1)
-
-        # read all data for this chunk
-        for timestep in range(n_time_steps):
-            item_out = 0
-            for item_no in item_numbers:
-                itemdata = _read_item(dfs_i, item_no, timestep)
-                data_chunk = itemdata[e1:e2]
-                datalist[item_out][timestep, 0:chunk_end] = data_chunk
-                item_out += 1
-
-        # calculate quantiles (for this chunk)
-        item_out = 0
-        for item in range(n_items_in):
-            qdat = np.zeros((len(qvec), (ci.chunk_size)))
-            qdat[:, :] = func(datalist[item][:, 0:chunk_end], q=qvec, axis=0)
-            for j in range(len(qvec)):
-                outdatalist[item_out][e1:e2] = qdat[j, :]
-                item_out += 1
-
-        e1 = e2
+    n_time_steps = dfs_i.FileInfo.TimeAxis.NumberOfTimeSteps
+    deletevalue = dfs_i.FileInfo.DeleteValueFloat
+    n_data = dfs_i.ItemInfo[item_numbers[0]].ElementCount
+    shape = (len(item_numbers), n_data)
+
+    n_values = np.zeros(shape, dtype=np.int64)
+    vmin = np.full(shape, np.nan)
+    vmax = np.full(shape, np.nan)
+    mean = np.zeros(shape)
+    m2 = np.zeros(shape)
+    counts = {
+        stat: np.zeros(shape, dtype=np.int64)
+        for stat in stats
+        if thresholds[stat] is not None
+    }
+
+    blocks = _iter_item_time_steps(
+        dfs_i,
+        [i + 1 for i in item_numbers],
+        list(range(n_time_steps)),
+        (n_data,),
+        chunk=max(1, min(n_time_steps, int(1e8 // (4 * shape[0] * n_data)))),
+        dtype=_buffer_dtype(dfs_i, item_numbers),
+        deletevalue=deletevalue,
+    )
+    for block, _ in tqdm(blocks, disable=not show_progress):
+        vmin = np.fmin(vmin, np.fmin.reduce(block, axis=1))
+        vmax = np.fmax(vmax, np.fmax.reduce(block, axis=1))
+        for stat, count in counts.items():
+            op, threshold = thresholds[stat]
+            count += op(block, threshold).sum(axis=1)
+        for step in range(block.shape[1]):
+            # Welford's online algorithm for mean and variance
+            x = block[:, step].astype(np.float64)
+            has_value = ~np.isnan(x)
+            n_values += has_value
+            delta = np.where(has_value, x - mean, 0.0)
+            mean += delta / np.maximum(n_values, 1)
+            m2 += np.where(has_value, delta * (x - mean), 0.0)
+
+    results = {
+        "min": vmin,
+        "max": vmax,
+        "mean": np.where(n_values > 0, mean, np.nan),
+        "std": np.sqrt(np.where(n_values > 0, m2, np.nan) / np.maximum(n_values, 1)),
+        "count": n_values,
+    }
+    results.update(counts)
+    has_nan = n_values < n_time_steps
 
     if is_dfsu_3d:
         znitemdata = dfs_i.ReadItemTimeStep(1, 0)
-        # TODO should this be static Z coordinates instead?
         dfs_o.WriteItemTimeStepNext(0.0, znitemdata.Data)
 
-    for item in range(n_items_out):
-        darray = outdatalist[item].astype(np.float32)
-        dfs_o.WriteItemTimeStepNext(0.0, darray)
+    for item in range(len(item_numbers)):
+        for stat in stats:
+            darray = results[stat][item].astype(np.float32)
+            if not skipna and not stat.startswith("count"):
+                darray[has_nan[item]] = np.nan
+            darray[np.isnan(darray)] = deletevalue
+            dfs_o.WriteItemTimeStepNext(0.0, darray)
 
     dfs_o.Close()
+    dfs_i.Close()
 
 
-def _read_item(dfs: DfsFile, item: int, timestep: int) -> np.ndarray:
-    indatatime = dfs.ReadItemTimeStep(item + 1, timestepIndex=timestep)
-    indata = indatatime.Data
-    has_value = indata != dfs.FileInfo.DeleteValueFloat
-    indata[~has_value] = np.nan
-
-    return indata.astype(np.float64)
+def _parse_count_stat(stat: str):
+    """Comparison operator and threshold of an exceedance count, e.g. "count>0.5" """
+    operators = {
+        ">=": np.greater_equal,
+        "<=": np.less_equal,
+        ">": np.greater,
+        "<": np.less,
+    }
+    if stat in ("min", "max", "mean", "std", "count"):
+        return None
+    if stat.startswith("count"):
+        for symbol, op in operators.items():
+            if stat[5:].startswith(symbol):
+                try:
+                    return op, float(stat[5 + len(symbol) :])
+                except ValueError:
+                    break
+    raise ValueError(
+        f"Unknown statistic '{stat}'. Use 'min', 'max', 'mean', 'std', 'count' or e.g. 'count>0.5'"
+    )
 
 
 def _get_repeated_items(
@@ -1,4 +1,6 @@
 import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
 from mikeio.eum import ItemInfo
 
 
@@ -39,6 +41,161 @@ def get_idw_interpolant(distances, p=2):
     return weights
 
 
+class Interpolant:
+    """Spatial interpolant from the elements of a flexible mesh to points
+
+    Holds the element ids and weights of each target point and applies
+    them as a sparse matrix to all time steps at once. Created by
+    GeometryFM.get_interpolant which reuses interpolants for the same
+    mesh, target points and options.
+
+    Parameters
+    ----------
+    elem_ids : ndarray(int)
+        element ids used for each target point
+    weights : ndarray(float), optional
+        weights with same size as elem_ids, by default None (=nearest)
+    n_elements : int
+        number of elements of the source geometry
+    xy : ndarray, optional
+        coordinates of the target points
+    method : str, optional
+        interpolation method, by default "idw"
+    matrix : scipy.sparse matrix, optional
+        interpolation matrix if already known, by default None
+
+    Examples
+    --------
+    >>> interpolant = ds.geometry.get_interpolant(xy)
+    >>> dsi = interpolant.interp(ds)
+    >>> elem_ids, weights = interpolant
+    """
+
+    def __init__(
+        self, elem_ids, weights, n_elements, xy=None, method="idw", matrix=None
+    ):
+        self.elem_ids = elem_ids
+        self.weights = weights
+        self.n_elements = n_elements
+        self.xy = xy
+        self.method = method
+        self._matrix = matrix
+
+    def __repr__(self):
+        return (
+            f"Interpolant({self.method!r}, n_elements={self.n_elements}, "
+            f"n_points={self.n_points})"
+        )
+
+    def __iter__(self):
+        # unpacks as the (elem_ids, weights) tuple
+        return iter((self.elem_ids, self.weights))
+
+    @property
+    def n_points(self):
+        """Number of target points"""
+        return len(self.elem_ids)
+
+    @property
+    def nbytes(self):
+        """Memory used by the interpolant in bytes"""
+        arrays = [self.elem_ids, self.weights, self.xy]
+        if self._matrix is not None:
+            arrays += [self._matrix.data, self._matrix.indices, self._matrix.indptr]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    @property
+    def matrix(self):
+        """Sparse interpolation matrix (n_points x n_elements)"""
+        if self._matrix is None:
+            self._matrix = get_sparse_interpolant(
+                self.elem_ids, self.weights, self.n_elements
+            )
+        return self._matrix
+
+    def interp(self, data, shape=None):
+        """Interpolate data to the target points
+
+        Parameters
+        ----------
+        data : mikeio.Dataset, DataArray, or ndarray
+            data with elements in the last axis
+        shape: tuple, optional
+            reshape output
+
+        Returns
+        -------
+        ndarray or Dataset
+            interpolated data, see interp2d
+        """
+        return interp2d(data, self.matrix, shape=shape)
+
+
+def get_sparse_interpolant(elem_ids, weights=None, n_elements=None):
+    """Interpolant as a sparse matrix (n_points x n_elements)
+
+    Interpolating data with elements in the last axis is then a
+    single sparse matrix product for all time steps.
+
+    Parameters
+    ----------
+    elem_ids : ndarray(int)
+        n sized array of 1 or more element ids used for interpolation
+    weights : ndarray(float), optional
+        weights with same size as elem_ids, by default None (=nearest)
+    n_elements : int, optional
+        number of elements in the source data, by default max(elem_ids)+1
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        interpolation matrix
+
+    Examples
+    --------
+    >>> elem_ids, weights = geometry.get_2d_interpolant(xy)
+    >>> M = get_sparse_interpolant(elem_ids, weights, geometry.n_elements)
+    >>> dati = interp2d(ds, M)
+    """
+    elem_ids = np.asarray(elem_ids)
+    n_points = elem_ids.shape[0]
+    elem_ids = elem_ids.reshape(n_points, -1)
+    if weights is None:
+        weights = np.ones(elem_ids.shape)
+    weights = np.asarray(weights, dtype=np.float64).reshape(n_points, -1)
+    if n_elements is None:
+        n_elements = int(elem_ids.max()) + 1 if elem_ids.size > 0 else 0
+
+    # explicit zeros are kept: nan in data propagates as with np.dot
+    n_nearest = elem_ids.shape[1]
+    indptr = np.arange(0, n_points * n_nearest + 1, n_nearest)
+    return csr_matrix(
+        (weights.ravel(), elem_ids.ravel(), indptr), shape=(n_points, n_elements)
+    )
+
+
+def _from_sparse_interpolant(matrix):
+    """(elem_ids, weights) padded to the same number of elements per point
+
+    Padding repeats the first element of the point with zero weight.
+    """
+    matrix = matrix.tocsr()
+    n_points = matrix.shape[0]
+    n_per_point = np.diff(matrix.indptr)
+    n_max = max(int(n_per_point.max()), 1) if n_points > 0 else 1
+
+    row = np.repeat(np.arange(n_points), n_per_point)
+    col = np.arange(len(row)) - np.repeat(matrix.indptr[:-1], n_per_point)
+    first = np.zeros(n_points, dtype=matrix.indices.dtype)
+    has_elements = n_per_point > 0
+    first[has_elements] = matrix.indices[matrix.indptr[:-1][has_elements]]
+    elem_ids = np.repeat(first[:, None], n_max, axis=1)
+    weights = np.zeros((n_points, n_max))
+    elem_ids[row, col] = matrix.indices
+    weights[row, col] = matrix.data
+    return elem_ids, weights
+
+
 def interp2d(data, elem_ids, weights=None, shape=None):
     """interp spatially in data (2d only)
 
@@ -46,8 +203,10 @@ def interp2d(data, elem_ids, weights=None, shape=None):
     ----------
     data : mikeio.Dataset, DataArray, or ndarray
         dfsu data
-    elem_ids : ndarray(int)
-        n sized array of 1 or more element ids used for interpolation
+    elem_ids : ndarray(int), scipy.sparse matrix or Interpolant
+        n sized array of 1 or more element ids used for interpolation,
+        sparse interpolation matrix (see get_sparse_interpolant)
+        or Interpolant
     weights : ndarray(float), optional
         weights with same size as elem_ids used for interpolation
     shape: tuple, optional
@@ -65,62 +224,46 @@ def interp2d(data, elem_ids, weights=None, shape=None):
     """
     from .dataset import Dataset, DataArray
 
-    if isinstance(data, Dataset):
-        ds = data.copy()
+    if isinstance(elem_ids, Interpolant):
+        elem_ids, weights = elem_ids.matrix, None
 
-        ni = len(elem_ids)
+    if isinstance(data, Dataset):
+        if weights is not None and not issparse(elem_ids):
+            # same operator for all items
+            n_elements = data.shape[-1]
+            elem_ids = get_sparse_interpolant(elem_ids, weights, n_elements)
+            weights = None
 
         interp_data_vars = {}
+        for da in data:
+            idatitem = _interp_itemstep(da.to_numpy(), elem_ids, weights)
+            if shape:
+                idatitem = idatitem.reshape((*idatitem.shape[:-1], *shape))
+            interp_data_vars[da.name] = DataArray(
+                data=idatitem, time=da.time, item=da.item
+            )
 
-        for da in ds:
-            key = da.name
-            if "time" not in da.dims:
-                idatitem = _interp_itemstep(da.to_numpy(), elem_ids, weights)
-                if shape:
-                    idatitem = idatitem.reshape(*shape)
-
-            else:
-                nt, _ = da.shape
-                idatitem = np.empty(shape=(nt, ni))
-                for step in range(nt):
-                    idatitem[step, :] = _interp_itemstep(
-                        da[step].to_numpy(), elem_ids, weights
-                    )
-                if shape:
-                    idatitem = idatitem.reshape((nt, *shape))
-            interp_data_vars[key] = DataArray(data=idatitem, time=da.time, item=da.item)
-
-        new_ds = Dataset(interp_data_vars, validate=False)
-        return new_ds
+        return Dataset(interp_data_vars, validate=False)
 
     if isinstance(data, DataArray):
         data = data.to_numpy()
 
-    if isinstance(data, np.ndarray):
-        if data.ndim == 1:
-            # data is single item and single time step
-            idatitem = _interp_itemstep(data, elem_ids, weights)
-            if shape:
-                idatitem = idatitem.reshape(*shape)
-            return idatitem
-
-    ni = len(elem_ids)
-    datitem = data
-    nt, _ = datitem.shape
-    idatitem = np.empty(shape=(nt, ni))
-    for step in range(nt):
-        idatitem[step, :] = _interp_itemstep(datitem[step], elem_ids, weights)
+    idatitem = _interp_itemstep(data, elem_ids, weights)
     if shape:
-        idatitem = idatitem.reshape((nt, *shape))
+        idatitem = idatitem.reshape((*idatitem.shape[:-1], *shape))
     return idatitem
 
 
 def _interp_itemstep(data, elem_ids, weights=None):
-    if weights is None:
+    """interp data with elements in the last axis (all time steps at once)"""
+    if issparse(elem_ids):
+        interpolant = elem_ids
+    elif weights is None:
         # nearest neighbor
-        return data[elem_ids]
-    ni = len(elem_ids)
-    idat = np.empty(ni)
-    for j in range(ni):
-        idat[j] = np.dot(data[elem_ids[j]], weights[j])
-    return idat
+        return data[..., elem_ids]
+    else:
+        interpolant = get_sparse_interpolant(elem_ids, weights, data.shape[-1])
+
+    if data.ndim == 1:
+        return interpolant @ data
+    return np.ascontiguousarray((interpolant @ data.T).T)
@@ -0,0 +1,384 @@
+"""Deferred, chunked reading of the dynamic item values in dfs files"""
+from collections import OrderedDict
+
+import numpy as np
+from mikecore.DfsFileFactory import DfsFileFactory
+
+from .dfsutil import _read_item_time_steps
+
+
+class _LazyDfsReader:
+    """Chunked reader of dynamic item values in a dfs file
+
+    Values are read in blocks of whole time steps and stored in chunks
+    keyed on (item, time-chunk, element-chunk) in a least-recently-used
+    cache of limited size.
+
+    Parameters
+    ----------
+    filename : str
+        full path to the dfs file
+    deletevalue : float
+        file delete value, replaced by NaN
+    dtype : np.float32 or np.float64, optional
+        data type of the returned values, by default np.float32
+    """
+
+    # size of a time chunk (all values of a number of time steps)
+    chunk_bytes = 2**25
+    # max size of cached chunks
+    cache_bytes = 2**28
+    # number of values in an element chunk
+    element_chunk_size = 2**16
+
+    def __init__(self, filename, deletevalue, dtype=np.float32):
+        self._filename = str(filename)
+        self._deletevalue = deletevalue
+        self.dtype = np.dtype(dtype)
+        self._cache = OrderedDict()
+        self._cache_size = 0
+
+    def steps_per_chunk(self, n_values):
+        return max(1, self.chunk_bytes // (n_values * self.dtype.itemsize))
+
+    def read(self, item_number, n_values, time_steps, elements):
+        """Read values of an item
+
+        Parameters
+        ----------
+        item_number : int
+            item number (1-based, as in the file)
+        n_values : int
+            number of values of the item in each time step
+        time_steps : np.ndarray
+            time step indices (0-based)
+        elements : np.ndarray
+            value (element) indices (0-based)
+
+        Returns
+        -------
+        np.ndarray
+            values with shape (len(time_steps), len(elements))
+        """
+        out = np.empty((len(time_steps), len(elements)), dtype=self.dtype)
+        nt = self.steps_per_chunk(n_values)
+        ne = self.element_chunk_size
+        t_chunks = time_steps // nt
+        e_chunks = elements // ne
+        e_needed = np.unique(e_chunks)
+
+        for tc in np.unique(t_chunks):
+            keys = [(item_number, tc, ec) for ec in e_needed]
+            missing = [key for key in keys if key not in self._cache]
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+            if len(missing) > 0:
+                self._read_chunks(item_number, n_values, tc, missing, keep=len(keys))
+
+            rows = np.flatnonzero(t_chunks == tc)
+            for key in keys:
+                ec = key[2]
+                cols = np.flatnonzero(e_chunks == ec)
+                chunk = self._cache[key]
+                out[np.ix_(rows, cols)] = chunk[
+                    np.ix_(time_steps[rows] - tc * nt, elements[cols] - ec * ne)
+                ]
+        return out
+
+    def _read_chunks(self, item_number, n_values, tc, keys, keep):
+        nt = self.steps_per_chunk(n_values)
+        ne = self.element_chunk_size
+        dfs = DfsFileFactory.DfsGenericOpen(self._filename)
+        n_steps_file = dfs.FileInfo.TimeAxis.NumberOfTimeSteps
+        time_steps = list(range(tc * nt, min((tc + 1) * nt, n_steps_file)))
+        data = np.empty((1, len(time_steps), n_values), dtype=self.dtype)
+        _read_item_time_steps(
+            dfs, [item_number], time_steps, data, deletevalue=self._deletevalue
+        )
+        dfs.Close()
+
+        for key in keys:
+            ec = key[2]
+            chunk = data[0, :, ec * ne : (ec + 1) * ne].copy()
+            self._cache[key] = chunk
+            self._cache_size += chunk.nbytes
+        # the most recently used chunks are needed for the current read
+        while self._cache_size > self.cache_bytes and len(self._cache) > keep:
+            _, chunk = self._cache.popitem(last=False)
+            self._cache_size -= chunk.nbytes
+
+
+_REDUCTIONS = {
+    np.sum: "sum",
+    np.nansum: "sum",
+    np.mean: "mean",
+    np.nanmean: "mean",
+    np.std: "std",
+    np.nanstd: "std",
+    np.max: "max",
+    np.nanmax: "max",
+    np.min: "min",
+    np.nanmin: "min",
+}
+_NAN_REDUCTIONS = (np.nansum, np.nanmean, np.nanstd, np.nanmax, np.nanmin)
+
+
+class _LazyArray(np.lib.mixins.NDArrayOperatorsMixin):
+    """Array-like values of a dfs item, read from file when accessed
+
+    Indexing with np.take (used by DataArray.isel) gives a new lazy array.
+    Reductions (sum, mean, std, max, min and their nan-versions) are
+    computed chunk by chunk along the time axis. All other numpy
+    functions and ufuncs work on the values read into memory.
+
+    Parameters
+    ----------
+    reader : _LazyDfsReader
+        chunked reader of the file
+    item_number : int
+        item number (1-based, as in the file)
+    n_values : int
+        number of values of the item in each time step in the file
+    time_steps : np.ndarray
+        selected time step indices
+    elements : np.ndarray, optional
+        selected value (element) indices, by default None (=all)
+    time_axis : bool, optional
+        keep time axis (otherwise a single time step is selected), by default True
+    space_axis : bool, optional
+        keep element axis (otherwise a single element is selected), by default True
+    """
+
+    def __init__(
+        self,
+        reader,
+        item_number,
+        n_values,
+        time_steps,
+        elements=None,
+        time_axis=True,
+        space_axis=True,
+    ):
+        self._reader = reader
+        self._item_number = item_number
+        self._n_values = n_values
+        self._time_steps = np.atleast_1d(np.asarray(time_steps, dtype=int))
+        if elements is None:
+            elements = np.arange(n_values)
+        self._elements = np.atleast_1d(np.asarray(elements, dtype=int))
+        self._time_axis = time_axis
+        self._space_axis = space_axis
+
+    @property
+    def shape(self):
+        shape = ()
+        if self._time_axis:
+            shape = shape + (len(self._time_steps),)
+        if self._space_axis:
+            shape = shape + (len(self._elements),)
+        return shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def dtype(self):
+        return self._reader.dtype
+
+    def __len__(self):
+        if self.ndim == 0:
+            raise TypeError("len() of unsized object")
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"<lazy array: shape={self.shape}, dtype={self.dtype}>"
+
+    def __getattr__(self, name):
+        # other ndarray methods (ravel, astype, ...) work on the values in memory
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._read(), name)
+
+    def __deepcopy__(self, memo):
+        return self._subset(self._time_steps, self._elements)
+
+    def _subset(self, time_steps, elements, time_axis=None, space_axis=None):
+        return _LazyArray(
+            self._reader,
+            self._item_number,
+            self._n_values,
+            time_steps,
+            elements,
+            time_axis=self._time_axis if time_axis is None else time_axis,
+            space_axis=self._space_axis if space_axis is None else space_axis,
+        )
+
+    def _read(self, time_steps=None):
+        time_steps = self._time_steps if time_steps is None else time_steps
+        values = self._reader.read(
+            self._item_number, self._n_values, time_steps, self._elements
+        )
+        shape = ((len(time_steps),) if self._time_axis else ()) + (
+            (len(self._elements),) if self._space_axis else ()
+        )
+        return values.reshape(shape)
+
+    def _iter_time_chunks(self):
+        n = self._reader.steps_per_chunk(self._n_values)
+        for i in range(0, len(self._time_steps), n):
+            yield self._read(self._time_steps[i : i + n])
+
+    def __array__(self, dtype=None):
+        values = self._read()
+        return values if dtype is None else values.astype(dtype)
+
+    def _take(self, indices, axis):
+        if axis < 0:
+            axis = axis + self.ndim
+        if axis >= self.ndim:
+            raise IndexError(f"axis {axis} is out of bounds for {self.ndim} dimensions")
+        single = np.ndim(indices) == 0
+        if self._time_axis and axis == 0:
+            time_steps = self._time_steps[np.atleast_1d(indices)]
+            return self._subset(time_steps, self._elements, time_axis=not single)
+        elements = self._elements[np.atleast_1d(indices)]
+        return self._subset(self._time_steps, elements, space_axis=not single)
+
+    def _squeeze(self, axis=None):
+        if axis is None:
+            axis = [i for i, n in enumerate(self.shape) if n == 1]
+        axes = sorted((int(a) % self.ndim for a in np.atleast_1d(axis)), reverse=True)
+        da = self
+        for a in axes:
+            if self.shape[a] != 1:
+                raise ValueError(
+                    "cannot select an axis to squeeze out which has size not equal to one"
+                )
+            da = da._take(0, a)
+        return da
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        n_arrays = sum(not np.isscalar(k) and not isinstance(k, slice) for k in key)
+        if len(key) > self.ndim or n_arrays > 1 or any(k is Ellipsis for k in key):
+            return np.asarray(self)[key]
+
+        da = self
+        for axis, k in reversed(list(enumerate(key))):
+            if isinstance(k, slice) and k == slice(None):
+                continue
+            indices = np.arange(self.shape[axis])[k]
+            da = da._take(indices, axis)
+        values = np.asarray(da)
+        return values[()] if values.ndim == 0 else values
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = _materialize(inputs)
+        kwargs = _materialize(kwargs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func is np.take and args[0] is self and _only(args, kwargs, 3, "axis"):
+            indices = args[1] if len(args) > 1 else kwargs["indices"]
+            axis = args[2] if len(args) > 2 else kwargs.get("axis")
+            if axis is not None:
+                return self._take(indices, axis)
+        if func is np.squeeze and args[0] is self and _only(args, kwargs, 2, "axis"):
+            axis = args[1] if len(args) > 1 else kwargs.get("axis")
+            return self._squeeze(axis)
+        if func in _REDUCTIONS and args[0] is self and self._time_axis:
+            if _only(args, kwargs, 2, "axis", "keepdims", "ddof") and not kwargs.get(
+                "keepdims", False
+            ):
+                axis = args[1] if len(args) > 1 else kwargs.get("axis")
+                return self._reduce(func, axis, ddof=kwargs.get("ddof", 0))
+        return func(*_materialize(args), **_materialize(kwargs))
+
+    def _reduce(self, func, axis, ddof=0):
+        """Reduce chunk by chunk along the time axis"""
+        axes = tuple(range(self.ndim)) if axis is None else np.atleast_1d(axis)
+        axes = tuple(int(a) % self.ndim for a in axes)
+
+        kind = _REDUCTIONS[func]
+        if 0 not in axes:
+            # time is not reduced, reduce each chunk separately
+            kwargs = dict(ddof=ddof) if kind == "std" else {}
+            res = [func(x, axis=axes, **kwargs) for x in self._iter_time_chunks()]
+            return np.concatenate(res, axis=0)
+
+        skipna = func in _NAN_REDUCTIONS
+        res = None
+        for x in self._iter_time_chunks():
+            if kind in ("mean", "std"):
+                res = _combine_moments(res, _moments(x, axes, skipna))
+            else:
+                xr = func(x, axis=axes)
+                if res is None:
+                    res = xr
+                elif kind == "sum":
+                    res = res + xr
+                elif kind == "max":
+                    res = np.fmax(res, xr) if skipna else np.maximum(res, xr)
+                else:
+                    res = np.fmin(res, xr) if skipna else np.minimum(res, xr)
+
+        if kind in ("mean", "std"):
+            n, mean, m2 = res
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(n > 0, mean, np.nan)
+                res = mean if kind == "mean" else np.sqrt(m2 / (n - ddof))
+                if kind == "std":
+                    res = np.where(n - ddof > 0, res, np.nan)
+        return np.asarray(res).astype(self.dtype)[()]
+
+
+def _only(args, kwargs, n_args, *names):
+    """Are the args/kwargs within what can be handled lazily?"""
+    return len(args) <= n_args and all(k in names for k in kwargs)
+
+
+def _moments(x, axes, skipna):
+    """count, mean and sum of squared deviations of x"""
+    x = x.astype(np.float64)
+    if skipna:
+        n = np.sum(~np.isnan(x), axis=axes)
+        with np.errstate(invalid="ignore"):
+            s = np.nansum(x, axis=axes)
+            mean = np.where(n > 0, s / np.maximum(n, 1), 0.0)
+        m2 = np.nansum((x - np.expand_dims(mean, axes)) ** 2, axis=axes)
+    else:
+        mean = np.mean(x, axis=axes)
+        n = np.full(np.shape(mean), np.prod([x.shape[a] for a in axes]))
+        m2 = np.sum((x - np.expand_dims(mean, axes)) ** 2, axis=axes)
+    return n, mean, m2
+
+
+def _combine_moments(a, b):
+    """Combine moments of two sets (Chan et al.)"""
+    if a is None:
+        return b
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = mean_b - mean_a
+        mean = np.where(n > 0, mean_a + delta * n_b / n, 0.0)
+        m2 = m2_a + m2_b + np.where(n > 0, delta**2 * n_a * n_b / n, 0.0)
+    return n, mean, m2
+
+
+def _materialize(obj):
+    """Replace lazy arrays (also in lists, tuples and dicts) by their values"""
+    if isinstance(obj, _LazyArray):
+        return np.asarray(obj)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_materialize(o) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _materialize(v) for k, v in obj.items()}
+    return obj
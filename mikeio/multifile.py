@@ -0,0 +1,374 @@
+"""Read data from a series of dfs files as a whole"""
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob, has_magic
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from mikecore.DfsFileFactory import DfsFileFactory
+
+from .dataset import Dataset
+from .dfsutil import (
+    _get_item_info,
+    _read_time_axis,
+    _read_time_steps_into,
+    _valid_item_numbers,
+)
+
+# static items of a dfsu file defining the mesh
+_MESH_ITEMS = (
+    "X-coord",
+    "Y-coord",
+    "Z-coord",
+    "Element type",
+    "No of nodes",
+    "Connectivity",
+)
+
+
+def read_many(
+    filenames,
+    *,
+    items=None,
+    elements=None,
+    area=None,
+    keep="last",
+    dtype=np.float32,
+    parallel=1,
+) -> Dataset:
+    """Read all time steps from a number of dfs files into a single Dataset
+
+    The files must have the same items and spatial dimensions and an
+    equidistant calendar time axis. The time steps of the files are
+    merged into one time axis and the data is read directly into the
+    combined Dataset. Where the files overlap in time, the values of the
+    last file are used (see Dataset.concat).
+
+    Supported file types: dfs1, dfs2, dfs3 and dfsu-2d
+
+    Parameters
+    ----------
+    filenames: str or list[str]
+        list of dfs files or a glob pattern, e.g. "output/HD_*.dfsu"
+        (the files matching a pattern are read in sorted order)
+    items: int, str, list[int] or list[str], optional
+        Read only selected items, by number (0-based), or by name,
+        by default None (=all)
+    elements: list[int], optional
+        Dfsu: read only selected element ids, by default None
+    area: (float, float, float, float), optional
+        Dfsu: read only data within an area given by a bounding
+        box of coordinates (left, lower, right, upper), by default None (=all)
+    keep: str, optional
+        which values to keep where the files overlap in time,
+        only "last" is currently supported, by default "last"
+    dtype: np.float32 or np.float64, optional
+        data type of the returned values, by default np.float32
+    parallel: int, optional
+        number of files read concurrently, by default 1
+
+    Returns
+    -------
+    Dataset
+
+    See also
+    --------
+    mikeio.read - read data from a single dfs file
+
+    Examples
+    --------
+    >>> ds = mikeio.read_many("forecast/HD_2022*.dfsu", items="Surface elevation")
+    >>> ds = mikeio.read_many(["day1.dfs2", "day2.dfs2"], parallel=4)
+    """
+    if keep != "last":
+        raise NotImplementedError(
+            "Last values is the only available option at the moment."
+        )
+    if dtype not in [np.float32, np.float64]:
+        raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+
+    from . import open
+
+    filenames = _parse_filenames(filenames)
+    for filename in filenames:
+        _, ext = os.path.splitext(filename)
+        if ext not in (".dfs1", ".dfs2", ".dfs3", ".dfsu"):
+            raise ValueError(f"read_many is not supported for {ext} files")
+
+    dfs = open(filenames[0])
+    if filenames[0].endswith(".dfsu"):
+        if dfs.is_layered or dfs.is_spectral:
+            raise NotImplementedError(
+                "read_many is not yet implemented for layered or spectral dfsu"
+            )
+        dfs._validate_elements_and_geometry_sel(elements, area=area)
+        if elements is None:
+            elements = dfs._parse_geometry_sel(area=area, x=None, y=None)
+        if elements is None:
+            geometry = dfs.geometry
+            shape = (geometry.n_elements,)
+        else:
+            elements = [elements] if np.isscalar(elements) else list(elements)
+            geometry = dfs.geometry.elements_to_geometry(elements)
+            shape = (len(elements),)
+        dims = ("time", "element")
+    elif elements is not None or area is not None:
+        raise ValueError("elements and area can only be selected for dfsu files")
+    else:
+        geometry = dfs.geometry
+        shape = dfs._shape_of_values()
+        dims = ("time",) + ("z", "y", "x")[-dfs._ndim :]
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        headers = _read_headers(filenames, executor)
+
+        dfs0 = DfsFileFactory.DfsGenericOpen(filenames[0])
+        item_numbers = _valid_item_numbers(dfs0.ItemInfo, items)
+        items = _get_item_info(dfs0.ItemInfo, item_numbers)
+        dfs0.Close()
+
+        time, positions, owner = _merge_time_axes([h[0] for h in headers])
+
+        data = np.empty((len(item_numbers), len(time), *shape), dtype=dtype)
+
+        def read_data(j):
+            steps = np.nonzero(owner[positions[j]] == j)[0]
+            dfsj = DfsFileFactory.DfsGenericOpen(filenames[j])
+            try:
+                _read_time_steps_into(
+                    dfsj,
+                    [n + 1 for n in item_numbers],
+                    list(steps),
+                    positions[j][steps],
+                    data,
+                    elements=elements,
+                    deletevalue=dfsj.FileInfo.DeleteValueFloat,
+                )
+            finally:
+                dfsj.Close()
+
+        list(executor.map(read_data, range(len(filenames))))
+
+    data_list = list(data)
+    if elements is not None and len(elements) == 1:
+        # squeeze point data
+        dims = ("time",)
+        data_list = [d[:, 0] for d in data_list]
+
+    return Dataset(data_list, time, items, geometry=geometry, dims=dims, validate=False)
+
+
+def extract_track(
+    filenames,
+    track,
+    *,
+    items=None,
+    method="nearest",
+    dtype=np.float32,
+    parallel=1,
+):
+    """Extract track data from a sequence of dfsu files with the same mesh
+
+    The spatial interpolant is computed once for all files. The time steps
+    of the files are merged into one time axis (where the files overlap in
+    time, the values of the last file are used as in read_many), so track
+    points between the last time step of a file and the first time step
+    of the next file are interpolated across the file boundary. Only the
+    time steps needed by the track are read, block by block, with up to
+    `parallel` blocks read concurrently.
+
+    Parameters
+    ----------
+    filenames: str or list[str]
+        list of dfsu files or a glob pattern, e.g. "output/HD_2022-*.dfsu"
+        (the files matching a pattern are used in sorted order)
+    track: pandas.DataFrame, str, Dataset or list
+        track with time and (x, y) of the track points, a csv or dfs0
+        filename, or a list of tracks, see Dfsu2DH.extract_track; a track
+        in a list without time overlap with the files gets NaN values
+    items: list[int] or list[str], optional
+        Extract only selected items, by number (0-based), or by name
+    method: str, optional
+        Spatial interpolation method ('nearest', 'inverse_distance'
+        or 'linear'), default='nearest'
+    dtype: np.float32 or np.float64, optional
+        data type of the returned values, by default np.float32
+    parallel: int, optional
+        number of blocks of time steps read concurrently, by default 1
+
+    Returns
+    -------
+    Dataset or list[Dataset]
+        A dataset with data dimension t (for each track)
+        The first two items will be x- and y- coordinates of track
+
+    See also
+    --------
+    mikeio.read_many - read all time steps of a number of dfs files
+
+    Examples
+    --------
+    >>> ds = mikeio.extract_track("output/HD_2022-*.dfsu", "track.csv", parallel=4)
+    >>> ds1, ds2 = mikeio.extract_track(["jan.dfsu", "feb.dfsu"], [df1, df2])
+    """
+    from . import open
+    from .dfsu import Dfsu2DH, _check_track_overlap, _parse_track, _extract_tracks
+
+    if dtype not in [np.float32, np.float64]:
+        raise ValueError("Invalid data type. Choose np.float32 or np.float64")
+
+    filenames = _parse_filenames(filenames)
+    for filename in filenames:
+        _, ext = os.path.splitext(filename)
+        if ext != ".dfsu":
+            raise ValueError(f"extract_track is not supported for {ext} files")
+
+    dfs = open(filenames[0])
+    if not isinstance(dfs, Dfsu2DH) or dfs.is_spectral:
+        raise NotImplementedError(
+            "extract_track is only implemented for 2d horizontal dfsu"
+        )
+
+    is_list = isinstance(track, (list, tuple))
+    tracks = [_parse_track(t) for t in (track if is_list else [track])]
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        headers = _read_headers(filenames, executor)
+        time, positions, owner = _merge_time_axes([h[0] for h in headers])
+        # time step in its file of each step of the merged time axis
+        file_steps = np.empty(len(time), dtype=int)
+        for j, pos in enumerate(positions):
+            is_owner = owner[pos] == j
+            file_steps[pos[is_owner]] = np.nonzero(is_owner)[0]
+
+        if not is_list:
+            _check_track_overlap(tracks[0][0], time[0], time[-1])
+
+        dfs0 = DfsFileFactory.DfsGenericOpen(filenames[0])
+        item_numbers = _valid_item_numbers(dfs0.ItemInfo, items)
+        items = _get_item_info(dfs0.ItemInfo, item_numbers)
+        dfs0.Close()
+
+        step_times = (time - time[0]).total_seconds().to_numpy()
+
+        def read_block(steps, elements):
+            data = np.empty((len(item_numbers), len(steps), len(elements)), dtype)
+            dfsj = DfsFileFactory.DfsGenericOpen(filenames[owner[steps[0]]])
+            try:
+                _read_time_steps_into(
+                    dfsj,
+                    [n + 1 for n in item_numbers],
+                    list(file_steps[steps]),
+                    np.arange(len(steps)),
+                    data,
+                    elements=elements,
+                    deletevalue=dfsj.FileInfo.DeleteValueFloat,
+                )
+            finally:
+                dfsj.Close()
+            return data, step_times[steps]
+
+        def read_steps(steps, elements, chunk=24):
+            # blocks of at most chunk steps from the same file, read ahead
+            breaks = np.nonzero(np.diff(owner[steps]))[0] + 1
+            blocks = [
+                b[i : i + chunk]
+                for b in np.split(steps, breaks)
+                for i in range(0, len(b), chunk)
+            ]
+            futures = deque()
+            for block in blocks:
+                futures.append(executor.submit(read_block, block, elements))
+                if len(futures) > parallel:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+        datasets = _extract_tracks(
+            tracks,
+            dfs.geometry,
+            time[0],
+            step_times,
+            read_steps,
+            items,
+            method=method,
+            dtype=dtype,
+            show_progress=dfs.show_progress,
+        )
+
+    return datasets if is_list else datasets[0]
+
+
+def _parse_filenames(filenames):
+    """List of filenames from a list or a glob pattern (in sorted order)"""
+    if isinstance(filenames, (str, Path)):
+        pattern = str(filenames)
+        filenames = sorted(glob(pattern)) if has_magic(pattern) else [pattern]
+    filenames = [str(f) for f in filenames]
+    if len(filenames) == 0:
+        raise ValueError("No files to read")
+    return filenames
+
+
+def _read_headers(filenames, executor):
+    """Time axis, items, number of values and mesh hash (dfsu) of each file
+
+    The files must have the same items, number of values and mesh as the
+    first file
+    """
+
+    def read_header(filename):
+        dfsi = DfsFileFactory.DfsGenericOpen(filename)
+        try:
+            mesh = _mesh_hash(dfsi) if filename.endswith(".dfsu") else None
+            time = _read_time_axis(dfsi)
+            item_infos = _get_item_info(dfsi.ItemInfo)
+            n_values = [info.ElementCount for info in dfsi.ItemInfo]
+        finally:
+            dfsi.Close()
+        return time, item_infos, n_values, mesh
+
+    headers = list(executor.map(read_header, filenames))
+
+    # the files must be compatible with the first file
+    _, item_infos, n_values, mesh = headers[0]
+    for filename, (_, item_infos_i, n_values_i, mesh_i) in zip(filenames, headers):
+        if item_infos_i != item_infos:
+            raise ValueError(
+                f"Items of {filename} do not match items of {filenames[0]}"
+            )
+        if n_values_i != n_values:
+            raise ValueError(
+                f"Shape of {filename} does not match shape of {filenames[0]}"
+            )
+        if mesh_i != mesh:
+            raise ValueError(
+                f"Mesh of {filename} does not match mesh of {filenames[0]}"
+            )
+    return headers
+
+
+def _mesh_hash(dfs):
+    """Hash of the node coordinates and element table of an open dfsu file"""
+    h = hashlib.sha1()
+    item = dfs.ReadStaticItemNext()
+    while item is not None:
+        if item.Name in _MESH_ITEMS:
+            h.update(item.Name.encode())
+            h.update(np.ascontiguousarray(item.Data).tobytes())
+        item = dfs.ReadStaticItemNext()
+    return h.hexdigest()
+
+
+def _merge_time_axes(times):
+    """Merged time axis, position of each file's time steps in it and the
+    file (the last file containing it) each merged time step is read from"""
+    time = pd.DatetimeIndex(np.unique(np.concatenate(times)))
+    positions = [time.get_indexer(t) for t in times]
+    owner = np.empty(len(time), dtype=int)
+    for j, pos in enumerate(positions):
+        owner[pos] = j
+    return time, positions, owner
@@ -0,0 +1,110 @@
+"""Opt-in on-disk cache of the spatial index of flexible mesh geometries"""
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+
+class SpatialIndexCache:
+    """On-disk cache of spatial data derived from a flexible mesh geometry
+
+    Element coordinates, the 2d KD-tree, boundary polylines and (for
+    layered geometries) the top layer elements are stored in a file
+    per geometry, keyed by a hash of the node coordinates and the element
+    table. When the total size of the files exceeds max_bytes, the least
+    recently used entries are removed.
+
+    The cache is not used unless enabled on GeometryFM (see example) and
+    only for geometries read from a mesh or dfsu file, not for geometries
+    derived from these (e.g. by isel or geometry2d). The entry of a
+    geometry is written once, when the first derived data is computed.
+    Entries are pickled: only use a cache directory you trust.
+
+    Parameters
+    ----------
+    path : str or Path
+        cache directory, created if it does not exist
+    max_bytes : int, optional
+        max total size of the cache files, by default 1 GB
+
+    Examples
+    --------
+    >>> from mikeio.spatial.FM_geometry import GeometryFM
+    >>> from mikeio.spatial.FM_cache import SpatialIndexCache
+    >>> GeometryFM.index_cache = SpatialIndexCache("~/.cache/mikeio")
+    """
+
+    # bump if the content of the entries changes
+    _format_version = 2
+
+    def __init__(self, path, max_bytes=2**30):
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"SpatialIndexCache({str(self.path)!r}, max_bytes={self.max_bytes})"
+
+    def key(self, geometry):
+        """Hash of the node coordinates and element table of a geometry"""
+        h = hashlib.sha1(f"{self._format_version}".encode())
+        h.update(geometry._content_hash.encode())
+        return h.hexdigest()
+
+    def _file(self, key):
+        return self.path / f"{key}.pkl"
+
+    def get(self, key):
+        """Cached entry (dict) or None if not in cache"""
+        filename = self._file(key)
+        try:
+            with open(filename, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(filename)  # most recently used
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        """Store entry (dict) and remove least recently used entries if needed"""
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        # write to a temporary file first, other processes may read the cache
+        fd, tmpname = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmpname, self._file(key))
+
+        self._evict(keep=self._file(key))
+
+    def _evict(self, keep=None):
+        files = []
+        for filename in self.path.glob("*.pkl"):
+            try:
+                stat = filename.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, filename in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if filename == keep:
+                continue
+            try:
+                filename.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove all entries"""
+        for filename in self.path.glob("*.pkl"):
+            try:
+                filename.unlink()
+            except FileNotFoundError:
+                pass
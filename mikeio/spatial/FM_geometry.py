@@ -1,7 +1,9 @@
 from typing import Sequence, Union
+import hashlib
 import warnings
 import numpy as np
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
+from scipy.sparse import csr_matrix
 from scipy.spatial import cKDTree
 from mikecore.DfsuFile import DfsuFileType
 from mikecore.eum import eumQuantity
@@ -10,19 +12,35 @@ from mikecore.MeshBuilder import MeshBuilder
 from ..eum import EUMType, EUMUnit
 from .geometry import _Geometry, BoundingBox, GeometryPoint2D, GeometryPoint3D
 from .grid_geometry import Grid2D
-from ..interpolation import get_idw_interpolant, interp2d
+from ..interpolation import (
+    Interpolant,
+    get_idw_interpolant,
+    get_sparse_interpolant,
+    interp2d,
+    _from_sparse_interpolant,
+)
 from ..custom_exceptions import InvalidGeometry
 from .utils import _relative_cumulative_distance, xy_to_bbox
 from .FM_utils import (
-    _get_node_centered_data,
+    _barycentric_weights,
+    _from_padded_element_table,
+    _get_node_centering_matrix,
+    _sum_node_values,
+    _to_padded_element_table,
     _to_polygons,
     _plot_map,
     _set_xy_label_by_projection,
-    _point_in_polygon,
+    _points_in_elements,
     _plot_vertical_profile,
 )
 import mikeio.data_utils as du
 
+Polyline = namedtuple("Polyline", ["n_nodes", "nodes", "xy", "area"])
+BoundaryPolylines = namedtuple(
+    "BoundaryPolylines",
+    ["n_exteriors", "exteriors", "n_interiors", "interiors"],
+)
+
 
 class GeometryFMPointSpectrum(_Geometry):
     def __init__(self, frequencies=None, directions=None, x=None, y=None) -> None:
@@ -251,6 +269,15 @@ class _GeometryFMVerticalProfilePlotter:
 
 
 class GeometryFM(_Geometry):
+    # opt-in on-disk cache of derived spatial data, see SpatialIndexCache
+    index_cache = None
+    _index_cache_attrs = ("_ec", "_tree2d", "_boundary_polylines")
+
+    # interpolants from get_interpolant, shared by all geometries with the
+    # same mesh (most recent last)
+    _interpolants = OrderedDict()
+    max_interpolant_bytes = 2**28
+
     def __init__(
         self,
         node_coordinates,
@@ -273,16 +300,24 @@ class GeometryFM(_Geometry):
 
         self._nc = None
         self._ec = None
+        self._area = None
         self._codes = None
         self._element_ids = None
         self._node_ids = None
         self._element_table = None
+        self._padded_element_table = None
         self._n_axis = 1
         self._n_layers = None
 
         self._tree2d = None
+        self._max_elem_radius = None
         self._boundary_polylines = None
+        self._node_centering = None
         self._geom2d = None
+        self._index_cache_key = None
+        self._index_cache_enabled = False  # only geometries read from a file
+        self._index_cache_stored = False
+        self._hash = None
 
         self._set_nodes(
             node_coordinates=node_coordinates,
@@ -300,13 +335,6 @@ class GeometryFM(_Geometry):
 
         self.plot = _GeometryFMPlotter(self)
 
-        # try:
-        #     import numba
-
-        #     self._point_in_polygon = numba.njit(_point_in_polygon)
-        # except ModuleNotFoundError:
-        self._point_in_polygon = _point_in_polygon
-
     def __repr__(self):
         out = []
         out.append("Flexible Mesh Geometry: " + self.type_name)
@@ -351,23 +379,20 @@ class GeometryFM(_Geometry):
         self, element_table, element_ids=None, dfsu_type=None, validate=True
     ):
 
-        if validate:
+        table, n_nodes = _to_padded_element_table(element_table)
+
+        if validate and table.size > 0:
             max_node_id = self.node_ids.max()
-            for i, e in enumerate(element_table):
-                # TODO: avoid looping through all elements (could be +1e6)!
-                if not isinstance(e, np.ndarray):
-                    e = np.asarray(e)
-                    element_table[i] = e
-
-                # NOTE: this check "e.max()" takes the most of the time when constructing a new FM_geometry
-                if e.max() > max_node_id:
-                    raise ValueError(
-                        f"Element table has node # {e.max()}. Max node id: {max_node_id}"
-                    )
+            if table.max() > max_node_id:
+                raise ValueError(
+                    f"Element table has node # {table.max()}. Max node id: {max_node_id}"
+                )
 
-        self._element_table = element_table
+        # the padded table is the canonical storage, the list view is created on demand
+        self._padded_element_table = (table, n_nodes)
+        self._element_table = None
         if element_ids is None:
-            element_ids = np.arange(len(element_table))
+            element_ids = np.arange(len(table))
         self._element_ids = np.asarray(element_ids)
 
         if dfsu_type is None:
@@ -381,13 +406,18 @@ class GeometryFM(_Geometry):
     def _reindex(self):
         new_node_ids = np.arange(self.n_nodes)
         new_element_ids = np.arange(self.n_elements)
-        node_dict = dict(zip(self._node_ids, new_node_ids))
-        for eid in range(self.n_elements):
-            elem_nodes = self._element_table[eid]
-            new_elem_nodes = np.zeros_like(elem_nodes)
-            for jn, idx in enumerate(elem_nodes):
-                new_elem_nodes[jn] = node_dict[idx]
-            self._element_table[eid] = new_elem_nodes
+        table, n_nodes = self._padded_element_table
+        sorter = np.argsort(self._node_ids)
+        is_node = table >= 0
+        new_table = np.full_like(table, -1)
+        new_table[is_node] = sorter[
+            np.searchsorted(self._node_ids, table[is_node], sorter=sorter)
+        ]
+        self._padded_element_table = (new_table, n_nodes)
+        self._element_table = None
+        self._hash = None
+        self._index_cache_key = None
+        self._index_cache_stored = False
 
         self._node_ids = new_node_ids
         self._element_ids = new_element_ids
@@ -418,18 +448,26 @@ class GeometryFM(_Geometry):
     @property
     def element_table(self):
         """Element to node connectivity"""
+        if self._element_table is None:
+            self._element_table = _from_padded_element_table(
+                *self._padded_element_table
+            )
         return self._element_table
 
-    # cache this?
+    @property
+    def _element_table_padded(self):
+        """Element table as 2d array padded with -1 and number of nodes per element"""
+        return self._padded_element_table
+
+    def _get_element_table_for_mikecore(self):
+        """Element table with 1-based node ids as used by mikecore"""
+        table, n_nodes = self._padded_element_table
+        return _from_padded_element_table(table + 1, n_nodes)
+
     @property
     def max_nodes_per_element(self):
         """The maximum number of nodes for an element"""
-        maxnodes = 0
-        for local_nodes in self.element_table:
-            n = len(local_nodes)
-            if n > maxnodes:
-                maxnodes = n
-        return maxnodes
+        return self._element_table_padded[0].shape[1]
 
     @property
     def type_name(self):
@@ -473,55 +511,48 @@ class GeometryFM(_Geometry):
     @property
     def element_coordinates(self):
         """Center coordinates of each element"""
-        if self._ec is None:
+        if self._ec is None and not self._from_index_cache("_ec"):
             self._ec = self._calc_element_coordinates()
         return self._ec
 
     def _calc_element_coordinates(self, elements=None, zn=None):
-        node_coordinates = self._nc
-
-        element_table = self.element_table
+        table, n_nodes = self._element_table_padded
         if elements is not None:
-            element_table = element_table[elements]
+            table = table[elements]
+            n_nodes = n_nodes[elements]
+        weights = (table >= 0) / n_nodes[:, None]
+
+        nc = self._nc
         if zn is not None:
-            node_coordinates = node_coordinates.copy()
-            if len(zn) == len(node_coordinates[:, 2]):
-                node_coordinates[:, 2] = zn
-            else:
+            zn = np.asarray(zn)
+            if zn.shape[-1] != self.n_nodes:
                 # assume that user wants to find coords on a subset of points
-                idx = np.unique(np.hstack(element_table))
-                node_coordinates[idx, 2] = zn
-
-        n_elements = len(element_table)
-        ec = np.empty([n_elements, 3])
-
-        # pre-allocate for speed
-        maxnodes = 4 if self.is_2d else 8
-        idx = np.zeros(maxnodes, dtype=int)
-        xcoords = np.zeros([maxnodes, n_elements])
-        ycoords = np.zeros([maxnodes, n_elements])
-        zcoords = np.zeros([maxnodes, n_elements])
-        nnodes_per_elem = np.zeros(n_elements)
-
-        for j in range(n_elements):
-            nodes = element_table[j]
-            nnodes = len(nodes)
-            nnodes_per_elem[j] = nnodes
-            for i in range(nnodes):
-                idx[i] = nodes[i]  # - 1
-
-            xcoords[:nnodes, j] = node_coordinates[idx[:nnodes], 0]
-            ycoords[:nnodes, j] = node_coordinates[idx[:nnodes], 1]
-            zcoords[:nnodes, j] = node_coordinates[idx[:nnodes], 2]
-
-        ec[:, 0] = np.sum(xcoords, axis=0) / nnodes_per_elem
-        ec[:, 1] = np.sum(ycoords, axis=0) / nnodes_per_elem
-        ec[:, 2] = np.sum(zcoords, axis=0) / nnodes_per_elem
+                nodes = np.unique(table[table >= 0])
+                table = np.searchsorted(nodes, table)
+                nc = nc[nodes]
+
+        xe = _sum_node_values(nc[:, 0], table, weights)
+        ye = _sum_node_values(nc[:, 1], table, weights)
+        ze = _sum_node_values(nc[:, 2] if zn is None else zn, table, weights)
+        if ze.ndim == 1:
+            return np.column_stack([xe, ye, ze])
 
+        # dynamic zn (n_steps, n_nodes): coordinates for each time step
+        ec = np.empty(ze.shape + (3,))
+        ec[..., 0] = xe
+        ec[..., 1] = ye
+        ec[..., 2] = ze
         return ec
 
     def find_nearest_elements(
-        self, x, y=None, z=None, layer=None, n_nearest=1, return_distances=False
+        self,
+        x,
+        y=None,
+        z=None,
+        layer=None,
+        n_nearest=1,
+        return_distances=False,
+        zn=None,
     ):
         """Find index of nearest elements (optionally for a list)
 
@@ -543,6 +574,11 @@ class GeometryFM(_Geometry):
         return_distances : bool, optional
             should the horizontal distances to each point be returned?
             default=False
+        zn: np.array(float), optional
+            3D files only: dynamic z-coordinates of the nodes, either
+            (n_nodes,) or (n_timesteps, n_nodes), used with z instead of
+            the static node coordinates; with (n_timesteps, n_nodes) the
+            element ids have a leading time dimension
 
         Returns
         -------
@@ -564,6 +600,7 @@ class GeometryFM(_Geometry):
         >>> ids = g.find_nearest_elements(3, 4, layer=4)
         >>> ids = g.find_nearest_elements(xyz)
         >>> ids = g.find_nearest_elements(xyz, n_nearest=3)
+        >>> ids = g.find_nearest_elements(xyz, zn=ds._zn)  # for each time step
 
         See Also
         --------
@@ -574,7 +611,7 @@ class GeometryFM(_Geometry):
         if self.is_layered:
             if self._use_third_col_as_z(x, z, layer):
                 z = x[:, 2]
-            idx = self._find_3d_from_2d_points(idx, z=z, layer=layer)
+            idx = self._find_3d_from_2d_points(idx, z=z, layer=layer, zn=zn)
 
         if return_distances:
             return idx, d2d
@@ -597,8 +634,10 @@ class GeometryFM(_Geometry):
         extrapolate: bool = False,
         p: int = 2,
         radius: float = None,
+        sparse: bool = False,
+        method: str = "idw",
     ):
-        """IDW interpolant for list of coordinates
+        """IDW (or linear) interpolant for list of coordinates
 
         Parameters
         ----------
@@ -613,13 +652,32 @@ class GeometryFM(_Geometry):
         radius: float, optional
             an alternative to extrapolate=False,
             only include elements within radius
+        sparse: bool, optional
+            return the interpolant as a sparse matrix
+            (n_points x n_elements) which can be applied to
+            all time steps at once, by default False
+        method: str, optional
+            "idw", "nearest" (same as n_nearest=1) or "linear":
+            linear interpolation in the element containing the point
+            of the node values (see get_node_centered_data),
+            by default "idw"
 
         Returns
         -------
-        (np.array, np.array)
-            element ids and weights
+        (np.array, np.array) or scipy.sparse.csr_matrix
+            element ids and weights or interpolation matrix
         """
         xy = np.atleast_2d(xy)
+        if method == "linear":
+            matrix = self._get_linear_interpolant(xy, extrapolate=extrapolate)
+            return matrix if sparse else _from_sparse_interpolant(matrix)
+        elif method == "nearest":
+            n_nearest = 1
+        elif method != "idw":
+            raise ValueError(
+                f"method must be 'idw', 'nearest' or 'linear', not {method!r}"
+            )
+
         ids, dists = self._find_n_nearest_2d_elements(xy, n=n_nearest)
         weights = None
 
@@ -638,8 +696,154 @@ class GeometryFM(_Geometry):
             idx = np.where(dists > radius)[0]
             weights[idx] = np.nan
 
+        if sparse:
+            return get_sparse_interpolant(ids, weights, self._geometry2d.n_elements)
         return ids, weights
 
+    def get_interpolant(
+        self,
+        xy,
+        n_nearest: int = 5,
+        extrapolate: bool = False,
+        p: int = 2,
+        radius: float = None,
+        method: str = "idw",
+    ) -> Interpolant:
+        """Interpolant for list of coordinates, reused if available
+
+        The interpolant is stored and reused for geometries with the
+        same mesh (also if read from another file) and the same
+        coordinates and options. The most recently used interpolants
+        are kept up to a total of GeometryFM.max_interpolant_bytes
+        (256 MB by default, 0 disables the cache), see also
+        clear_interpolants. Use get_2d_interpolant to calculate an
+        interpolant without storing it.
+
+        Parameters
+        ----------
+        xy : array-like
+            x,y coordinates of new points
+        n_nearest : int, optional
+            number of nearest elements used for IDW, by default 5
+        extrapolate : bool, optional
+            allow extrapolation, by default False
+        p : float, optional
+            power of inverse distance weighting, default=2
+        radius: float, optional
+            an alternative to extrapolate=False,
+            only include elements within radius
+        method: str, optional
+            "idw", "nearest" or "linear", see get_2d_interpolant,
+            by default "idw"
+
+        Returns
+        -------
+        Interpolant
+            element ids and weights (read-only)
+
+        Examples
+        --------
+        >>> interpolant = ds.geometry.get_interpolant(xy)
+        >>> dsi = interpolant.interp(ds)
+        """
+        xy = np.ascontiguousarray(np.atleast_2d(xy), dtype=np.float64)
+        h = hashlib.sha1(self._content_hash.encode())
+        if method == "nearest" or (method == "idw" and n_nearest == 1):
+            method, n_nearest = "nearest", 1
+        h.update(f"{xy.shape} {method} {n_nearest} {extrapolate} {p} {radius}".encode())
+        h.update(xy.tobytes())
+        key = h.hexdigest()
+
+        interpolants = GeometryFM._interpolants
+        interpolant = interpolants.get(key)
+        if interpolant is not None:
+            interpolants.move_to_end(key)
+            return interpolant
+
+        matrix = None
+        if method == "linear":
+            matrix = self._get_linear_interpolant(xy, extrapolate=extrapolate)
+            ids, weights = _from_sparse_interpolant(matrix)
+        else:
+            ids, weights = self.get_2d_interpolant(
+                xy,
+                n_nearest=n_nearest,
+                extrapolate=extrapolate,
+                p=p,
+                radius=radius,
+                method=method,
+            )
+        ids.flags.writeable = False
+        weights.flags.writeable = False
+        xy.flags.writeable = False
+        interpolant = Interpolant(
+            ids,
+            weights,
+            self._geometry2d.n_elements,
+            xy=xy,
+            method=method,
+            matrix=matrix,
+        )
+
+        if interpolant.nbytes <= self.max_interpolant_bytes:
+            interpolants[key] = interpolant
+            total = sum(i.nbytes for i in interpolants.values())
+            while total > self.max_interpolant_bytes:
+                _, removed = interpolants.popitem(last=False)
+                total -= removed.nbytes
+        return interpolant
+
+    @staticmethod
+    def clear_interpolants():
+        """Remove all interpolants stored by get_interpolant"""
+        GeometryFM._interpolants.clear()
+
+    def _get_linear_interpolant(self, xy, extrapolate=False):
+        """Linear interpolation of node-centered values in the element containing each point
+
+        Points outside the mesh get the value of the nearest element
+        if extrapolate, otherwise nan.
+        """
+        geometry = self._geometry2d
+        xy = np.atleast_2d(xy)[:, :2]
+        n_points = len(xy)
+
+        elem_ids = self._find_element_2d(xy)
+        inside = np.flatnonzero(elem_ids >= 0)
+        table, n_nodes = geometry._element_table_padded
+        nodes, weights = _barycentric_weights(
+            geometry.node_coordinates, table, n_nodes, elem_ids[inside], xy[inside]
+        )
+        to_nodes = csr_matrix(
+            (weights.ravel(), (np.repeat(inside, 3), nodes.ravel())),
+            shape=(n_points, geometry.n_nodes),
+        )
+        matrix = to_nodes @ self._get_node_centering_matrix()
+
+        outside = np.flatnonzero(elem_ids < 0)
+        if len(outside) > 0:
+            nearest, _ = self._find_n_nearest_2d_elements(xy[outside])
+            value = 1.0 if extrapolate else np.nan
+            matrix = matrix + csr_matrix(
+                (np.full(len(outside), value), (outside, nearest)),
+                shape=matrix.shape,
+            )
+        return matrix.tocsr()
+
+    @property
+    def _content_hash(self):
+        """Hash of the type, node coordinates and element table"""
+        if self._hash is None:
+            table, n_nodes = self._element_table_padded
+            h = hashlib.sha1(type(self).__name__.encode())
+            h.update(f"{self._n_layers} {getattr(self, '_n_sigma', None)}".encode())
+            for arr in (self.node_coordinates, table, n_nodes):
+                arr = np.ascontiguousarray(arr)
+                h.update(f"{arr.dtype} {arr.shape}".encode())
+                h.update(arr.tobytes())
+            self._hash = h.hexdigest()
+        return self._hash
+
     def interp2d(self, data, elem_ids, weights=None, shape=None):
         """interp spatially in data (2d only)
 
@@ -647,8 +851,9 @@ class GeometryFM(_Geometry):
         ----------
         data : ndarray or list(ndarray)
             dfsu data
-        elem_ids : ndarray(int)
+        elem_ids : ndarray(int) or scipy.sparse matrix
             n sized array of 1 or more element ids used for interpolation
+            or interpolation matrix from get_2d_interpolant(..., sparse=True)
         weights : ndarray(float), optional
             weights with same size as elem_ids used for interpolation
         shape: tuple, optional
@@ -669,8 +874,48 @@ class GeometryFM(_Geometry):
         return interp2d(data, elem_ids, weights, shape)
 
     def _create_tree2d(self):
+        if self._from_index_cache("_tree2d"):
+            return
         xy = self._geometry2d.element_coordinates[:, :2]
         self._tree2d = cKDTree(xy)
+        self._to_index_cache()
+
+    def _from_index_cache(self, attr):
+        """Set missing attributes from the index cache (if enabled)
+
+        Returns True if attr is available afterwards
+        """
+        cache = self.index_cache
+        if cache is None or not self._index_cache_enabled:
+            return False
+        if self._index_cache_key is None:
+            self._index_cache_key = cache.key(self)
+            entry = cache.get(self._index_cache_key)
+            for name, value in (entry or {}).items():
+                if getattr(self, name, None) is None:
+                    setattr(self, name, value)
+        return getattr(self, attr) is not None
+
+    def _to_index_cache(self):
+        """Store derived attributes in the index cache (if enabled)
+
+        The entry is written once per geometry, attributes derived later
+        are not added to it
+        """
+        cache = self.index_cache
+        if cache is None or not self._index_cache_enabled:
+            return
+        if self._index_cache_stored:
+            return
+        if self._index_cache_key is None:
+            self._index_cache_key = cache.key(self)
+        entry = {}
+        for name in self._index_cache_attrs:
+            value = getattr(self, name, None)
+            if value is not None:
+                entry[name] = value
+        cache.put(self._index_cache_key, entry)
+        self._index_cache_stored = True
 
     def _find_n_nearest_2d_elements(self, x, y=None, n=1):
         if n > self._geometry2d.n_elements:
@@ -690,63 +935,82 @@ class GeometryFM(_Geometry):
         d, elem_id = self._tree2d.query(p, k=n)
         return elem_id, d
 
-    def _find_element_2d(self, coords: np.array):
-        xn = np.zeros(4, dtype=np.float64)
-        yn = np.zeros(4, dtype=np.float64)
-        coords = np.atleast_2d(coords)
-        nc = self._geometry2d.node_coordinates
+    def _find_element_2d(self, coords: np.array, n_candidates=(2, 10, 50)):
+        """Find the element containing each point, -1 if outside the mesh
 
-        few_nearest, _ = self._find_n_nearest_2d_elements(coords, n=2)
-        ids = few_nearest[:, 0]  # first guess
-
-        for k in range(len(ids)):
-            # step 1: is nearest element = element containing point?
-            nodes = self._geometry2d.element_table[ids[k]]
-            element_found = self._point_in_polygon(
-                nc[nodes, 0], nc[nodes, 1], coords[k, 0], coords[k, 1]
-            )
+        All points are tested against their nearest elements in one go;
+        only points not found are tested against more candidates. Points
+        still not found are tested against every element with a center
+        within the largest element radius (graded meshes).
+        """
+        coords = np.atleast_2d(coords)
+        xy = coords[:, :2]
+        geom2d = self._geometry2d
+        nc = geom2d.node_coordinates
+        table, n_nodes = geom2d._element_table_padded
+        max_radius = geom2d._max_element_radius
 
-            # step 2: if not, then try second nearest point
-            if not element_found:
-                nodes = self._geometry2d.element_table[few_nearest[k, 1]]
-                element_found = self._point_in_polygon(
-                    nc[nodes, 0], nc[nodes, 1], coords[k, 0], coords[k, 1]
-                )
-                ids[k] = few_nearest[k, 1]
-
-            # step 3: if not, then try with *many* more points
-            if not element_found:
-                # many_nearest, _ = self._find_n_nearest_2d_elements(coords[k:k, :], n=10)
-                many_nearest, _ = self._find_n_nearest_2d_elements(
-                    coords[k, :], n=10
-                )  # JAN fix
-                element_table = self._geometry2d.element_table[many_nearest]
-                lid = self._find_element_containing_point_2d(
-                    element_table,
-                    xn,
-                    yn,
-                    coords[k, 0],
-                    coords[k, 1],
+        ids = np.full(len(xy), -1, dtype=int)
+        in_bbox = np.all(
+            (xy >= nc[:, :2].min(axis=0)) & (xy <= nc[:, :2].max(axis=0)), axis=1
+        )
+        unresolved = np.flatnonzero(in_bbox)
+        for n in n_candidates:
+            n = min(n, geom2d.n_elements)
+            chunk_size = max(1, 2**18 // n)  # limit memory use
+            not_found = []
+            for start in range(0, len(unresolved), chunk_size):
+                points = unresolved[start : start + chunk_size]
+                candidates, dist = self._find_n_nearest_2d_elements(xy[points], n=n)
+                candidates = candidates.reshape(len(points), n)
+                dist = dist.reshape(len(points), n)
+
+                is_inside = _points_in_elements(
+                    nc, table, n_nodes, candidates, xy[points]
                 )
-                ids[k] = many_nearest[lid] if lid > 0 else -1
+                found = is_inside.any(axis=1)
+                first = is_inside[found].argmax(axis=1)
+                ids[points[found]] = candidates[found, first]
+
+                # no other element can contain a point further away than the
+                # largest element radius from the farthest candidate
+                not_found.append(points[~found & (dist[:, -1] <= max_radius)])
+
+            unresolved = np.concatenate(not_found) if not_found else unresolved[:0]
+            if len(unresolved) == 0 or n == geom2d.n_elements:
+                return ids
+
+        # no element beyond max_radius can contain the point: test all within
+        for start in range(0, len(unresolved), 2**10):
+            points = unresolved[start : start + 2**10]
+            neighbours = self._tree2d.query_ball_point(xy[points], r=max_radius)
+            counts = np.array([len(c) for c in neighbours], dtype=int)
+            candidates = np.concatenate([np.asarray(c, dtype=int) for c in neighbours])
+            point_ids = np.repeat(points, counts)
+
+            is_inside = np.zeros(len(candidates), dtype=bool)
+            for i in range(0, len(candidates), 2**18):  # limit memory use
+                pairs = slice(i, i + 2**18)
+                is_inside[pairs] = _points_in_elements(
+                    nc, table, n_nodes, candidates[pairs, None], xy[point_ids[pairs]]
+                )[:, 0]
+            # any containing candidate (more than one only on shared edges)
+            ids[point_ids[is_inside]] = candidates[is_inside]
 
         return ids
 
-    def _find_element_containing_point_2d(
-        self,
-        element_table,
-        xn: np.array,
-        yn: np.array,
-        xp: float,
-        yp: float,
-    ):
-        for j, el in enumerate(element_table):
-            n_nodes = len(el)
-            xn[0:n_nodes] = self.node_coordinates[el, 0]
-            yn[0:n_nodes] = self.node_coordinates[el, 1]
-            if self._point_in_polygon(xn[0:n_nodes], yn[0:n_nodes], xp, yp):
-                return j
-        return -1
+    @property
+    def _max_element_radius(self):
+        """Largest distance from an element center to one of its nodes"""
+        if self._max_elem_radius is None:
+            table, _ = self._element_table_padded
+            xy = (
+                self.node_coordinates[table, :2] - self.element_coordinates[:, None, :2]
+            )
+            dist = np.where(table >= 0, np.hypot(xy[..., 0], xy[..., 1]), 0.0)
+            # small margin for round off
+            self._max_elem_radius = 1.000001 * np.max(dist, initial=0.0)
+        return self._max_elem_radius
 
     def get_overset_grid(
         self, dx=None, dy=None, nx=None, ny=None, buffer=None
@@ -787,62 +1051,51 @@ class GeometryFM(_Geometry):
         np.array(float)
             areas in m2
         """
-        n_elements = self.n_elements
+        if self._area is None:
+            self._area = self._calc_element_area()
+        return self._area.copy()
+
+    def _calc_element_area(self):
+        table, n_nodes = self._element_table_padded
+
+        # horizontal nodes only: 3d prisms have a triangle, hexahedra a quad at the bottom
+        is_quad = (n_nodes == 4) | (n_nodes == 8)
+        n_nodes_2d = np.where(is_quad, 4, 3)
+        table = table[:, :4]
 
-        # Node coordinates
         xn = self.node_coordinates[:, 0]
         yn = self.node_coordinates[:, 1]
 
-        area = np.empty(n_elements)
-        xcoords = np.empty(8)
-        ycoords = np.empty(8)
-
-        for j in range(n_elements):
-            nodes = self.element_table[j]
-            n_nodes = len(nodes)
-
-            for i in range(n_nodes):
-                nidx = nodes[i]
-                xcoords[i] = xn[nidx]
-                ycoords[i] = yn[nidx]
-
-            # ab : edge vector corner a to b
-            abx = xcoords[1] - xcoords[0]
-            aby = ycoords[1] - ycoords[0]
-
-            # ac : edge vector corner a to c
-            acx = xcoords[2] - xcoords[0]
-            acy = ycoords[2] - ycoords[0]
-
-            isquad = False
-            if n_nodes > 3:
-                isquad = True
-                # ad : edge vector corner a to d
-                adx = xcoords[3] - xcoords[0]
-                ady = ycoords[3] - ycoords[0]
-
-            # if geographical coords, convert all length to meters
-            if self.is_geo:
-                earth_radius = 6366707.0
-                deg_to_rad = np.pi / 180.0
-                earth_radius_deg_to_rad = earth_radius * deg_to_rad
-
-                # Y on element centers
-                Ye = np.sum(ycoords[:n_nodes]) / n_nodes
-                cosYe = np.cos(np.deg2rad(Ye))
-
-                abx = earth_radius_deg_to_rad * abx * cosYe
-                aby = earth_radius_deg_to_rad * aby
-                acx = earth_radius_deg_to_rad * acx * cosYe
-                acy = earth_radius_deg_to_rad * acy
-                if isquad:
-                    adx = earth_radius_deg_to_rad * adx * cosYe
-                    ady = earth_radius_deg_to_rad * ady
-
-            # calculate area in m2
-            area[j] = 0.5 * (abx * acy - aby * acx)
-            if isquad:
-                area[j] = area[j] + 0.5 * (acx * ady - acy * adx)
+        # edge vectors from corner a to b, c and d (d only for quads)
+        a = table[:, 0]
+        abx, aby = xn[table[:, 1]] - xn[a], yn[table[:, 1]] - yn[a]
+        acx, acy = xn[table[:, 2]] - xn[a], yn[table[:, 2]] - yn[a]
+        if table.shape[1] > 3:
+            d = np.where(is_quad, table[:, -1], a)
+            adx, ady = xn[d] - xn[a], yn[d] - yn[a]
+        else:
+            adx, ady = np.zeros_like(abx), np.zeros_like(aby)
+
+        # if geographical coords, convert all length to meters
+        if self.is_geo:
+            earth_radius = 6366707.0
+            deg_to_rad = np.pi / 180.0
+            earth_radius_deg_to_rad = earth_radius * deg_to_rad
+
+            # Y on element centers
+            is_node = np.arange(table.shape[1]) < n_nodes_2d[:, None]
+            Ye = _sum_node_values(yn, table, is_node) / n_nodes_2d
+            cosYe = np.cos(np.deg2rad(Ye))
+
+            abx = earth_radius_deg_to_rad * abx * cosYe
+            aby = earth_radius_deg_to_rad * aby
+            acx = earth_radius_deg_to_rad * acx * cosYe
+            acy = earth_radius_deg_to_rad * acy
+            adx = earth_radius_deg_to_rad * adx * cosYe
+            ady = earth_radius_deg_to_rad * ady
+
+        # calculate area in m2
+        area = 0.5 * (abx * acy - aby * acx) + 0.5 * (acx * ady - acy * adx)
 
         return np.abs(area)
 
@@ -854,8 +1107,11 @@ class GeometryFM(_Geometry):
     @property
     def boundary_polylines(self):
         """Lists of closed polylines defining domain outline"""
-        if self._boundary_polylines is None:
+        if self._boundary_polylines is None and not self._from_index_cache(
+            "_boundary_polylines"
+        ):
             self._boundary_polylines = self._get_boundary_polylines()
+            self._to_index_cache()
         return self._boundary_polylines
 
     def contains(self, points) -> Sequence[bool]:
@@ -871,49 +1127,36 @@ class GeometryFM(_Geometry):
         bool array
             True for points inside, False otherwise
         """
-        import matplotlib.path as mp
-
         points = np.atleast_2d(points)
-
-        exterior = self.boundary_polylines.exteriors[0]
-        cnts = mp.Path(exterior.xy).contains_points(points)
-
-        if self.boundary_polylines.n_exteriors > 1:
-            # in case of several dis-joint outer domains
-            for exterior in self.boundary_polylines.exteriors[1:]:
-                in_domain = mp.Path(exterior.xy).contains_points(points)
-                cnts = np.logical_or(cnts, in_domain)
-
-        # subtract any holes
-        for interior in self.boundary_polylines.interiors:
-            in_hole = mp.Path(interior.xy).contains_points(points)
-            cnts = np.logical_and(cnts, ~in_hole)
-
-        return cnts
+        return self._find_element_2d(points[:, :2]) >= 0
 
     def _get_boundary_polylines_uncategorized(self):
         """Construct closed polylines for all boundary faces"""
         boundary_faces = self._get_boundary_faces()
-        face_remains = boundary_faces.copy()
+        start = boundary_faces[:, 0].tolist()
+        end = boundary_faces[:, 1].tolist()
+
+        # boundary faces leaving each node (in order) for chaining in linear time
+        faces_from = {}
+        for face, node in enumerate(start):
+            faces_from.setdefault(node, []).append(face)
+
+        is_used = [False] * len(start)
         polylines = []
-        while face_remains.shape[0] > 1:
-            n0 = face_remains[:, 0]
-            n1 = face_remains[:, 1]
-            polyline = [n0[0], n1[0]]
-            index_to_delete = [0]
-            count = 0
-            end_points = face_remains[0, 1]
-            while True:
-                next_point_index = np.where(n0 == end_points)
-                if next_point_index[0].size != 0:
-                    polyline.append(face_remains[next_point_index[0][0], 1])
-                    index_to_delete.append(next_point_index[0][0])
-                    end_points = polyline[-1]
-                count += 1
-                if count > face_remains.shape[0] or polyline[0] == end_points:
-                    break
-
-            face_remains = np.delete(face_remains, index_to_delete, axis=0)
+        for face in range(len(start)):
+            if is_used[face]:
+                continue
+            is_used[face] = True
+            polyline = [start[face], end[face]]
+            while polyline[-1] != polyline[0]:
+                candidates = faces_from.get(polyline[-1], [])
+                while candidates and is_used[candidates[0]]:
+                    candidates.pop(0)
+                if not candidates:
+                    break  # open polyline, should not happen for a valid mesh
+                face = candidates.pop(0)
+                is_used[face] = True
+                polyline.append(end[face])
             polylines.append(polyline)
         return polylines
 
@@ -925,7 +1168,6 @@ class GeometryFM(_Geometry):
 
         poly_lines_int = []
         poly_lines_ext = []
-        Polyline = namedtuple("Polyline", ["n_nodes", "nodes", "xy", "area"])
 
         for polyline in polylines:
             xy = self._geometry2d.node_coordinates[polyline, :2]
@@ -941,29 +1183,26 @@ class GeometryFM(_Geometry):
             else:
                 poly_lines_int.append(poly)
 
-        BoundaryPolylines = namedtuple(
-            "BoundaryPolylines",
-            ["n_exteriors", "exteriors", "n_interiors", "interiors"],
-        )
         n_ext = len(poly_lines_ext)
         n_int = len(poly_lines_int)
         return BoundaryPolylines(n_ext, poly_lines_ext, n_int, poly_lines_int)
 
     def _get_boundary_faces(self):
         """Construct list of faces"""
-        element_table = self._geometry2d.element_table
-
-        all_faces = []
-        for el in element_table:
-            ele = [*el, el[0]]
-            for j in range(len(el)):
-                all_faces.append(ele[j : j + 2])
-
-        all_faces = np.asarray(all_faces)
-
-        all_faces_sorted = np.sort(all_faces, axis=1)
+        table, n_nodes = self._geometry2d._element_table_padded
+
+        # face j goes from node j to node j+1 (the last back to the first node)
+        col = np.arange(table.shape[1])
+        next_col = np.where(col + 1 < n_nodes[:, None], col + 1, 0)
+        next_node = np.take_along_axis(table, next_col, axis=1)
+        is_face = col < n_nodes[:, None]
+        all_faces = np.column_stack([table[is_face], next_node[is_face]])
+
+        # a face is identified by its two nodes, regardless of direction
+        n_mesh_nodes = np.int64(self._geometry2d.n_nodes)
+        face_keys = all_faces.min(axis=1) * n_mesh_nodes + all_faces.max(axis=1)
         _, uf_id, face_counts = np.unique(
-            all_faces_sorted, axis=0, return_index=True, return_counts=True
+            face_keys, return_index=True, return_counts=True
         )
 
         # boundary faces are those appearing only once
@@ -1062,40 +1301,57 @@ class GeometryFM(_Geometry):
         else:
             raise ValueError("Provide either coordinates or area")
 
-    def _find_elem3d_from_elem2d(self, elem2d, z):
-        """Find 3d element ids from 2d element ids and z-values"""
-
-        # TODO: coordinate with _find_3d_from_2d_points()
-
-        elem2d = [elem2d] if np.isscalar(elem2d) else elem2d
-        elem2d = np.asarray(elem2d)
-        z_vec = np.full(elem2d.shape, fill_value=z) if np.isscalar(z) else z
-        elem3d = np.full_like(elem2d, fill_value=-1)
-        for j, e2 in enumerate(elem2d):
-            idx_3d = np.hstack(self.e2_e3_table[e2])
-            elem3d[j] = idx_3d[self._z_idx_in_column(idx_3d, z_vec[j])]
-
-            # z_col = self.element_coordinates[idx_3d, 2]
-            # elem3d[j] = (np.abs(z_col - z_vec[j])).argmin()  # nearest
-        return elem3d
-
-    def _z_idx_in_column(self, e3_col, z):
-        dz = self._dz[e3_col]
-        z_col = self.element_coordinates[e3_col, 2]
-        z_face = np.append(z_col - dz / 2, z_col[-1] + dz[-1] / 2)
-        if z < z_face[0] or z > z_face[-1]:
-            xy = tuple(self.element_coordinates[e3_col[0], :2])
+    def _find_elem3d_from_elem2d(self, elem2d, z, zn=None):
+        """Find 3d element ids from 2d element ids and z-values
+
+        The 3d element containing z in the column of each 2d element;
+        with dynamic zn (n_timesteps, n_nodes) the element ids get a
+        leading time dimension.
+        """
+        elem2d = np.atleast_1d(elem2d)
+        z = np.broadcast_to(np.asarray(z, dtype=float), elem2d.shape)
+        elem3d, start, zc, dz = self._columns_z(elem2d.ravel(), zn)
+        n = self.n_layers_per_column[elem2d.ravel()]
+        z = np.repeat(z.ravel(), n)
+
+        # number of bottom faces below z within each (increasing) column
+        z_bot = zc - dz / 2
+        idx = np.add.reduceat(z_bot < z, start, axis=-1) - 1
+        top = start + n - 1
+        z_top = zc[..., top] + dz[..., top] / 2
+        outside = (z[start] < z_bot[..., start]) | (z[start] > z_top)
+        if np.any(outside):
+            *t, j = np.argwhere(outside)[0]
+            xy = tuple(self.element_coordinates[elem3d[start[j]], :2])
+            z_face = (z_bot[(*t, start[j])], z_top[(*t, j)])
             raise ValueError(
-                f"z value '{z}' is outside water column [{z_face[0]},{z_face[-1]}] in point x,y={xy}"
+                f"z value '{z[start[j]]}' is outside water column [{z_face[0]},{z_face[1]}] in point x,y={xy}"
             )
-        idx = np.searchsorted(z_face, z) - 1
-        return idx
+        elem3d = elem3d[start + np.maximum(idx, 0)]
+        return elem3d.reshape(idx.shape[:-1] + elem2d.shape)
+
+    def _columns_z(self, elem2d, zn=None):
+        """3d elements of the columns of 2d elements (concatenated), start of
+        each column and z of the center and height of the 3d elements"""
+        elem3d = self._column_elements(elem2d)
+        n = self.n_layers_per_column[elem2d]
+        start = np.cumsum(n) - n
+        if zn is None:
+            zc = self.element_coordinates[elem3d, 2]
+            dz = self._dz[elem3d]
+        else:
+            # sorted unique elements: columns may repeat, better locality
+            elements, inverse = np.unique(elem3d, return_inverse=True)
+            z_bot, z_top = self._calc_z_faces(elements, zn)
+            zc = ((z_bot + z_top) / 2)[..., inverse]
+            dz = (z_top - z_bot)[..., inverse]
+        return elem3d, start, zc, dz
 
     def _elements_in_area(self, area):
         """Find element ids of elements inside area"""
         idx = self._2d_elements_in_area(area)
         if self.is_layered and len(idx) > 0:
-            idx = np.hstack(self.e2_e3_table[idx])
+            idx = self._column_elements(idx)
         return idx
 
     def _2d_elements_in_area(self, area):
@@ -1136,13 +1392,9 @@ class GeometryFM(_Geometry):
             xy = self.node_coordinates[nodes[0], :2]
             return GeometryPoint2D(xy[0], xy[1])
 
-        elements = []
-        for j, el_nodes in enumerate(self.element_table):
-            if np.all(np.isin(el_nodes, nodes)):
-                elements.append(j)
+        elements = self._elements_with_all_nodes_in(nodes)
 
         assert len(elements) > 0, "no elements found"
-        elements = np.sort(elements)  # make sure elements are sorted!
 
         node_ids, elem_tbl = self._get_nodes_and_table_for_elements(elements)
         node_coords = self.node_coordinates[node_ids]
@@ -1270,7 +1522,9 @@ class GeometryFM(_Geometry):
                     # TODO fix this
                     geom._type = DfsuFileType.Dfsu3DSigma
 
-                geom._top_elems = geom._findTopLayerElements(geom.element_table)
+                geom._top_elems = geom._findTopLayerElements(
+                    geom._element_table_padded[0]
+                )
 
         return geom
 
@@ -1292,48 +1546,69 @@ class GeometryFM(_Geometry):
         list(list(int))
             element table with a list of nodes for each element
         """
-        elem_tbl = np.empty(len(elements), dtype=np.dtype("O"))
+        table, n_nodes = self._padded_element_table
+        table = table[elements]
+        n_nodes = n_nodes[elements]
         if (node_layers is None) or (node_layers == "all") or self.is_2d:
-            for j, eid in enumerate(elements):
-                elem_tbl[j] = np.asarray(self.element_table[eid])
+            elem_tbl = table
 
         else:
             # 3D => 2D
             if (node_layers != "bottom") and (node_layers != "top"):
                 raise Exception("node_layers must be either all, bottom or top")
-            for j, eid in enumerate(elements):
-                elem_nodes = np.asarray(self.element_table[eid])
-                nn = len(elem_nodes)
-                halfn = int(nn / 2)
-                if node_layers == "bottom":
-                    elem_nodes = elem_nodes[:halfn]
-                if node_layers == "top":
-                    elem_nodes = elem_nodes[halfn:]
-                elem_tbl[j] = elem_nodes
-
-        nodes = np.unique(np.hstack(elem_tbl))
+            half = n_nodes // 2
+            col = np.arange(table.shape[1] // 2)
+            is_node = col < half[:, None]
+            if node_layers == "bottom":
+                elem_tbl = np.where(is_node, table[:, col], -1)
+            if node_layers == "top":
+                top_col = np.where(is_node, half[:, None] + col, 0)
+                top = np.take_along_axis(table, top_col, axis=1)
+                elem_tbl = np.where(is_node, top, -1)
+
+        nodes = np.unique(elem_tbl[elem_tbl >= 0])
         return nodes, elem_tbl
 
+    def _elements_with_all_nodes_in(self, nodes):
+        """Sorted ids of the elements having all their nodes in nodes"""
+        table, _ = self._padded_element_table
+        is_in = np.isin(table, nodes) | (table < 0)
+        return np.flatnonzero(is_in.all(axis=1))
+
     def get_node_centered_data(self, data, extrapolate=True):
         """convert cell-centered data to node-centered by pseudo-laplacian method
 
         Parameters
         ----------
         data : np.array(float)
-            cell-centered data
+            cell-centered data, (n_elements,) or (n_timesteps, n_elements)
         extrapolate : bool, optional
             allow the method to extrapolate, default:True
 
         Returns
         -------
         np.array(float)
-            node-centered data
+            node-centered data, (n_nodes,) or (n_timesteps, n_nodes)
         """
+        matrix = self._get_node_centering_matrix(extrapolate)
+        data = np.asarray(data)
+        if data.ndim == 1:
+            return matrix @ data
+        return np.ascontiguousarray((matrix @ data.T).T)
+
+    def _get_node_centering_matrix(self, extrapolate=True):
+        """Pseudo-laplacian weights (n_nodes x n_elements) of the 2d geometry, cached"""
         geometry = self._geometry2d
-        nc = geometry.node_coordinates
-        ec = geometry.element_coordinates
-        elem_table = geometry.element_table
-        return _get_node_centered_data(nc, elem_table, ec, data, extrapolate)
+        if geometry._node_centering is None:
+            geometry._node_centering = {}
+        if extrapolate not in geometry._node_centering:
+            geometry._node_centering[extrapolate] = _get_node_centering_matrix(
+                geometry.node_coordinates,
+                geometry.element_table,
+                geometry.element_coordinates,
+                extrapolate,
+            )
+        return geometry._node_centering[extrapolate]
 
     @property
     def _geometry2d(self):
@@ -1354,15 +1629,8 @@ class GeometryFM(_Geometry):
         """
         from shapely.geometry import Polygon, MultiPolygon
 
-        polygons = []
-        for j in range(self.n_elements):
-            nodes = self.element_table[j]
-            pcoords = np.empty([len(nodes), 2])
-            for i in range(len(nodes)):
-                nidx = nodes[i]
-                pcoords[i, :] = self.node_coordinates[nidx, 0:2]
-            polygon = Polygon(pcoords)
-            polygons.append(polygon)
+        xy = self.node_coordinates[:, 0:2]
+        polygons = [Polygon(xy[nodes]) for nodes in self.element_table]
         mp = MultiPolygon(polygons)
 
         return mp
@@ -1383,8 +1651,7 @@ class GeometryFM(_Geometry):
         builder.SetNodes(nc[:, 0], nc[:, 1], nc[:, 2], geom2d.codes)
         # builder.SetNodeIds(geom2d.node_ids+1)
         # builder.SetElementIds(geom2d.elements+1)
-        element_table_MZ = [np.asarray(row) + 1 for row in geom2d.element_table]
-        builder.SetElements(element_table_MZ)
+        builder.SetElements(geom2d._get_element_table_for_mikecore())
         builder.SetProjection(geom2d.projection_string)
         quantity = eumQuantity.Create(EUMType.Bathymetry, EUMUnit.meter)
         builder.SetEumQuantity(quantity)
@@ -1397,6 +1664,8 @@ class GeometryFM(_Geometry):
 
 
 class _GeometryFMLayered(GeometryFM):
+    _index_cache_attrs = GeometryFM._index_cache_attrs + ("_top_elems",)
+
     def __init__(
         self,
         node_coordinates=None,
@@ -1438,10 +1707,7 @@ class _GeometryFMLayered(GeometryFM):
         if self.n_layers is None:
             raise InvalidGeometry("Object has no layers: cannot return layer_ids")
         if self._layer_ids is None:
-            res = self._get_2d_to_3d_association()
-            self._e2_e3_table = res[0]
-            self._2d_ids = res[1]
-            self._layer_ids = res[2]
+            self._set_2d_to_3d_association()
         return self._layer_ids
 
     @property
@@ -1467,11 +1733,11 @@ class _GeometryFMLayered(GeometryFM):
         if self.n_layers is None:
             print("Object has no layers: cannot find top_elements")
             return None
-        elif self._top_elems is None:
+        elif self._top_elems is None and not self._from_index_cache("_top_elems"):
             # note: if subset of elements is selected then this cannot be done!
 
             # TODO: check 0-based, 1-based...
-            self._top_elems = self._findTopLayerElements(self.element_table)
+            self._top_elems = self._findTopLayerElements(self._element_table_padded[0])
         return self._top_elems
 
     def find_index(self, x=None, y=None, z=None, coords=None, area=None, layers=None):
@@ -1500,7 +1766,7 @@ class _GeometryFMLayered(GeometryFM):
             idx_2d = self._find_element_2d(coords=xy)
 
             if z is None:
-                idx_3d = np.hstack(self.e2_e3_table[idx_2d])
+                idx_3d = self._column_elements(idx_2d)
             else:
                 idx_3d = self._find_elem3d_from_elem2d(idx_2d, z)
             idx = np.intersect1d(idx, idx_3d).astype(int)
@@ -1530,52 +1796,43 @@ class _GeometryFMLayered(GeometryFM):
         :returns: A list of element indices of top layer elements
         """
 
-        topLayerElments = []
+        table, n_nodes = _to_padded_element_table(elementTable)
 
         # Find top layer elements by matching the number numers of the last half of elmt i
         # with the first half of element i+1.
         # Elements always start from the bottom, and the element of one columne are following
         # each other in the element table.
-        for i in range(len(elementTable) - 1):
-            elmt1 = elementTable[i]
-            elmt2 = elementTable[i + 1]
-
-            if len(elmt1) != len(elmt2):
-                # elements with different number of nodes can not be on top of each other,
-                # so elmt2 must be another column, and elmt1 must be a top element
-                topLayerElments.append(i)
-                continue
+        elmt1, elmt2 = table[:-1], table[1:]
+        n1 = n_nodes[:-1]
+
+        # elements with different number of nodes can not be on top of each other,
+        # so elmt2 must be another column, and elmt1 must be a top element
+        is_top = n1 != n_nodes[1:]
 
-            if len(elmt1) % 2 != 0:
+        for n in np.unique(n1[~is_top]):
+            if n % 2 != 0:
+                i = np.flatnonzero((n1 == n) & ~is_top)[0]
                 raise Exception(
-                    "In a layered mesh, each element must have an even number of elements (element index "
-                    + i
-                    + ")"
+                    f"In a layered mesh, each element must have an even number of elements (element index {i})"
                 )
+            rows = np.flatnonzero((n1 == n) & ~is_top)
 
             # Number of nodes in a 2D element
-            elmt2DSize = len(elmt1) // 2
-
-            for j in range(elmt2DSize):
-                if elmt2DSize > 2:
-                    if elmt1[j + elmt2DSize] != elmt2[j]:
-                        # At least one node number did not match
-                        # so elmt2 must be another column, and elmt1 must be a top element
-                        topLayerElments.append(i)
-                        break
-                else:
-                    # for 2D vertical profiles the nodes in the element on the
-                    # top is in reverse order of those in the bottom.
-                    if elmt1[j + elmt2DSize] != elmt2[(elmt2DSize - 1) - j]:
-                        # At least one node number did not match
-                        # so elmt2 must be another column, and elmt1 must be a top element
-                        topLayerElments.append(i)
-                        break
+            elmt2DSize = n // 2
+            upper = elmt1[rows, elmt2DSize:n]
+            lower = elmt2[rows, :elmt2DSize]
+            if elmt2DSize <= 2:
+                # for 2D vertical profiles the nodes in the element on the
+                # top is in reverse order of those in the bottom.
+                lower = lower[:, ::-1]
+
+            # At least one node number did not match
+            is_top[rows] = np.any(upper != lower, axis=1)
 
         # The last element will always be a top layer element
-        topLayerElments.append(len(elementTable) - 1)
+        topLayerElments = np.append(np.flatnonzero(is_top), len(table) - 1)
 
-        return np.array(topLayerElments, dtype=np.int32)
+        return topLayerElments.astype(np.int32)
 
     @property
     def n_layers_per_column(self):
@@ -1584,12 +1841,7 @@ class _GeometryFMLayered(GeometryFM):
             print("Object has no layers: cannot find n_layers_per_column")
             return None
         elif self._n_layers_column is None:
-            top_elems = self.top_elements
-            n = len(top_elems)
-            tmp = top_elems.copy()
-            tmp[0] = -1
-            tmp[1:n] = top_elems[0 : (n - 1)]
-            self._n_layers_column = top_elems - tmp
+            self._n_layers_column = np.diff(self.top_elements, prepend=-1)
         return self._n_layers_column
 
     @property
@@ -1661,10 +1913,12 @@ class _GeometryFMLayered(GeometryFM):
             print("Object has no layers: cannot return e2_e3_table")
             return None
         if self._e2_e3_table is None:
-            res = self._get_2d_to_3d_association()
-            self._e2_e3_table = res[0]
-            self._2d_ids = res[1]
-            self._layer_ids = res[2]
+            # object array view of the columns, bottom_elements and
+            # n_layers_per_column are used internally instead
+            columns = np.split(np.arange(self.n_elements), self.top_elements[:-1] + 1)
+            self._e2_e3_table = np.empty(len(columns), dtype=object)
+            for j, col in enumerate(columns):
+                self._e2_e3_table[j] = col
         return self._e2_e3_table
 
     @property
@@ -1675,74 +1929,148 @@ class _GeometryFMLayered(GeometryFM):
             # or return self._2d_ids ??
 
         if self._2d_ids is None:
-            res = self._get_2d_to_3d_association()
-            self._e2_e3_table = res[0]
-            self._2d_ids = res[1]
-            self._layer_ids = res[2]
+            self._set_2d_to_3d_association()
         return self._2d_ids
 
+    def _set_2d_to_3d_association(self):
+        self._2d_ids, self._layer_ids = self._get_2d_to_3d_association()
+
     def _get_2d_to_3d_association(self):
-        e2_to_e3 = (
-            []
-        )  # for each 2d element: the corresponding 3d element ids from bot to top
-        index2d = []  # for each 3d element: the associated 2d element id
-        layerid = []  # for each 3d element: the associated layer number
-        n2d = len(self.top_elements)
-        topid = self.top_elements
-        botid = self.bottom_elements
-        # layer_ids = 0, 1, 2...
-        global_layer_ids = np.arange(self.n_layers)
-        for j in range(n2d):
-            col = np.arange(botid[j], topid[j] + 1)
-
-            e2_to_e3.append(col)
-            for _ in col:
-                index2d.append(j)
-
-            n_local_layers = len(col)
-            local_layers = global_layer_ids[-n_local_layers:]
-            for ll in local_layers:
-                layerid.append(ll)
-
-        e2_to_e3 = np.array(e2_to_e3, dtype=object)
-        index2d = np.array(index2d)
-        layerid = np.array(layerid)
-        return e2_to_e3, index2d, layerid
-
-    def _find_3d_from_2d_points(self, elem2d, z=None, layer=None):
+        """2d element id and layer number (0=bottom) of each 3d element
+
+        The elements of a column are consecutive from bottom to top, so the
+        columns are given by their first element (bottom_elements) and
+        length (n_layers_per_column); the top element of each column is
+        in the top layer.
+        """
+        n_layers_column = self.n_layers_per_column
+        index2d = np.repeat(np.arange(len(n_layers_column)), n_layers_column)
+        n_above = self.top_elements[index2d] - np.arange(len(index2d))
+        layerid = self.n_layers - 1 - n_above
+        return index2d, layerid
+
+    def _column_elements(self, elem2d):
+        """3d element ids of the columns of 2d elements (bottom to top)"""
+        elem2d = np.atleast_1d(elem2d)
+        start = self.bottom_elements[elem2d]
+        n = self.n_layers_per_column[elem2d]
+        offset = np.repeat(start - (np.cumsum(n) - n), n)
+        return offset + np.arange(n.sum())
+
+    @property
+    def layer_mask(self):
+        """Mask (n_2d_elements, n_layers) of the layers present in each column
+
+        Columns with fewer than n_layers layers (z-layers) lack the bottom layers
+        """
+        layers = np.arange(self.n_layers)
+        return layers >= (self.n_layers - self.n_layers_per_column)[:, None]
+
+    def _depth_average(self, values, zn=None, dz=None):
+        """Layer thickness weighted average over each column
+
+        Parameters
+        ----------
+        values : np.array(float)
+            element values (..., n_elements), NaN values are skipped
+        zn : np.array(float), optional
+            dynamic z of the nodes (n_nodes,) or (n_timesteps, n_nodes)
+            matching values, by default the static node coordinates
+        dz : np.array(float), optional
+            layer thickness of the elements if already calculated from zn
+
+        Returns
+        -------
+        np.array(float)
+            (..., n_columns), NaN where all values of a column are NaN
+        """
+        total, thickness = self._depth_sums(values, zn=zn, dz=dz)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (total / thickness).astype(values.dtype, copy=False)
+
+    def _depth_integral(self, values, zn=None, dz=None):
+        """Sum of value times layer thickness over each column
+
+        Parameters
+        ----------
+        values : np.array(float)
+            element values (..., n_elements), NaN values are skipped
+        zn : np.array(float), optional
+            dynamic z of the nodes (n_nodes,) or (n_timesteps, n_nodes)
+            matching values, by default the static node coordinates
+        dz : np.array(float), optional
+            layer thickness of the elements if already calculated from zn
+
+        Returns
+        -------
+        np.array(float)
+            (..., n_columns), NaN where all values of a column are NaN
+        """
+        total, thickness = self._depth_sums(values, zn=zn, dz=dz)
+        total[thickness == 0] = np.nan
+        return total.astype(values.dtype, copy=False)
+
+    def _depth_sums(self, values, zn=None, dz=None):
+        """Column sums of value times thickness and of the thickness of
+        the layers with a value"""
+        if dz is None:
+            dz = self._dz if zn is None else self._calc_dz(zn=zn)
+        is_value = ~np.isnan(values)
+        dz = np.where(is_value, dz, 0.0)
+        total = np.add.reduceat(
+            np.where(is_value, values, 0.0) * dz, self.bottom_elements, axis=-1
+        )
+        thickness = np.add.reduceat(dz, self.bottom_elements, axis=-1)
+        return total, thickness
+
+    def _column_positions(self, elements=None):
+        """2d elements of the columns of 3d elements and (column, layer)
+        position of each 3d element in a (n_columns, n_layers) array"""
+        if elements is None:
+            columns = np.arange(len(self.top_elements))
+            return columns, self.elem2d_ids, self.layer_ids
+        columns, col_pos = np.unique(self.elem2d_ids[elements], return_inverse=True)
+        return columns, col_pos, self.layer_ids[elements]
+
+    def _find_3d_from_2d_points(self, elem2d, z=None, layer=None, zn=None):
 
         was_scalar = np.isscalar(elem2d)
-        if was_scalar:
-            elem2d = np.array([elem2d])
-        else:
-            orig_shape = elem2d.shape
-            elem2d = np.reshape(elem2d, (elem2d.size,))
+        elem2d = np.atleast_1d(elem2d)
+        orig_shape = elem2d.shape
+        elem2d = np.reshape(elem2d, (elem2d.size,))
 
         if (layer is None) and (z is None):
             # return top element
             idx = self.top_elements[elem2d]  # TODO: return whole column instead
 
         elif layer is None:
-            idx = np.zeros_like(elem2d)
-            if np.isscalar(z):
-                z = z * np.ones_like(elem2d, dtype=float)
-            elem3d = self.e2_e3_table[elem2d]
-            for j, row in enumerate(elem3d):
-                zc = self.element_coordinates[row, 2]
-                d3d = np.abs(z[j] - zc)
-                idx[j] = row[d3d.argsort()[0]]
+            # element with the nearest center in the column
+            z = np.asarray(z, dtype=float)
+            if z.ndim == 1 and len(orig_shape) == 2:
+                z = z[:, None]  # n_nearest columns for each point
+            z = np.broadcast_to(z, orig_shape).ravel()
+            elem3d, start, zc, _ = self._columns_z(elem2d, zn)
+            n = self.n_layers_per_column[elem2d]
+            z = np.repeat(z, n)
+            k = np.add.reduceat(zc < z, start, axis=-1)
+            lower = start + np.maximum(k - 1, 0)
+            upper = start + np.minimum(k, n - 1)
+            zc_lower = np.take_along_axis(zc, np.broadcast_to(lower, k.shape), -1)
+            zc_upper = np.take_along_axis(zc, np.broadcast_to(upper, k.shape), -1)
+            is_lower = np.abs(z[start] - zc_lower) <= np.abs(z[start] - zc_upper)
+            idx = elem3d[np.where(is_lower, lower, upper)]
+            orig_shape = idx.shape[:-1] + orig_shape
 
         elif z is None:
             if 0 <= layer <= self.n_z_layers - 1:
-                idx = np.zeros_like(elem2d)
-                elem3d = self.e2_e3_table[elem2d]
-                for j, row in enumerate(elem3d):
-                    try:
-                        layer_ids = self.layer_ids[row]
-                        id = row[list(layer_ids).index(layer)]
-                        idx[j] = id
-                    except:
-                        print(f"Layer {layer} not present for 2d element {elem2d[j]}")
+                # the columns have the top n_layers_per_column layers
+                n = self.n_layers_per_column[elem2d]
+                bottom_layer = self.n_layers - n
+                idx = self.bottom_elements[elem2d] + layer - bottom_layer
+                missing = layer < bottom_layer
+                for e in elem2d[missing]:
+                    print(f"Layer {layer} not present for 2d element {e}")
+                idx[missing] = 0
             else:
                 # sigma layer
                 idx = self.get_layer_elements(layer)[elem2d]
@@ -1751,7 +2079,7 @@ class _GeometryFMLayered(GeometryFM):
             raise ValueError("layer and z cannot both be supplied!")
 
         if was_scalar:
-            idx = idx[0]
+            idx = idx[..., 0]
         else:
             idx = np.reshape(idx, orig_shape)
 
@@ -1789,41 +2117,35 @@ class _GeometryFMLayered(GeometryFM):
 
     def _calc_dz(self, elements=None, zn=None):
         """Height of 3d elements using static or dynamic zn information"""
-        if elements is None:
-            element_table = self.element_table
-        else:
-            element_table = self.element_table[elements]
-        n_elements = len(element_table)
+        zn, table, w_bot, w_top = self._face_weights(elements, zn)
+        return _sum_node_values(zn, table, w_top - w_bot)
 
-        if zn is None:
-            if elements is None:
-                zn = self.node_coordinates[:, 2]
-            else:
-                nodes = np.unique(np.hstack(element_table))
-                zn = self.node_coordinates[nodes, 2]
-
-        zn_is_2d = len(zn.shape) == 2
-        shape = (zn.shape[0], n_elements) if zn_is_2d else (n_elements,)
-        dz = np.full(shape=shape, fill_value=np.nan)
-
-        if zn_is_2d:
-            # dynamic zn
-            for j in range(n_elements):
-                nodes = element_table[j]
-                halfn = int(len(nodes) / 2)
-                z_bot = np.mean(zn[:, nodes[:halfn]], axis=1)
-                z_top = np.mean(zn[:, nodes[halfn:]], axis=1)
-                dz[:, j] = z_top - z_bot
-        else:
-            # static zn
-            for j in range(n_elements):
-                nodes = element_table[j]
-                halfn = int(len(nodes) / 2)
-                z_bot = np.mean(zn[nodes[:halfn]])
-                z_top = np.mean(zn[nodes[halfn:]])
-                dz[j] = z_top - z_bot
+    def _calc_z_faces(self, elements=None, zn=None):
+        """z of the bottom and top face of 3d elements (static or dynamic zn)"""
+        zn, table, w_bot, w_top = self._face_weights(elements, zn)
+        return _sum_node_values(zn, table, w_bot), _sum_node_values(zn, table, w_top)
 
-        return dz
+    def _face_weights(self, elements=None, zn=None):
+        """zn, element table and weights of the bottom and top nodes"""
+        table, n_nodes = self._element_table_padded
+        if elements is not None:
+            table = table[elements]
+            n_nodes = n_nodes[elements]
+
+        if zn is None:
+            zn = self.node_coordinates[:, 2]
+        zn = np.asarray(zn)
+        if zn.shape[-1] != self.n_nodes:
+            # zn only for the nodes of the selected elements
+            nodes = np.unique(table[table >= 0])
+            table = np.searchsorted(nodes, table)
+
+        # the first half of the nodes are bottom nodes, the rest top nodes
+        half = n_nodes // 2
+        col = np.arange(table.shape[1])
+        is_bot = col < half[:, None]
+        is_top = ~is_bot & (col < n_nodes[:, None])
+        return zn, table, is_bot / half[:, None], is_top / (n_nodes - half)[:, None]
 
     # TODO: add methods for extracting layers etc
 
@@ -1874,11 +2196,11 @@ class GeometryFM3D(_GeometryFMLayered):
         # Fix z-coordinate for sigma-z:
         if self._type == DfsuFileType.Dfsu3DSigmaZ:
             zn = geom.node_coordinates[:, 2].copy()
-            for j, elem_nodes in enumerate(geom.element_table):
-                elem_nodes3d = self.element_table[self.bottom_elements[j]]
-                for jn in range(len(elem_nodes)):
-                    znj_3d = self.node_coordinates[elem_nodes3d[jn], 2]
-                    zn[elem_nodes[jn]] = min(zn[elem_nodes[jn]], znj_3d)
+            table2d, _ = geom._element_table_padded
+            table3d = self._element_table_padded[0][self.bottom_elements]
+            is_node = table2d >= 0
+            znj_3d = self.node_coordinates[table3d[:, : table2d.shape[1]][is_node], 2]
+            np.minimum.at(zn, table2d[is_node], znj_3d)
             geom.node_coordinates[:, 2] = zn
 
         return geom
@@ -1990,7 +2312,7 @@ class GeometryFMVerticalProfile(_GeometryFMLayered):
             idx_2d = self._find_nearest_element_2d(coords=xy)
 
             if z is None:
-                idx_3d = np.hstack(self.e2_e3_table[idx_2d])
+                idx_3d = self._column_elements(idx_2d)
             else:
                 idx_3d = self._find_elem3d_from_elem2d(idx_2d, z)
             idx = np.intersect1d(idx, idx_3d)
@@ -2047,7 +2369,7 @@ class GeometryFMVerticalColumn(GeometryFM3D):
 
     @property
     def _idx_f(self):
-        nnodes_half = int(len(self.element_table[0]) / 2)
+        nnodes_half = self.max_nodes_per_element // 2
         n_vfaces = self.n_elements + 1
         idx_f = np.zeros((n_vfaces, nnodes_half), dtype=int)
         idx_e = self._idx_e
@@ -2057,26 +2379,12 @@ class GeometryFMVerticalColumn(GeometryFM3D):
 
     @property
     def _idx_e(self):
-        nnodes_per_elem = len(self.element_table[0])
-        idx_e = np.zeros((self.n_elements, nnodes_per_elem), dtype=int)
-
-        for j in range(self.n_elements):
-            nodes = self.element_table[j]
-            for i in range(nnodes_per_elem):
-                idx_e[j, i] = nodes[i]
-
-        return idx_e
+        # a column has a single element type, so the padded table has no padding
+        return self._element_table_padded[0].astype(int)
 
     def _calc_z_using_idx(self, zn, idx):
-        if zn.ndim == 1:
-            zf = zn[idx].mean(axis=1)
-        elif zn.ndim == 2:
-            n_steps = zn.shape[0]
-            zf = np.zeros((n_steps, idx.shape[0]))
-            for step in range(n_steps):
-                zf[step, :] = zn[step, idx].mean(axis=1)
-
-        return zf
+        # zn[..., idx] is (n_steps, n_faces, n_nodes) for dynamic zn
+        return zn[..., idx].mean(axis=-1)
 
 
 class _GeometryFMSpectrum(GeometryFM):
@@ -2201,13 +2509,9 @@ class GeometryFMLineSpectrum(_GeometryFMSpectrum):
                 y=coords[1],
             )
 
-        elements = []
-        for j, el_nodes in enumerate(self.element_table):
-            if np.all(np.isin(el_nodes, nodes)):
-                elements.append(j)
+        elements = self._elements_with_all_nodes_in(nodes)
 
         assert len(elements) > 0, "no elements found"
-        elements = np.sort(elements)  # make sure elements are sorted!
 
         node_ids, elem_tbl = self._get_nodes_and_table_for_elements(elements)
         node_coords = self.node_coordinates[node_ids]
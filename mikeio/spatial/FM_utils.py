@@ -24,6 +24,7 @@ def _plot_map(
     figsize=None,
     ax=None,
     add_colorbar=True,
+    node_centering=None,
 ):
     """
     Plot unstructured data and/or mesh, mesh outline
@@ -68,6 +69,9 @@ def _plot_map(
         Adding to existing axis, instead of creating new fig
     add_colorbar: bool
         Add colorbar to plot, default True
+    node_centering: callable, optional
+        returns the (cached) node-centering matrix of the geometry,
+        by default computed from the arrays
 
     Returns
     -------
@@ -257,13 +261,13 @@ def _plot_map(
                 n_refinements = 0
                 print("Warning: mesh refinement is not possible if plot_mesh=True")
 
-        elem_table, ec, z = _create_tri_only_element_table(
-            nc, element_table, ec, data=z
-        )
+        if node_centering is None:
+            zn = _get_node_centered_data(nc, element_table, ec, z)
+        else:
+            zn = node_centering() @ z
+        elem_table, _, _ = _create_tri_only_element_table(nc, element_table, ec)
         triang = tri.Triangulation(nc[:, 0], nc[:, 1], elem_table)
 
-        zn = _get_node_centered_data(nc, elem_table, ec, z)
-
         if n_refinements > 0:
             # TODO: refinements doesn't seem to work for 3d files?
             refiner = tri.UniformTriRefiner(triang)
@@ -409,6 +413,84 @@ def _is_tri_only(element_table):
     return max([len(el) for el in element_table]) == 3
 
 
+def _to_padded_element_table(element_table):
+    """Element table as a 2d array padded with -1 and the number of nodes per element
+
+    Parameters
+    ----------
+    element_table : list(np.array(int)) or np.array(int)
+        node ids of each element, either a list of arrays or a
+        2d array (optionally padded with -1)
+
+    Returns
+    -------
+    np.array(int), np.array(int)
+        (n_elements, max_nodes_per_element) table and
+        number of nodes of each element
+    """
+    if isinstance(element_table, np.ndarray) and element_table.dtype != object:
+        table = np.atleast_2d(element_table).astype(np.int32)
+        n_nodes = np.count_nonzero(table >= 0, axis=1).astype(np.int32)
+        return table, n_nodes
+
+    n_elements = len(element_table)
+    n_nodes = np.fromiter(
+        (len(nodes) for nodes in element_table), dtype=np.int32, count=n_elements
+    )
+    max_nodes = int(n_nodes.max()) if n_elements > 0 else 0
+    table = np.full((n_elements, max_nodes), -1, dtype=np.int32)
+    if n_elements > 0:
+        rows = np.repeat(np.arange(n_elements), n_nodes)
+        first = np.cumsum(n_nodes) - n_nodes
+        cols = np.arange(len(rows)) - np.repeat(first, n_nodes)
+        table[rows, cols] = np.concatenate(element_table)
+    return table, n_nodes
+
+
+def _from_padded_element_table(table, n_nodes):
+    """Element table as list of node arrays from a padded table
+
+    Parameters
+    ----------
+    table : np.array(int)
+        padded element table (n_elements, max_nodes_per_element)
+    n_nodes : np.array(int)
+        number of nodes of each element
+
+    Returns
+    -------
+    np.array(object)
+        array with the node ids of each element (views into table)
+    """
+    element_table = np.empty(len(table), dtype=object)
+    for j, n in enumerate(n_nodes.tolist()):
+        element_table[j] = table[j, :n]
+    return element_table
+
+
+def _sum_node_values(values, table, weights):
+    """Weighted sum of node values over the nodes of each element
+
+    Parameters
+    ----------
+    values : np.array(float)
+        node values, (n_nodes,) or (n_steps, n_nodes)
+    table : np.array(int)
+        padded element table (n_elements, max_nodes_per_element)
+    weights : np.array(float)
+        weight of each entry in the table, 0 for padding
+
+    Returns
+    -------
+    np.array(float)
+        (n_elements,) or (n_steps, n_elements)
+    """
+    total = np.zeros(values.shape[:-1] + (len(table),))
+    for j in range(table.shape[1]):
+        total += values[..., np.maximum(table[:, j], 0)] * weights[:, j]
+    return total
+
+
 def _to_polygons(node_coordinates, element_table):
     """generate matplotlib polygons from element table for plotting
 
@@ -419,18 +501,8 @@ def _to_polygons(node_coordinates, element_table):
     """
     from matplotlib.patches import Polygon
 
-    polygons = []
-
-    for j in range(len(element_table)):
-        nodes = element_table[j]
-        pcoords = np.empty([len(nodes), 2])
-        for i in range(len(nodes)):
-            nidx = nodes[i]
-            pcoords[i, :] = node_coordinates[nidx, 0:2]
-
-        polygon = Polygon(pcoords, True)
-        polygons.append(polygon)
-    return polygons
+    xy = node_coordinates[:, 0:2]
+    return [Polygon(xy[nodes], True) for nodes in element_table]
 
 
 def _get_node_centered_data(
@@ -453,80 +525,102 @@ def _get_node_centered_data(
     np.array(float)
         node-centered data
     """
-    nc = node_coordinates
-    elem_table, ec, data = _create_tri_only_element_table(
-        nc, element_table, element_coordinates, data
+    matrix = _get_node_centering_matrix(
+        node_coordinates, element_table, element_coordinates, extrapolate
     )
+    return matrix @ data
 
-    node_cellID = [
-        list(np.argwhere(elem_table == i)[:, 0])
-        for i in np.unique(
-            elem_table.reshape(
-                -1,
-            )
-        )
-    ]
-    node_centered_data = np.zeros(shape=nc.shape[0])
-    for n, item in enumerate(node_cellID):
-        I = ec[item][:, :2] - nc[n][:2]
-        I2 = (I**2).sum(axis=0)
-        Ixy = (I[:, 0] * I[:, 1]).sum(axis=0)
-        lamb = I2[0] * I2[1] - Ixy**2
-        omega = np.zeros(1)
-        if lamb > 1e-10 * (I2[0] * I2[1]):
-            # Standard case - Pseudo
-            lambda_x = (Ixy * I[:, 1] - I2[1] * I[:, 0]) / lamb
-            lambda_y = (Ixy * I[:, 0] - I2[0] * I[:, 1]) / lamb
-            omega = 1.0 + lambda_x * I[:, 0] + lambda_y * I[:, 1]
-            if not extrapolate:
-                omega[np.where(omega > 2)] = 2
-                omega[np.where(omega < 0)] = 0
-        if omega.sum() > 0:
-            node_centered_data[n] = np.sum(omega * data[item]) / np.sum(omega)
-        else:
-            # We did not succeed using pseudo laplace procedure, use inverse distance instead
-            InvDis = [
-                1 / np.hypot(case[0], case[1]) for case in ec[item][:, :2] - nc[n][:2]
-            ]
-            node_centered_data[n] = np.sum(InvDis * data[item]) / np.sum(InvDis)
 
-    return node_centered_data
+def _get_node_centering_matrix(
+    node_coordinates, element_table, element_coordinates, extrapolate=True
+):
+    """pseudo-laplacian weights as sparse matrix (n_nodes x n_elements)
 
+    Node-centered data is the matrix product with cell-centered data.
 
-def _create_tri_only_element_table(
-    node_coordinates, element_table, element_coordinates, data=None
-):
-    """Convert quad/tri mesh to pure tri-mesh"""
+    Parameters
+    ----------
+    node_coordinates,
+    element_table,
+    element_coordinates
+    extrapolate : bool, optional
+        allow the method to extrapolate, default:True
 
-    if _is_tri_only(element_table):
-        # already tri-only? just convert to 2d array
-        return np.stack(element_table), element_coordinates, data
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        weights of the elements around each node
+    """
+    from scipy.sparse import coo_matrix
 
-    ec = element_coordinates.copy()
+    nc = node_coordinates
+    n_nodes = len(nc)
+    n_elements = len(element_table)
+    # element of each tri (quads are split in two)
+    elem_table, ec, elem_ids = _create_tri_only_element_table(
+        nc, element_table, element_coordinates, np.arange(n_elements)
+    )
 
-    if data is None:
-        data = []
+    # one entry per (node, tri) pair, sums over the tris of each node
+    node = elem_table.ravel()
+    tri = np.repeat(np.arange(len(elem_table)), elem_table.shape[1])
+    Ix = ec[tri, 0] - nc[node, 0]
+    Iy = ec[tri, 1] - nc[node, 1]
+    Ixx = np.bincount(node, Ix**2, minlength=n_nodes)[node]
+    Iyy = np.bincount(node, Iy**2, minlength=n_nodes)[node]
+    Ixy = np.bincount(node, Ix * Iy, minlength=n_nodes)[node]
+    lamb = Ixx * Iyy - Ixy**2
+
+    # Standard case - Pseudo
+    is_standard = lamb > 1e-10 * (Ixx * Iyy)
+    lamb = np.where(is_standard, lamb, 1.0)
+    lambda_x = (Ixy * Iy - Iyy * Ix) / lamb
+    lambda_y = (Ixy * Ix - Ixx * Iy) / lamb
+    omega = np.where(is_standard, 1.0 + lambda_x * Ix + lambda_y * Iy, 0.0)
+    if not extrapolate:
+        omega = np.clip(omega, 0, 2)
+
+    # We did not succeed using pseudo laplace procedure, use inverse distance instead
+    is_failed = np.bincount(node, omega, minlength=n_nodes)[node] <= 0
+    omega[is_failed] = 1 / np.hypot(Ix[is_failed], Iy[is_failed])
+
+    omega = omega / np.bincount(node, omega, minlength=n_nodes)[node]
+
+    # duplicates (the two tris of a quad) are summed
+    return coo_matrix(
+        (omega, (node, elem_ids[tri])), shape=(n_nodes, n_elements)
+    ).tocsr()
 
-    elem_table = [list(element_table[i]) for i in range(len(element_table))]
-    tmp_elmnt_nodes = elem_table.copy()
-    for el, item in enumerate(tmp_elmnt_nodes):
-        if len(item) == 4:
-            elem_table.pop(el)  # remove quad element
 
-            # insert two new tri elements in table
-            elem_table.insert(el, item[:3])
-            tri2_nodes = [item[i] for i in [2, 3, 0]]
-            elem_table.append(tri2_nodes)
+def _create_tri_only_element_table(
+    node_coordinates, element_table, element_coordinates, data=None
+):
+    """Convert quad/tri mesh to pure tri-mesh
+
+    Quads are replaced by their 0-1-2 triangle, the 2-3-0 triangles are
+    appended at the end with the data of the quad.
+    """
+    table, n_nodes = _to_padded_element_table(element_table)
+    quads = np.flatnonzero(n_nodes == 4)
+    if len(quads) == 0:
+        # already tri-only
+        return table[:, :3], element_coordinates, data
 
-            # new center coordinates for new tri-elements
-            ec[el] = node_coordinates[item[:3]].mean(axis=1)
-            tri2_ec = node_coordinates[tri2_nodes].mean(axis=1)
-            ec = np.append(ec, tri2_ec.reshape(1, -1), axis=0)
+    nc = node_coordinates
+    tri1 = table[:, :3]
+    tri2 = table[quads][:, [2, 3, 0]]
+    elem_table = np.vstack([tri1, tri2])
 
-            # use same data in two new tri elements
-            data = np.append(data, data[el])
+    # new center coordinates for new tri-elements
+    ec = element_coordinates.copy()
+    ec[quads] = nc[tri1[quads]].mean(axis=1)
+    ec = np.vstack([ec, nc[tri2].mean(axis=1)])
 
-    return np.asarray(elem_table), ec, data
+    if data is not None:
+        # use same data in two new tri elements
+        data = np.concatenate([data, np.take(data, quads, axis=-1)], axis=-1)
+
+    return elem_table, ec, data
 
 
 def _cbar_extend(calc_data, vmin, vmax):
@@ -545,15 +639,93 @@ def _cbar_extend(calc_data, vmin, vmax):
     return extend
 
 
-def _point_in_polygon(xn: np.array, yn: np.array, xp: float, yp: float) -> bool:
-    """Check for each side in the polygon that the point is on the correct side"""
+def _points_in_elements(node_coordinates, table, n_nodes, elements, xy):
+    """Check for each side of candidate elements that the point is on the correct side
+
+    Parameters
+    ----------
+    node_coordinates : np.array(float)
+        node coordinates (n_nodes, 2 or 3)
+    table : np.array(int)
+        padded element table (n_elements, max_nodes_per_element)
+    n_nodes : np.array(int)
+        number of nodes of each element
+    elements : np.array(int)
+        candidate elements for each point (n_points, n_candidates)
+    xy : np.array(float)
+        points (n_points, 2)
+
+    Returns
+    -------
+    np.array(bool)
+        (n_points, n_candidates) True if point is inside candidate element
+    """
+    nodes = table[elements]
+    nn = n_nodes[elements][..., None]
+    col = np.arange(table.shape[1])
+    next_nodes = np.take_along_axis(nodes, np.where(col + 1 < nn, col + 1, 0), axis=-1)
+
+    x0 = node_coordinates[nodes, 0]
+    y0 = node_coordinates[nodes, 1]
+    x1 = node_coordinates[next_nodes, 0]
+    y1 = node_coordinates[next_nodes, 1]
+    xp = xy[:, 0, None, None]
+    yp = xy[:, 1, None, None]
+
+    is_outside = (y1 - y0) * (xp - x0) + (x0 - x1) * (yp - y0) > 0
+    return ~np.any(is_outside & (col < nn), axis=-1)
+
+
+def _barycentric_weights(node_coordinates, table, n_nodes, elements, xy):
+    """Linear interpolation weights of the nodes of the element containing each point
+
+    Quadrangles are split in two triangles along the 0-2 diagonal and
+    the triangle containing the point is used.
+
+    Parameters
+    ----------
+    node_coordinates : np.array(float)
+        node coordinates (n_nodes, 2 or 3)
+    table : np.array(int)
+        padded element table (n_elements, max_nodes_per_element)
+    n_nodes : np.array(int)
+        number of nodes of each element
+    elements : np.array(int)
+        element containing each point (n_points,)
+    xy : np.array(float)
+        points (n_points, 2)
+
+    Returns
+    -------
+    (np.array(int), np.array(float))
+        node ids and weights (n_points, 3)
+    """
 
-    for j in range(len(xn) - 1):
-        if (yn[j + 1] - yn[j]) * (xp - xn[j]) + (-xn[j + 1] + xn[j]) * (yp - yn[j]) > 0:
-            return False
-    if (yn[0] - yn[-1]) * (xp - xn[-1]) + (-xn[0] + xn[-1]) * (yp - yn[-1]) > 0:
-        return False
-    return True
+    def _tri_weights(nodes, xy):
+        x, y = node_coordinates[nodes, 0], node_coordinates[nodes, 1]
+        dx, dy = xy[:, 0] - x[:, 2], xy[:, 1] - y[:, 2]
+        y12, x21 = y[:, 1] - y[:, 2], x[:, 2] - x[:, 1]
+        y20, x02 = y[:, 2] - y[:, 0], x[:, 0] - x[:, 2]
+        det = y12 * x02 - x21 * y20
+        w0 = (y12 * dx + x21 * dy) / det
+        w1 = (y20 * dx + x02 * dy) / det
+        return np.column_stack([w0, w1, 1.0 - w0 - w1])
+
+    elem_nodes = table[elements]
+    nodes = elem_nodes[:, :3].copy()
+    weights = _tri_weights(nodes, xy)
+
+    is_quad = n_nodes[elements] == 4
+    if np.any(is_quad):
+        # use the other triangle if the point is (more) inside that one
+        nodes2 = elem_nodes[is_quad][:, [0, 2, 3]]
+        weights2 = _tri_weights(nodes2, xy[is_quad])
+        use2 = weights2.min(axis=1) > weights[is_quad].min(axis=1)
+        idx = np.flatnonzero(is_quad)[use2]
+        nodes[idx] = nodes2[use2]
+        weights[idx] = weights2[use2]
+
+    return nodes, weights
 
 
 def _plot_vertical_profile(
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from mikecore.DfsuFile import DfsuFileType
+
+import mikeio
+from mikeio.spatial.FM_geometry import GeometryFM, GeometryFM3D
+
+
+def _create_large_triangle_mesh(n=500):
+    """Triangulated n x n node grid with 2*(n-1)**2 elements"""
+    x, y = np.meshgrid(np.arange(n, dtype=float), np.arange(n, dtype=float))
+    nc = np.column_stack([x.ravel(), y.ravel(), np.zeros(n * n)])
+
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1))
+    a = (j * n + i).ravel()
+    b, c, d = a + 1, a + n + 1, a + n
+    el = np.vstack([np.column_stack([a, b, c]), np.column_stack([a, c, d])])
+    return GeometryFM(nc, el, projection="LOCAL")
+
+
+def _create_sigma_z_mesh(n=300, n_layers=20, n_sigma=5, seed=0):
+    """Layered prism mesh on a triangulated n x n grid with 1 to n_layers
+    layers per column (the top n_sigma layers are always present)"""
+    g = _create_large_triangle_mesh(n)
+    n2d = g.n_nodes
+    tri = np.stack(g.element_table)
+    rng = np.random.default_rng(seed)
+    n_layers_column = rng.integers(n_sigma, n_layers + 1, size=len(tri))
+
+    # columns are consecutive from bottom to top, node level k is layer face k
+    elem2d = np.repeat(np.arange(len(tri)), n_layers_column)
+    first = np.cumsum(n_layers_column) - n_layers_column
+    layer = n_layers - n_layers_column[elem2d] + np.arange(len(elem2d)) - first[elem2d]
+    bottom = tri[elem2d] + layer[:, None] * n2d
+    table = np.hstack([bottom, bottom + n2d])
+
+    nc = np.tile(g.node_coordinates, (n_layers + 1, 1))
+    nc[:, 2] = np.repeat(np.arange(n_layers + 1, dtype=float), n2d)
+    geometry = GeometryFM3D(
+        nc,
+        table,
+        projection="LOCAL",
+        dfsu_type=DfsuFileType.Dfsu3DSigmaZ,
+        n_layers=n_layers,
+        n_sigma=n_sigma,
+        validate=False,
+    )
+    return geometry, n_layers_column, layer
+
+
+def _create_large_dfsu(filename, nt=200, n_items=8, start="2000", delete_values=True):
+    """2d dfsu file with 200,000 quadrangles and random float32 values"""
+    g = mikeio.Grid2D(x0=0, y0=0, dx=1, nx=400, ny=250).to_geometryFM()
+    time = pd.date_range(start, freq="H", periods=nt)
+    das = [
+        mikeio.DataArray(
+            data=np.random.random((nt, g.n_elements)).astype(np.float32),
+            time=time,
+            geometry=g,
+            item=mikeio.ItemInfo(f"Item {i+1}"),
+        )
+        for i in range(n_items)
+    ]
+    if delete_values:
+        das[0][:, :10] = np.nan
+    mikeio.Dataset(das).to_dfs(filename)
+
+
+def _create_large_dfsu_3d(filename, nt=20, n_items=2):
+    """Sigma-z dfsu file with random float32 values and static zn"""
+    g, _, _ = _create_sigma_z_mesh(n=200)
+    time = pd.date_range("2000", freq="H", periods=nt)
+    zn = np.tile(g.node_coordinates[:, 2], (nt, 1)).astype(np.float32)
+    das = [
+        mikeio.DataArray(
+            data=np.random.random((nt, g.n_elements)).astype(np.float32),
+            time=time,
+            geometry=g,
+            zn=zn,
+            item=mikeio.ItemInfo(f"Item {i+1}"),
+        )
+        for i in range(n_items)
+    ]
+    mikeio.Dataset(das).to_dfs(filename)
+
+
+@pytest.fixture
+def create_large_triangle_mesh():
+    return _create_large_triangle_mesh
+
+
+@pytest.fixture
+def create_sigma_z_mesh():
+    return _create_sigma_z_mesh
+
+
+@pytest.fixture
+def create_large_dfsu():
+    return _create_large_dfsu
+
+
+@pytest.fixture
+def create_large_dfsu_3d():
+    return _create_large_dfsu_3d
@@ -0,0 +1,236 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from mikecore.DfsuFile import DfsuFile
+
+import mikeio
+from mikeio.dfsutil import _read_item_time_steps
+
+
+def _read_item_by_item(filename, elements=None):
+    """The per (timestep, item) read loop used before the bulk reader"""
+    dfs = DfsuFile.Open(filename)
+    deletevalue = dfs.DeleteValueFloat
+    n_items = len(dfs.ItemInfo)
+    n_steps = dfs.NumberOfTimeSteps
+    n_elems = dfs.NumberOfElements if elements is None else len(elements)
+    data_list = [np.ndarray(shape=(n_steps, n_elems)) for _ in range(n_items)]
+    for it in range(n_steps):
+        for item in range(n_items):
+            d = dfs.ReadItemTimeStep(item + 1, it).Data
+            d[d == deletevalue] = np.nan
+            if elements is not None:
+                d = d[elements]
+            data_list[item][it] = d
+    dfs.Close()
+    return data_list
+
+
+def _read_bulk(filename, elements=None):
+    dfs = DfsuFile.Open(filename)
+    n_items = len(dfs.ItemInfo)
+    n_steps = dfs.NumberOfTimeSteps
+    n_elems = dfs.NumberOfElements if elements is None else len(elements)
+    data = np.empty((n_items, n_steps, n_elems), dtype=np.float32)
+    _read_item_time_steps(
+        dfs,
+        list(range(1, n_items + 1)),
+        list(range(n_steps)),
+        data,
+        elements=elements,
+        deletevalue=dfs.DeleteValueFloat,
+    )
+    dfs.Close()
+    return data
+
+
+def test_read_dfsu_bulk_vs_item_by_item(tmpdir, create_large_dfsu):
+
+    filename = os.path.join(tmpdir.dirname, "large.dfsu")
+    create_large_dfsu(filename)
+
+    for elements in [None, np.arange(0, 100_000, 3)]:
+        t0 = time.perf_counter()
+        expected = _read_item_by_item(filename, elements=elements)
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        data = _read_bulk(filename, elements=elements)
+        t_bulk = time.perf_counter() - t0
+
+        print(
+            f"elements={elements is not None}: loop {t_loop:.2f}s, bulk {t_bulk:.2f}s"
+        )
+        for d_bulk, d in zip(data, expected):
+            np.testing.assert_array_equal(d_bulk, d)
+        if elements is None:
+            # a subset still decodes every full record, too close to time
+            assert t_bulk < t_loop
+
+
+def test_read_dfsu_large(tmpdir, create_large_dfsu):
+
+    filename = os.path.join(tmpdir.dirname, "large.dfsu")
+    create_large_dfsu(filename)
+
+    ds = mikeio.read(filename)
+    assert ds.shape == (200, 100_000)
+    assert ds[0].to_numpy().flags.c_contiguous
+    assert np.isnan(ds[0].to_numpy()[:, :10]).all()
+
+
+def test_read_many_vs_concat(tmpdir, create_large_dfsu):
+
+    filenames = []
+    for day in range(10):
+        filename = os.path.join(tmpdir.dirname, f"day_{day}.dfsu")
+        create_large_dfsu(filename, nt=25, n_items=2, start=f"2000-01-{day+1}")
+        filenames.append(filename)
+
+    t0 = time.perf_counter()
+    ds = mikeio.Dataset.concat([mikeio.read(f) for f in filenames])
+    t_concat = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dsm = mikeio.read_many(filenames, parallel=4)
+    t_many = time.perf_counter() - t0
+
+    print(f"concat {t_concat:.2f}s, read_many {t_many:.2f}s")
+    assert dsm.shape == ds.shape == (241, 100_000)
+    assert t_many < t_concat
+
+
+def _extract_track_point_by_point(dfs, ds, times, coords):
+    """The per point time and space interpolation loop used before"""
+    elem_ids, weights = dfs.geometry.get_2d_interpolant(coords, n_nearest=1)
+    t_rel = (times - dfs.start_time).total_seconds().to_numpy()
+    data = np.stack([da.to_numpy() for da in ds])
+    values = np.full((len(times), ds.n_items), np.nan)
+    for i in range(len(times)):
+        step = min(int(t_rel[i] // dfs.timestep), dfs.n_timesteps - 2)
+        w = (t_rel[i] - step * dfs.timestep) / dfs.timestep
+        eid = elem_ids[i]
+        if np.any(eid >= 0):
+            d1 = np.dot(data[:, step, eid], weights[i])
+            d2 = np.dot(data[:, step + 1, eid], weights[i])
+            values[i] = (1 - w) * d1 + w * d2
+    return values
+
+
+def test_extract_track_large(tmpdir, create_large_dfsu):
+
+    filename = os.path.join(tmpdir.dirname, "large.dfsu")
+    create_large_dfsu(filename)
+    dfs = mikeio.open(filename)
+
+    n_points = 1_000_000
+    rng = np.random.default_rng(42)
+    seconds = np.sort(rng.uniform(0, 199 * 3600, n_points))
+    times = pd.Timestamp("2000") + pd.to_timedelta(seconds, unit="s")
+    coords = rng.uniform(0, [400, 250], size=(n_points, 2))
+    df = pd.DataFrame(coords, index=times, columns=["x", "y"])
+
+    t0 = time.perf_counter()
+    track = dfs.extract_track(df)
+    t_track = time.perf_counter() - t0
+
+    ds = dfs.read()
+    n_ref = 20_000
+    t0 = time.perf_counter()
+    values_ref = _extract_track_point_by_point(dfs, ds, times[:n_ref], coords[:n_ref])
+    t_loop = (time.perf_counter() - t0) * n_points / n_ref
+
+    print(f"extract_track {t_track:.2f}s, point by point (estimated) {t_loop:.2f}s")
+    values = np.column_stack([da.to_numpy()[:n_ref] for da in track[2:]])
+    assert np.allclose(values, values_ref, rtol=1e-5, equal_nan=True)
+    assert t_track < t_loop
+
+
+def test_extract_track_many_vs_per_file(tmpdir, create_large_dfsu):
+
+    filenames = []
+    for day in range(10):
+        filename = os.path.join(tmpdir.dirname, f"track_day_{day}.dfsu")
+        create_large_dfsu(filename, nt=24, n_items=4, start=f"2000-01-{day+1}")
+        filenames.append(filename)
+
+    n_points = 200_000
+    rng = np.random.default_rng(42)
+    seconds = np.sort(rng.uniform(0, 239 * 3600, n_points))
+    times = pd.Timestamp("2000") + pd.to_timedelta(seconds, unit="s")
+    coords = rng.uniform(0, [399, 249], size=(n_points, 2))
+    df = pd.DataFrame(coords, index=times, columns=["x", "y"])
+
+    t0 = time.perf_counter()
+    parts = []
+    in_file = np.zeros(n_points, dtype=bool)
+    for filename in filenames:
+        dfs = mikeio.open(filename)
+        is_in = (df.index >= dfs.start_time) & (df.index <= dfs.end_time)
+        parts.append(dfs.extract_track(df[is_in]))
+        in_file |= is_in
+    t_per_file = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    track = mikeio.extract_track(filenames, df, parallel=4)
+    t_many = time.perf_counter() - t0
+
+    print(f"per file {t_per_file:.2f}s, extract_track {t_many:.2f}s")
+    expected = np.concatenate([p[2].to_numpy() for p in parts])
+    # points between the files are only available from extract_track
+    assert np.allclose(track[2].to_numpy()[in_file], expected, equal_nan=True)
+    assert not np.isnan(track[3].to_numpy()[~in_file]).any()
+    assert t_many < t_per_file
+
+
+def _read_layer_item_by_item(filename, elements):
+    """The layered read used before: whole mesh header and records decoded"""
+    dfs = DfsuFile.Open(filename)
+    deletevalue = dfs.DeleteValueFloat
+    elements = list(elements)
+    data_list = [
+        np.ndarray(shape=(dfs.NumberOfTimeSteps, len(elements)), dtype=np.float32)
+        for _ in range(len(dfs.ItemInfo) - 1)
+    ]
+    for it in range(dfs.NumberOfTimeSteps):
+        for item in range(len(data_list)):
+            d = dfs.ReadItemTimeStep(item + 2, it).Data
+            d[d == deletevalue] = np.nan
+            data_list[item][it] = d[elements]
+    dfs.Close()
+    return data_list
+
+
+def test_read_dfsu_3d_top_layer(tmpdir, create_large_dfsu_3d):
+
+    filename = os.path.join(tmpdir.dirname, "large_3d.dfsu")
+    create_large_dfsu_3d(filename)
+    dfs = mikeio.open(filename)
+    top = dfs.geometry.top_elements
+    dfs.geometry.geometry2d  # not part of the timing
+
+    t0 = time.perf_counter()
+    expected = _read_layer_item_by_item(filename, top)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ds = dfs.read(layers="top")
+    t_top = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ds_mmap = dfs.read(layers="top", backend="mmap")
+    t_mmap = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dfs.read()
+    t_full = time.perf_counter() - t0
+
+    print(f"{dfs.n_elements} elements, {len(top)} in top layer")
+    print(f"top layer: before {t_loop:.2f}s, now {t_top:.2f}s, mmap {t_mmap:.2f}s")
+    print(f"all layers: {t_full:.2f}s")
+    for da, da_mmap, d in zip(ds, ds_mmap, expected):
+        np.testing.assert_array_equal(da.to_numpy(), d)
+        np.testing.assert_array_equal(da_mmap.to_numpy(), d)
+    assert t_top < t_loop
@@ -0,0 +1,30 @@
+import os
+import time
+
+import numpy as np
+
+import mikeio
+from mikeio import generic
+
+
+def test_stats_vs_avg_time_and_quantile(tmpdir, create_large_dfsu):
+
+    filename = os.path.join(tmpdir.dirname, "large.dfsu")
+    create_large_dfsu(filename, n_items=2, delete_values=False)
+
+    t0 = time.perf_counter()
+    generic.avg_time(filename, os.path.join(tmpdir.dirname, "mean.dfsu"))
+    generic.quantile(filename, os.path.join(tmpdir.dirname, "min.dfsu"), q=0.0)
+    generic.quantile(filename, os.path.join(tmpdir.dirname, "max.dfsu"), q=1.0)
+    t_chained = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    outfilename = os.path.join(tmpdir.dirname, "stats.dfsu")
+    generic.stats(filename, outfilename, stats=["min", "max", "mean", "std"])
+    t_stats = time.perf_counter() - t0
+
+    print(f"avg_time+quantile {t_chained:.2f}s, stats {t_stats:.2f}s")
+    stats = mikeio.read(outfilename)
+    qmax = mikeio.read(os.path.join(tmpdir.dirname, "max.dfsu"))
+    assert np.allclose(stats[1].to_numpy(), qmax[0].to_numpy())
+    assert t_stats < t_chained
@@ -0,0 +1,324 @@
+import time
+
+import numpy as np
+
+import mikeio
+from mikeio.interpolation import interp2d
+
+
+def _create_mesh_with_islands(n=500, spacing=5):
+    """Quadrangle mesh with a one element hole every spacing elements"""
+    g = mikeio.Grid2D(x0=0, y0=0, dx=1, nx=n, ny=n).to_geometryFM()
+    ij = np.arange(g.n_elements)
+    is_hole = (ij % n % spacing == 1) & (ij // n % spacing == 1)
+    return g.elements_to_geometry(ij[~is_hole])
+
+
+def _boundary_polylines_quadratic(g):
+    """Chaining of boundary faces with np.where/np.delete used before"""
+    face_remains = g._get_boundary_faces().copy()
+    polylines = []
+    while face_remains.shape[0] > 1:
+        n0 = face_remains[:, 0]
+        n1 = face_remains[:, 1]
+        polyline = [n0[0], n1[0]]
+        index_to_delete = [0]
+        count = 0
+        end_points = face_remains[0, 1]
+        while True:
+            next_point_index = np.where(n0 == end_points)
+            if next_point_index[0].size != 0:
+                polyline.append(face_remains[next_point_index[0][0], 1])
+                index_to_delete.append(next_point_index[0][0])
+                end_points = polyline[-1]
+            count += 1
+            if count > face_remains.shape[0] or polyline[0] == end_points:
+                break
+
+        face_remains = np.delete(face_remains, index_to_delete, axis=0)
+        polylines.append(polyline)
+    return polylines
+
+
+def _contains_by_polygons(g, points):
+    """matplotlib polygon tests of exteriors and interiors used before"""
+    import matplotlib.path as mp
+
+    bnd = g.boundary_polylines
+    cnts = np.zeros(len(points), dtype=bool)
+    for exterior in bnd.exteriors:
+        cnts |= mp.Path(exterior.xy).contains_points(points)
+    for interior in bnd.interiors:
+        cnts &= ~mp.Path(interior.xy).contains_points(points)
+    return cnts
+
+
+def _find_element_point_by_point(g, xy):
+    """The per point loop (nearest, second nearest, then 10 nearest) used before"""
+    nc = g.node_coordinates
+    ids = np.full(len(xy), -1, dtype=int)
+    candidates, _ = g._find_n_nearest_2d_elements(xy, n=10)
+    for k in range(len(xy)):
+        for e in candidates[k]:
+            nodes = g.element_table[e]
+            xn, yn = nc[nodes, 0], nc[nodes, 1]
+            xn1, yn1 = np.roll(xn, -1), np.roll(yn, -1)
+            side = (yn1 - yn) * (xy[k, 0] - xn) + (xn - xn1) * (xy[k, 1] - yn)
+            if np.all(side <= 0):
+                ids[k] = e
+                break
+    return ids
+
+
+def test_find_index_vs_point_by_point(create_large_triangle_mesh):
+    g = create_large_triangle_mesh()
+    g.find_index(coords=[[1.0, 1.0]])  # build the tree
+
+    rng = np.random.default_rng(42)
+    xy = rng.uniform(-10, 510, size=(200_000, 2))
+
+    t0 = time.perf_counter()
+    idx = g.find_index(coords=xy)
+    t_batch = time.perf_counter() - t0
+
+    n_ref = 10_000
+    t0 = time.perf_counter()
+    idx_ref = _find_element_point_by_point(g, xy[:n_ref])
+    t_loop = (time.perf_counter() - t0) * len(xy) / n_ref
+
+    print(f"batched {t_batch:.2f}s, point by point (estimated) {t_loop:.2f}s")
+    assert np.all(idx[:n_ref] == idx_ref)
+    assert np.all(idx[np.any((xy < 0) | (xy > 499), axis=1)] == -1)
+    assert t_batch < t_loop
+
+
+def test_boundary_polylines_many_islands():
+    g = _create_mesh_with_islands(n=300)
+    t0 = time.perf_counter()
+    polylines = g._get_boundary_polylines_uncategorized()
+    t_linear = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    polylines_ref = _boundary_polylines_quadratic(g)
+    t_quadratic = time.perf_counter() - t0
+
+    print(f"{len(polylines)} polylines: {t_linear:.2f}s, before {t_quadratic:.2f}s")
+    assert [list(p) for p in polylines] == [list(p) for p in polylines_ref]
+    assert t_linear < t_quadratic
+
+    # 10000 islands, 40000 boundary faces
+    g = _create_mesh_with_islands(n=500)
+    t0 = time.perf_counter()
+    bnd = g.boundary_polylines
+    print(f"{bnd.n_interiors} islands: {time.perf_counter() - t0:.2f}s")
+    assert bnd.n_interiors == 10000
+
+
+def test_contains_many_islands():
+    g = _create_mesh_with_islands(n=300)
+    g.boundary_polylines  # not part of the timing
+    g.contains([[1.0, 1.0]])  # build the tree
+
+    rng = np.random.default_rng(42)
+    xy = rng.uniform(-10, 310, size=(1_000_000, 2))
+
+    t0 = time.perf_counter()
+    inside = g.contains(xy)
+    t_locator = time.perf_counter() - t0
+
+    n_ref = 20_000
+    t0 = time.perf_counter()
+    inside_ref = _contains_by_polygons(g, xy[:n_ref])
+    t_polygons = (time.perf_counter() - t0) * len(xy) / n_ref
+
+    print(f"contains {t_locator:.2f}s, polygons (estimated) {t_polygons:.2f}s")
+    assert np.all(inside[:n_ref] == inside_ref)
+    assert t_locator < t_polygons
+
+
+def test_interp2d_vs_point_by_point(create_large_triangle_mesh):
+    g = create_large_triangle_mesh(n=200)
+    grid = mikeio.Grid2D(bbox=[0, 0, 199, 199], nx=300, ny=300)
+    nt = 20
+    data = np.random.random((nt, g.n_elements))
+
+    t0 = time.perf_counter()
+    M = g.get_2d_interpolant(grid.xy, n_nearest=5, sparse=True)
+    dati = interp2d(data, M)
+    t_sparse = time.perf_counter() - t0
+
+    elem_ids, weights = g.get_2d_interpolant(grid.xy, n_nearest=5)
+    n_ref = 10_000
+    t0 = time.perf_counter()
+    dati_ref = np.empty((nt, n_ref))
+    for step in range(nt):
+        for j in range(n_ref):
+            dati_ref[step, j] = np.dot(data[step, elem_ids[j]], weights[j])
+    t_loop = (time.perf_counter() - t0) * len(elem_ids) / n_ref
+
+    print(f"sparse {t_sparse:.2f}s, point by point (estimated) {t_loop:.2f}s")
+    assert np.allclose(dati[:, :n_ref], dati_ref, equal_nan=True)
+    assert t_sparse < t_loop
+
+
+def _node_centered_data_per_node(g, data, nodes):
+    """The per node loop of the pseudo-laplacian method used before (tri only)"""
+    nc = g.node_coordinates
+    ec = g.element_coordinates
+    elem_table = np.stack(g.element_table)
+    values = np.zeros(len(nodes))
+    for k, n in enumerate(nodes):
+        item = np.argwhere(elem_table == n)[:, 0]
+        I = ec[item][:, :2] - nc[n][:2]
+        I2 = (I**2).sum(axis=0)
+        Ixy = (I[:, 0] * I[:, 1]).sum(axis=0)
+        lamb = I2[0] * I2[1] - Ixy**2
+        omega = np.zeros(1)
+        if lamb > 1e-10 * (I2[0] * I2[1]):
+            lambda_x = (Ixy * I[:, 1] - I2[1] * I[:, 0]) / lamb
+            lambda_y = (Ixy * I[:, 0] - I2[0] * I[:, 1]) / lamb
+            omega = 1.0 + lambda_x * I[:, 0] + lambda_y * I[:, 1]
+        if omega.sum() > 0:
+            values[k] = np.sum(omega * data[item]) / np.sum(omega)
+        else:
+            invdis = 1 / np.hypot(I[:, 0], I[:, 1])
+            values[k] = np.sum(invdis * data[item]) / np.sum(invdis)
+    return values
+
+
+def test_node_centered_data_vs_per_node(create_large_triangle_mesh):
+    g = create_large_triangle_mesh(n=300)
+    nt = 50
+    data = np.random.random((nt, g.n_elements))
+
+    t0 = time.perf_counter()
+    zn = g.get_node_centered_data(data)
+    t_sparse = time.perf_counter() - t0
+
+    nodes = np.arange(0, g.n_nodes, 500)
+    t0 = time.perf_counter()
+    zn_ref = _node_centered_data_per_node(g, data[0], nodes)
+    t_loop = (time.perf_counter() - t0) * g.n_nodes / len(nodes)
+
+    print(
+        f"{nt} steps: sparse {t_sparse:.2f}s, per node 1 step (estimated) {t_loop:.2f}s"
+    )
+    assert np.allclose(zn[0, nodes], zn_ref)
+    assert t_sparse < t_loop
+
+
+def _2d_to_3d_association_loop(g):
+    """The per column loop with object arrays used before"""
+    e2_to_e3, index2d, layerid = [], [], []
+    topid = g.top_elements
+    botid = g.bottom_elements
+    global_layer_ids = np.arange(g.n_layers)
+    for j in range(len(topid)):
+        col = np.arange(botid[j], topid[j] + 1)
+        e2_to_e3.append(col)
+        for _ in col:
+            index2d.append(j)
+        for ll in global_layer_ids[-len(col) :]:
+            layerid.append(ll)
+    return np.array(e2_to_e3, dtype=object), np.array(index2d), np.array(layerid)
+
+
+def test_layered_topology_sigma_z(create_sigma_z_mesh):
+    g, n_layers_column, layer = create_sigma_z_mesh()
+    print(f"{g.n_elements} elements in {len(n_layers_column)} columns")
+
+    t0 = time.perf_counter()
+    top = g.top_elements
+    layer_ids = g.layer_ids
+    elem2d_ids = g.elem2d_ids
+    t_vectorized = time.perf_counter() - t0
+
+    assert np.all(g.n_layers_per_column == n_layers_column)
+    assert np.all(layer_ids == layer)
+    assert np.all(np.diff(top) == n_layers_column[1:])
+    assert np.all(g.get_layer_elements(-1) == top)
+    assert len(g.get_layer_elements(0)) == np.sum(n_layers_column == g.n_layers)
+
+    t0 = time.perf_counter()
+    e2_e3_ref, elem2d_ref, layer_ref = _2d_to_3d_association_loop(g)
+    t_loop = time.perf_counter() - t0
+
+    print(f"vectorized {t_vectorized:.2f}s, per column loop {t_loop:.2f}s")
+    assert np.all(elem2d_ids == elem2d_ref)
+    assert np.all(layer_ids == layer_ref)
+    assert np.all(g._column_elements([7, 3]) == np.hstack(e2_e3_ref[[7, 3]]))
+    assert t_vectorized < t_loop
+
+
+def _find_elem3d_point_by_point(g, elem2d, z):
+    """The per point column lookup used before"""
+    elem3d = np.full_like(elem2d, fill_value=-1)
+    for j, e2 in enumerate(elem2d):
+        e3_col = np.hstack(g.e2_e3_table[e2])
+        dz = g._dz[e3_col]
+        z_col = g.element_coordinates[e3_col, 2]
+        z_face = np.append(z_col - dz / 2, z_col[-1] + dz[-1] / 2)
+        if z[j] < z_face[0] or z[j] > z_face[-1]:
+            raise ValueError("outside water column")
+        elem3d[j] = e3_col[np.searchsorted(z_face, z[j]) - 1]
+    return elem3d
+
+
+def test_find_3d_elements_vs_point_by_point(create_sigma_z_mesh):
+    g, n_layers_column, _ = create_sigma_z_mesh(n=200)
+    g.element_coordinates, g._dz, g.e2_e3_table  # not part of the timing
+
+    rng = np.random.default_rng(42)
+    n_points = 50_000
+    elem2d = rng.integers(0, len(n_layers_column), n_points)
+    z_bottom = g.n_layers - n_layers_column[elem2d]
+    z = rng.uniform(z_bottom + 0.01, g.n_layers - 0.01)
+
+    t0 = time.perf_counter()
+    elem3d = g._find_elem3d_from_elem2d(elem2d, z)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    elem3d_ref = _find_elem3d_point_by_point(g, elem2d, z)
+    t_loop = time.perf_counter() - t0
+
+    print(f"batched {t_batch:.2f}s, point by point {t_loop:.2f}s")
+    assert np.all(elem3d == elem3d_ref)
+    assert np.all(g.layer_ids[elem3d] == np.floor(z))
+    assert t_batch < t_loop
+
+    # dynamic zn: surface raised by 1 at the first of two time steps
+    zn = np.tile(g.node_coordinates[:, 2], (2, 1))
+    zn[0, zn[0] == g.n_layers] += 1.0
+    t0 = time.perf_counter()
+    elem3d = g._find_elem3d_from_elem2d(elem2d, z, zn=zn)
+    print(f"batched with 2 time steps of zn {time.perf_counter() - t0:.2f}s")
+    assert np.all(elem3d == elem3d_ref)
+
+
+def _depth_average_per_column(g, values, dz):
+    """Depth average by a loop over the water columns"""
+    res = np.empty((len(values), len(g.top_elements)))
+    for j, col in enumerate(g.e2_e3_table):
+        res[:, j] = np.average(values[:, col], weights=dz[col], axis=1)
+    return res
+
+
+def test_depth_average_vs_per_column(create_sigma_z_mesh):
+    g, n_layers_column, _ = create_sigma_z_mesh()
+    g._dz, g.e2_e3_table  # not part of the timing
+    rng = np.random.default_rng(0)
+    values = rng.random((5, g.n_elements), dtype=np.float32)
+
+    t0 = time.perf_counter()
+    avg = g._depth_average(values)
+    t_vectorized = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    avg_ref = _depth_average_per_column(g, values, g._dz)
+    t_loop = time.perf_counter() - t0
+
+    print(f"{len(n_layers_column)} columns, 5 time steps")
+    print(f"vectorized {t_vectorized:.2f}s, per column loop {t_loop:.2f}s")
+    assert np.allclose(avg, avg_ref, rtol=1e-5)
+    assert t_vectorized < t_loop
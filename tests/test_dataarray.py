@@ -1057,6 +1057,29 @@ def test_daarray_aggregation_nan_versions():
     assert pytest.approx(da_std.values[0]) == 0.015291579
 
 
+def test_dataarray_area_average():
+    da = mikeio.read("tests/testdata/HD2D.dfsu", items=[3])["Current speed"]
+    area = da.geometry.get_element_area()
+
+    da_avg = da.area_average()
+    assert isinstance(da_avg, mikeio.DataArray)
+    assert da_avg.n_timesteps == da.n_timesteps
+    assert da_avg.values == pytest.approx(
+        np.average(da.to_numpy(), weights=area, axis=1)
+    )
+
+    # NaN values are removed from both sum and area
+    da.values[:, :10] = np.nan
+    da_avg = da.area_average()
+    expected = np.average(da.to_numpy()[:, 10:], weights=area[10:], axis=1)
+    assert da_avg.values == pytest.approx(expected)
+
+
+def test_dataarray_area_average_not_2d_fm(da2):
+    with pytest.raises(NotImplementedError):
+        da2.area_average()
+
+
 def test_da_quantile_axis0(da2):
     assert da2.geometry.nx == 7
     assert len(da2.time) == 10
@@ -189,6 +189,50 @@ def test_read_area_subset_bad_bbox():
         mikeio.read(filename, area=bbox)
 
 
+def test_read_mmap_backend():
+
+    filename = "tests/testdata/gebco_sound.dfs2"
+    bbox = [12.2, 55.7, 12.5, 55.9]
+    ds = mikeio.read(filename, area=bbox)
+    dsmm = mikeio.read(filename, area=bbox, backend="mmap")
+    assert dsmm.geometry == ds.geometry
+    # delete values are kept
+    values = dsmm[0].to_numpy()
+    is_deleted = values == np.float32(mikeio.open(filename).deletevalue)
+    assert np.all(is_deleted == np.isnan(ds[0].to_numpy()))
+    assert np.all(values[~is_deleted] == ds[0].to_numpy()[~is_deleted])
+
+    filename = "tests/testdata/random_two_item.dfs2"
+    ds = mikeio.read(filename, time=[1, 2])
+    dsmm = mikeio.read(filename, time=[1, 2], backend="mmap")
+    assert dsmm.time.equals(ds.time)
+    deletevalue = np.float32(mikeio.open(filename).deletevalue)
+    for da, damm in zip(ds, dsmm):
+        values = damm.to_numpy().copy()
+        values[values == deletevalue] = np.nan
+        assert np.array_equal(values, da.to_numpy(), equal_nan=True)
+
+
+def test_read_mmap_backend_non_equidistant_not_supported():
+
+    filename = "tests/testdata/global_long_lat_pacific_view_temperature_delta.dfs2"
+    with pytest.raises(ValueError, match="equidistant"):
+        mikeio.read(filename, backend="mmap")
+
+
+def test_iter_timesteps():
+
+    filename = "tests/testdata/eq.dfs2"
+    dfs = mikeio.open(filename)
+    ds = dfs.read()
+
+    chunks = [dsc.copy() for dsc in dfs.iter_timesteps(chunk=10)]
+    assert chunks[0].dims == ("time", "y", "x")
+    assert sum(dsc.n_timesteps for dsc in chunks) == ds.n_timesteps
+    values = np.concatenate([dsc[0].to_numpy() for dsc in chunks])
+    assert np.array_equal(values, ds[0].to_numpy(), equal_nan=True)
+
+
 def test_read_area_subset_geo():
 
     filename = "tests/testdata/europe_wind_long_lat.dfs2"
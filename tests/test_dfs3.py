@@ -154,6 +154,32 @@ def test_read_bottom_layer():
     assert pytest.approx(ds[0].to_numpy()[0, 58, 52]) == 0.05738005042076111
 
 
+def test_read_mmap_backend():
+    filename = "tests/testdata/dissolved_oxygen.dfs3"
+    for layers in [None, "top", [0, 3], "bottom"]:
+        ds = mikeio.read(filename, layers=layers)
+        dsmm = mikeio.read(filename, layers=layers, dtype=np.float32, backend="mmap")
+        assert dsmm.shape == ds.shape
+        assert dsmm[0].to_numpy().dtype == np.float32
+        values = dsmm[0].to_numpy().copy()
+        values[values == np.float32(mikeio.open(filename).deletevalue)] = np.nan
+        assert np.array_equal(values, ds[0].to_numpy(), equal_nan=True)
+
+    ds = mikeio.read(filename, dtype=np.float32)
+    assert ds[0].to_numpy().dtype == np.float32
+    assert mikeio.read(filename)[0].to_numpy().dtype == np.float64
+    with pytest.raises(ValueError, match="float32"):
+        mikeio.read(filename, backend="mmap")
+
+
+def test_iter_timesteps():
+    filename = "tests/testdata/dissolved_oxygen.dfs3"
+    ds = mikeio.read(filename, keepdims=True)
+    dsc = next(mikeio.open(filename).iter_timesteps(chunk=1))
+    assert dsc.dims == ("time", "z", "y", "x")
+    assert np.array_equal(dsc[0].to_numpy(), ds[0].to_numpy()[:1], equal_nan=True)
+
+
 def test_sel_bottom_layer():
     dsall = mikeio.read("tests/testdata/dissolved_oxygen.dfs3")
     with pytest.raises(NotImplementedError) as excinfo:
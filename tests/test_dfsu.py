@@ -203,6 +203,130 @@ def test_read_single_time_step_scalar():
     assert ds[0].to_numpy().shape[0] == dfs.n_elements
 
 
+def test_read_subset_same_values_as_full_read():
+
+    filename = "tests/testdata/HD2D.dfsu"
+    dfs = mikeio.open(filename)
+    ds = dfs.read()
+
+    elements = [4, 0, 100, 7]
+    dssub = dfs.read(items=[3, 1], time=[1, 2], elements=elements, dtype=np.float64)
+    assert dssub[0].dtype == np.float64
+    assert dssub.shape == (2, 4)
+    assert np.all(dssub[0].to_numpy() == ds[3].to_numpy()[1:3, elements])
+    assert np.all(dssub[1].to_numpy() == ds[1].to_numpy()[1:3, elements])
+
+    dsstep = dfs.read(time=1, dtype=np.float64)
+    assert dsstep[0].dtype == np.float64
+    assert np.all(dsstep[0].to_numpy() == ds[0].to_numpy()[1])
+
+
+def test_read_mmap_backend():
+
+    filename = "tests/testdata/HD2D.dfsu"
+    dfs = mikeio.open(filename)
+    ds = dfs.read()
+    dsmm = dfs.read(backend="mmap")
+    assert dsmm.time.equals(ds.time)
+    for da, damm in zip(ds, dsmm):
+        assert damm.dtype == np.float32
+        assert np.all(damm.to_numpy() == da.to_numpy())
+
+    elements = [4, 0, 100, 7]
+    dsmm = dfs.read(items=[3, 1], time=[1, 2], elements=elements, backend="mmap")
+    assert np.all(dsmm[0].to_numpy() == ds[3].to_numpy()[1:3, elements])
+
+    dsmm = dfs.read(time=-1, backend="mmap")
+    assert dsmm[0].shape == (dfs.n_elements,)
+    assert np.all(dsmm[0].to_numpy() == ds[0].to_numpy()[-1])
+
+    with pytest.raises(ValueError):
+        dfs.read(backend="mmap", dtype=np.float64)
+
+
+def test_read_lazy():
+
+    filename = "tests/testdata/HD2D.dfsu"
+    dfs = mikeio.open(filename)
+    ds = dfs.read()
+    dsl = dfs.read(lazy=True)
+    assert dsl.shape == ds.shape
+    assert dsl.time.equals(ds.time)
+    for da, dal in zip(ds, dsl):
+        assert dal.dtype == np.float32
+        assert np.all(dal.to_numpy() == da.to_numpy())
+
+    # subsetting does not read any data
+    dal = dsl[0].isel(time=[1, 2]).isel(element=[4, 0, 100])
+    assert not isinstance(dal.values, np.ndarray)
+    assert np.all(dal.to_numpy() == ds[0].to_numpy()[1:3][:, [4, 0, 100]])
+
+    dal = dfs.read(lazy=True, time=-1)[0]
+    assert dal.shape == (dfs.n_elements,)
+    assert np.all(dal.to_numpy() == ds[0].to_numpy()[-1])
+
+    # reductions are evaluated chunk by chunk
+    for axis in ["time", "space"]:
+        assert np.allclose(
+            dsl.nanmean(axis=axis)[3].to_numpy(),
+            ds.nanmean(axis=axis)[3].to_numpy(),
+        )
+        assert np.all(
+            dsl.max(axis=axis)[0].to_numpy() == ds.max(axis=axis)[0].to_numpy()
+        )
+
+    # writing to a copy does not touch the file or the lazy dataset
+    da = dsl[0].copy()
+    da[0] = 1.0
+    assert np.all(da.to_numpy()[0] == 1.0)
+    assert np.all(dsl[0].to_numpy()[0] == ds[0].to_numpy()[0])
+
+    with pytest.raises(ValueError):
+        dfs.read(lazy=True, backend="mmap")
+
+
+def test_iter_timesteps():
+
+    filename = "tests/testdata/HD2D.dfsu"
+    dfs = mikeio.open(filename)
+    ds = dfs.read(items=[3, 0], elements=[4, 0, 100])
+
+    chunks = [
+        dsc.copy()
+        for dsc in dfs.iter_timesteps(items=[3, 0], elements=[4, 0, 100], chunk=4)
+    ]
+    assert [dsc.n_timesteps for dsc in chunks] == [4, 4, 1]
+    assert chunks[0].geometry.n_elements == 3
+    assert chunks[-1].time[0] == ds.time[-1]
+    for i in range(ds.n_items):
+        values = np.concatenate([dsc[i].to_numpy() for dsc in chunks])
+        assert np.all(values == ds[i].to_numpy())
+
+    # the buffer is reused
+    it = dfs.iter_timesteps(chunk=2)
+    ds1 = next(it)
+    values = ds1[0].to_numpy().copy()
+    ds2 = next(it)
+    assert np.shares_memory(ds1[0].to_numpy(), ds2[0].to_numpy())
+    assert not np.all(ds1[0].to_numpy() == values)
+
+    with pytest.raises(ValueError):
+        next(dfs.iter_timesteps(chunk=0))
+
+
+def test_iter_timesteps_layered():
+
+    filename = "tests/testdata/oresund_sigma_z.dfsu"
+    dfs = mikeio.open(filename)
+    ds = dfs.read(layers="top")
+
+    chunks = [
+        dsc.copy() for dsc in dfs.iter_timesteps(elements=dfs.top_elements, chunk=1)
+    ]
+    assert len(chunks) == ds.n_timesteps
+    assert np.all(chunks[1][0].to_numpy()[0] == ds[0].to_numpy()[1])
+
+
 def test_read_single_time_step_outside_bounds_fails():
 
     filename = "tests/testdata/HD2D.dfsu"
@@ -300,6 +424,30 @@ def test_contains():
     assert inside[1] == False
 
 
+def test_find_index_2d():
+    filename = "tests/testdata/FakeLake.dfsu"  # triangles and quadrangles
+    g = mikeio.open(filename).geometry
+
+    # element centers are inside their own element
+    idx = g.find_index(coords=g.element_coordinates[:, :2])
+    assert np.all(idx == np.arange(g.n_elements))
+
+    xy = [g.node_coordinates[:, :2].min(axis=0) - 1.0, g.element_coordinates[5, :2]]
+    idx = g.find_index(coords=xy)
+    assert idx[0] == -1
+    assert idx[1] == 5
+
+
+def test_find_index_3d_outside():
+    filename = "tests/testdata/oresund_sigma_z.dfsu"
+    g = mikeio.open(filename).geometry
+
+    xy = g.geometry2d.element_coordinates[:100, :2]
+    idx = g._find_element_2d(np.vstack([xy, [[0.0, 0.0]]]))
+    assert np.all(idx[:100] == np.arange(100))
+    assert idx[100] == -1
+
+
 def test_get_overset_grid():
     filename = "tests/testdata/FakeLake.dfsu"
     dfs = mikeio.open(filename)
@@ -898,6 +1046,59 @@ def test_extract_track():
     track3 = dfs.extract_track(csv_file, method="inverse_distance")
     assert track3[2].values[23] == approx(3.6469911492412463)
 
+    track4 = dfs.extract_track(csv_file, method="linear")
+    assert track4[2].values[23] == approx(3.6775246)
+    assert sum(np.isnan(track4[2].to_numpy())) == 26
+
+
+def test_extract_multiple_tracks():
+    dfs = mikeio.open("tests/testdata/track_extraction_case02_indata.dfsu")
+    csv_file = "tests/testdata/track_extraction_case02_track.csv"
+    df = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+    df2 = df.iloc[::2].copy()
+    df2.index = df2.index + pd.Timedelta(minutes=17)
+
+    tracks = dfs.extract_track([csv_file, df2], method="inverse_distance")
+    assert len(tracks) == 2
+    expected = [dfs.extract_track(df, method="inverse_distance")]
+    expected.append(dfs.extract_track(df2, method="inverse_distance"))
+    for track, track_expected in zip(tracks, expected):
+        assert track.n_items == track_expected.n_items
+        assert np.all(track.time == track_expected.time)
+        for da, da_expected in zip(track, track_expected):
+            assert np.allclose(da.to_numpy(), da_expected.to_numpy(), equal_nan=True)
+
+    assert tracks[0][2].values[23] == approx(3.6469911492412463)
+    assert not np.all(np.isnan(tracks[1][2].to_numpy()))
+
+    # a track without time overlap gets NaN values, but only raises alone
+    df3 = df.shift(periods=365, freq="D")
+    with pytest.raises(ValueError, match="No time overlap"):
+        dfs.extract_track(df3)
+    tracks = dfs.extract_track([df, df3])
+    assert tracks[0][2].values[23] == approx(3.6284972794399653)
+    assert np.all(tracks[1][1].to_numpy() == df.latitude.values)
+    assert np.all(np.isnan(tracks[1][2].to_numpy()))
+
+
+def test_extract_track_time_interpolation():
+    dfs = mikeio.open("tests/testdata/HD2D.dfsu")
+    ds = dfs.read(items=0)
+    x, y = ds.geometry.element_coordinates[100, :2]
+    half_step = pd.Timedelta(seconds=dfs.timestep / 2)
+    times = ds.time[:3].union(ds.time[:3] + half_step)
+    times = times.union([ds.time[0] - pd.Timedelta(minutes=1), ds.time[-1]])
+    df = pd.DataFrame({"x": x, "y": y}, index=times)
+
+    track = dfs.extract_track(df, items=0)
+    values = track[2].to_numpy()
+    expected = ds[0].to_numpy()[:, 100]
+    assert np.isnan(values[0])  # before start of file
+    assert values[1] == approx(expected[0])
+    assert values[2] == approx(0.5 * expected[0] + 0.5 * expected[1])
+    assert values[3] == approx(expected[1])
+    assert values[-1] == approx(expected[-1])
+
 
 def test_extract_bad_track():
     dfs = mikeio.open("tests/testdata/track_extraction_case02_indata.dfsu")
@@ -477,6 +477,23 @@ def test_n_layers_per_column():
     assert not hasattr(dfs, "n_layers_per_column")
 
 
+def test_2d_to_3d_association_sigma_z():
+    g = mikeio.open("tests/testdata/oresund_sigma_z.dfsu").geometry
+    n_layers_column = g.n_layers_per_column
+
+    assert np.all(g.bottom_elements == g.top_elements - n_layers_column + 1)
+    assert np.all(g.elem2d_ids[g.bottom_elements] == np.arange(len(n_layers_column)))
+    assert np.all(g.layer_ids[g.top_elements] == g.n_layers - 1)
+    assert np.all(g.layer_ids[g.bottom_elements] == g.n_layers - n_layers_column)
+
+    # columns of 2d elements, bottom to top
+    elem2d = [3, 0, 3]
+    expected = np.hstack([g.e2_e3_table[e] for e in elem2d])
+    assert np.all(g._column_elements(elem2d) == expected)
+    assert np.all(g.elem2d_ids[expected] == np.repeat(elem2d, n_layers_column[elem2d]))
+    assert g.e2_e3_table.shape == (len(n_layers_column),)
+
+
 def test_get_layer_elements():
     filename = os.path.join("tests", "testdata", "oresund_sigma_z.dfsu")
     dfs = mikeio.open(filename)
@@ -590,6 +607,89 @@ def test_extract_surface_elevation_from_3d(tmpdir):
     assert dfs2.n_elements == n_top1
 
 
+def test_read_columns_layout():
+    dfs = mikeio.open("tests/testdata/oresund_sigma_z.dfsu")
+    g = dfs.geometry
+    ds = dfs.read(layout="columns")
+    assert ds.dims == ("time", "element", "layer")
+    assert ds.shape == (3, 3700, 9)
+    assert ds.geometry.n_elements == g.geometry2d.n_elements
+    assert not ds.geometry.is_layered
+
+    values = ds["Temperature"].to_numpy()
+    expected = dfs.read(items="Temperature")[0].to_numpy()
+    assert np.all(values[:, g.elem2d_ids, g.layer_ids] == expected)
+    assert np.all(np.isnan(values[:, ~g.layer_mask]))
+    assert np.all(g.layer_mask.sum(axis=1) == g.n_layers_per_column)
+
+    # top layer is the last layer of every column
+    dstop = ds.isel(layer=-1)
+    assert dstop.dims == ("time", "element")
+    assert np.all(dstop[0].to_numpy() == dfs.read(layers="top")[0].to_numpy())
+
+    # columns of selected elements
+    area = [340000, 6160000, 350000, 6170000]
+    dsa = dfs.read(layout="columns", area=area, time=0, items=[1])
+    assert dsa.dims == ("element", "layer")
+    assert dsa.shape == (56, 9)
+    assert np.allclose(
+        dsa[0].to_numpy(), ds.isel(time=0).sel(area=area)[1].to_numpy(), equal_nan=True
+    )
+
+    dsp = dfs.read(layout="columns", x=340000, y=6160000)
+    assert dsp.dims == ("time", "layer")
+    assert dsp.shape == (3, 9)
+
+    with pytest.raises(ValueError, match="layout"):
+        dfs.read(layout="column")
+
+    dfs = mikeio.open("tests/testdata/oresund_vertical_slice.dfsu")
+    with pytest.raises(NotImplementedError):
+        dfs.read(layout="columns")
+
+
+def test_find_3d_elements_with_dynamic_zn():
+    ds = mikeio.read("tests/testdata/oresund_sigma_z.dfsu")
+    g = ds.geometry
+    zn = ds._zn
+    elem2d = np.array([745, 3, 745, 100])
+    col = g.e2_e3_table[745]
+    z = g.element_coordinates[col[[0, -1]], 2]
+    z = np.array([z[0], -0.5, z[1], -1.0])
+
+    # containing element at each time step
+    elem3d = g._find_elem3d_from_elem2d(elem2d, z, zn=zn)
+    assert elem3d.shape == (ds.n_timesteps, 4)
+    for step in range(ds.n_timesteps):
+        ec = g.calc_element_coordinates(zn=zn[step])
+        dz = g._calc_dz(zn=zn[step])
+        for e3, e2, zj in zip(elem3d[step], elem2d, z):
+            assert e3 in g.e2_e3_table[e2]
+            assert ec[e3, 2] - dz[e3] / 2 <= zj <= ec[e3, 2] + dz[e3] / 2
+
+    # static zn gives the same as without zn
+    expected = g._find_elem3d_from_elem2d(elem2d, z)
+    assert np.all(
+        g._find_elem3d_from_elem2d(elem2d, z, zn=g.node_coordinates[:, 2]) == expected
+    )
+
+    with pytest.raises(ValueError, match="outside water column"):
+        g._find_elem3d_from_elem2d(elem2d, z - 1000, zn=zn)
+
+    # nearest element center for each time step
+    xyz = np.column_stack([g.geometry2d.element_coordinates[elem2d, :2], z])
+    ids = g.find_nearest_elements(xyz, zn=zn)
+    assert ids.shape == (ds.n_timesteps, 4)
+    for step in range(ds.n_timesteps):
+        zc = g.calc_element_coordinates(zn=zn[step])[:, 2]
+        for e3, e2, zj in zip(ids[step], elem2d, z):
+            column = g.e2_e3_table[e2]
+            assert e3 == column[np.argmin(np.abs(zc[column] - zj))]
+    assert np.all(
+        g.find_nearest_elements(xyz[0, 0], xyz[0, 1], z=z[0], zn=zn) == ids[:, 0]
+    )
+
+
 def test_find_nearest_element_in_Zlayer():
     filename = os.path.join("tests", "testdata", "oresund_sigma_z.dfsu")
     dfs = mikeio.open(filename)
@@ -635,3 +735,155 @@ def test_dataset_write_dfsu3d_max(tmp_path):
     ds2 = mikeio.read(outfilename)
     assert ds2.n_timesteps == 1
     assert ds2.geometry.is_layered
+
+
+def test_depth_average(tmp_path):
+    dfs = mikeio.open("tests/testdata/oresund_sigma_z.dfsu")
+    ds = dfs.read()
+    g = ds.geometry
+
+    da = ds.Salinity.depth_average()
+    assert da.geometry.n_elements == g.geometry2d.n_elements
+    assert da.dims == ("time", "element")
+    values = ds.Salinity.to_numpy()
+    for step in range(ds.n_timesteps):
+        dz = g._calc_dz(zn=ds._zn[step])
+        for elem2d in (0, 100, 3699):
+            col = g.e2_e3_table[elem2d]
+            expected = np.average(values[step, col], weights=dz[col])
+            assert da.to_numpy()[step, elem2d] == pytest.approx(expected, rel=1e-5)
+
+    # NaN values are skipped
+    values[:, g.top_elements] = np.nan
+    da_nan = ds.Salinity.copy()
+    da_nan.values = values
+    col = g.e2_e3_table[0]
+    dz = g._calc_dz(zn=ds._zn[0])
+    expected = np.average(values[0, col[:-1]], weights=dz[col[:-1]])
+    assert da_nan.depth_average().to_numpy()[0, 0] == pytest.approx(expected, rel=1e-5)
+
+    dsa = dfs.depth_average()
+    assert dsa.geometry.n_elements == g.geometry2d.n_elements
+    assert np.allclose(dsa.Salinity.to_numpy(), da.to_numpy())
+    assert np.allclose(ds.depth_average()[0].to_numpy(), dsa[0].to_numpy())
+
+    fp = tmp_path / "avg.dfsu"
+    dfs.depth_average(fp, items="Salinity", time=[0, 2])
+    ds2 = mikeio.read(fp)
+    assert ds2.n_items == 1
+    assert ds2.n_timesteps == 2
+    assert ds2.geometry.n_elements == g.geometry2d.n_elements
+    assert np.allclose(ds2.Salinity.to_numpy(), da.to_numpy()[[0, 2]])
+
+    # a dfsu file has an equidistant time axis
+    fp = tmp_path / "hourly.dfsu"
+    ds.interp_time(3600).to_dfs(fp)
+    dfs = mikeio.open(fp)
+    with pytest.raises(ValueError, match="equidistant"):
+        dfs.depth_average(tmp_path / "avg2.dfsu", time=[0, 1, 4])
+    dsa = dfs.depth_average(time=[0, 1, 4])
+    assert list(dsa.time.hour) == [21, 22, 1]
+
+    with pytest.raises(ValueError):
+        mikeio.read("tests/testdata/HD2D.dfsu")[0].depth_average()
+
+
+def test_depth_integral():
+    ds = mikeio.read("tests/testdata/oresund_sigma_z.dfsu")
+    g = ds.geometry
+
+    da = ds.Salinity.depth_integral()
+    assert da.geometry.n_elements == g.geometry2d.n_elements
+    assert da.dims == ("time", "element")
+    values = ds.Salinity.to_numpy()
+    for step in range(ds.n_timesteps):
+        dz = g._calc_dz(zn=ds._zn[step])
+        for elem2d in (0, 100, 3699):
+            col = g.e2_e3_table[elem2d]
+            expected = np.sum(values[step, col] * dz[col])
+            assert da.to_numpy()[step, elem2d] == pytest.approx(expected, rel=1e-5)
+
+    # the integral of 1 is the water depth, integral = average * depth
+    ones = ds.Salinity.copy()
+    ones.values = np.ones_like(values)
+    depth = ones.depth_integral().to_numpy()
+    assert np.all(depth > 0)
+    avg = ds.Salinity.depth_average().to_numpy()
+    assert np.allclose(da.to_numpy(), avg * depth, rtol=1e-5)
+
+    # all NaN columns are NaN
+    values = values.copy()
+    values[:, g.e2_e3_table[0]] = np.nan
+    da_nan = ds.Salinity.copy()
+    da_nan.values = values
+    assert np.isnan(da_nan.depth_integral().to_numpy()[:, 0]).all()
+
+    dsi = ds.depth_integral()
+    assert np.allclose(dsi.Salinity.to_numpy(), da.to_numpy())
+
+    with pytest.raises(ValueError):
+        mikeio.read("tests/testdata/HD2D.dfsu")[0].depth_integral()
+
+
+def test_read_lazy():
+    dfs = mikeio.open("tests/testdata/oresund_sigma_z.dfsu")
+    ds = dfs.read()
+
+    for kw in [dict(), dict(layers="top"), dict(layers=[0, 1], time=1)]:
+        dse = dfs.read(**kw)
+        dsl = dfs.read(lazy=True, **kw)
+        assert dsl.shape == dse.shape
+        for da, dal in zip(dse, dsl):
+            assert np.array_equal(dal.to_numpy(), da.to_numpy(), equal_nan=True)
+        if dse._zn is not None:
+            assert np.array_equal(np.asarray(dsl._zn), dse._zn)
+
+    # values and zn are read when accessed, subsets are read only
+    dal = dfs.read(lazy=True)[0].isel(time=[1, 2]).isel(element=range(100))
+    assert not isinstance(dal.values, np.ndarray)
+    assert not isinstance(dal._zn, np.ndarray)
+    expected = ds[0].isel(time=[1, 2]).isel(element=range(100))
+    assert np.array_equal(dal.to_numpy(), expected.to_numpy())
+    assert np.array_equal(np.asarray(dal._zn), expected._zn)
+
+    dsl = dfs.read(lazy=True)
+    assert np.allclose(
+        dsl.nanmean(axis="time")[0].to_numpy(), ds.nanmean(axis="time")[0].to_numpy()
+    )
+
+    with pytest.raises(ValueError):
+        dfs.read(lazy=True, backend="mmap")
+    with pytest.raises(ValueError):
+        dfs.read(lazy=True, layout="columns")
+
+
+def test_read_layers_backend_mmap():
+    dfs = mikeio.open("tests/testdata/oresund_sigma_z.dfsu")
+    ds = dfs.read()
+
+    for layers in ["top", "bottom", [0, 1], -2]:
+        elements = dfs.geometry.get_layer_elements(layers)
+        dsl = dfs.read(layers=layers)
+        dsm = dfs.read(layers=layers, backend="mmap")
+        assert dsm.geometry.n_elements == dsl.geometry.n_elements == len(elements)
+        for da, dam, da_all in zip(dsl, dsm, ds):
+            assert np.array_equal(da.to_numpy(), da_all.to_numpy()[:, elements])
+            assert np.array_equal(dam.to_numpy(), da.to_numpy())
+
+    # zn of the nodes of the selected elements only
+    dsl = dfs.read(layers=[0, 1], time=1, backend="mmap")
+    assert dsl.geometry.is_layered
+    node_ids, _ = dfs.geometry._get_nodes_and_table_for_elements(
+        dfs.geometry.get_layer_elements([0, 1])
+    )
+    assert np.array_equal(dsl._zn, ds._zn[1, node_ids])
+
+    for kw in [dict(), dict(elements=[0, 1, 2]), dict(layers="bottom", time=1)]:
+        dsc = dfs.read(layout="columns", **kw)
+        dscm = dfs.read(layout="columns", backend="mmap", **kw)
+        assert dscm.dims == dsc.dims
+        for da, dam in zip(dsc, dscm):
+            assert np.array_equal(dam.to_numpy(), da.to_numpy(), equal_nan=True)
+
+    with pytest.raises(ValueError, match="backend"):
+        dfs.read(backend="netcdf")
@@ -327,6 +327,24 @@ def test_read_spectrum_dir_line(dfsu_line_dir):
     assert ds2.shape == (4, 10, 16)
 
 
+def test_iter_timesteps_spectrum(dfsu_pt, dfsu_line, dfsu_area):
+    for dfs, sel in [
+        (dfsu_pt, {}),
+        (dfsu_line, {}),
+        (dfsu_line, dict(nodes=[3, 4])),
+        (dfsu_line, dict(nodes=2)),
+        (dfsu_area, dict(elements=[5, 1, 30])),
+        (dfsu_area, dict(elements=7)),
+    ]:
+        ds = dfs.read(**sel)
+        chunks = [dsc.copy() for dsc in dfs.iter_timesteps(chunk=3, **sel)]
+        assert sum(dsc.n_timesteps for dsc in chunks) == ds.n_timesteps
+        assert chunks[0].dims == ds.dims
+        assert chunks[0].geometry.n_elements == ds.geometry.n_elements
+        values = np.concatenate([dsc[0].to_numpy() for dsc in chunks])
+        assert np.array_equal(values, ds[0].to_numpy(), equal_nan=True)
+
+
 def test_calc_frequency_bin_sizes(dfsu_line):
     dfs = dfsu_line
     f = dfs.frequencies
@@ -1,4 +1,7 @@
+import gc
 import os
+import tempfile
+import warnings
 from shutil import copyfile
 import numpy as np
 import pandas as pd
@@ -542,6 +545,78 @@ def test_quantile_dfsu_buffer_size(tmpdir):
     assert np.allclose(org[0].to_numpy(), q10[0].to_numpy())
 
 
+def test_quantile_dfsu_buffer_size_removes_tempfile(tmp_path, monkeypatch):
+    def failing_quantile(*args, **kwargs):
+        raise RuntimeError("quantile failed")
+
+    spill = tmp_path / "spill"
+    spill.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(spill))
+    monkeypatch.setattr(generic, "_quantile", failing_quantile)
+
+    infilename = "tests/testdata/oresundHD_run1.dfsu"
+    outfilename = str(tmp_path / "oresund_q10.dfsu")
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        with pytest.raises(RuntimeError, match="quantile failed"):
+            generic.quantile(infilename, outfilename, q=0.1, buffer_size=1e5)
+        gc.collect()
+    assert list(spill.iterdir()) == []
+    # removed explicitly, not by the finalizer of the temporary directory
+    assert not [x for x in w if issubclass(x.category, ResourceWarning)]
+
+
+def test_quantile_dfsu_parallel(tmpdir):
+
+    infilename = "tests/testdata/oresundHD_run1.dfsu"
+    outfilename = os.path.join(tmpdir.dirname, "oresund_q10.dfsu")
+    generic.quantile(infilename, outfilename, q=[0.1, 0.5], parallel=3)
+
+    org = mikeio.read(infilename).quantile(q=[0.1, 0.5], axis=0)
+    qnt = mikeio.read(outfilename)
+    for da, da_org in zip(qnt, org):
+        assert np.allclose(da.to_numpy(), da_org.to_numpy())
+
+    # spill chunks to disk
+    generic.quantile(infilename, outfilename, q=[0.1, 0.5], buffer_size=1e4, parallel=2)
+    qnt = mikeio.read(outfilename)
+    for da, da_org in zip(qnt, org):
+        assert np.allclose(da.to_numpy(), da_org.to_numpy())
+
+
+def test_quantile_skipna_false(tmpdir):
+
+    infilename = os.path.join(tmpdir.dirname, "with_nans.dfsu")
+    outfilename = os.path.join(tmpdir.dirname, "q50.dfsu")
+    ds = mikeio.read("tests/testdata/HD2D.dfsu", items=0)
+    ds[0][2, 10:20] = np.nan
+    ds.to_dfs(infilename)
+
+    generic.quantile(infilename, outfilename, q=0.5, skipna=False)
+    q50 = mikeio.read(outfilename, time=0)[0].to_numpy()
+    assert np.all(np.isnan(q50[10:20]))
+    assert np.allclose(q50[20:], np.median(ds[0].to_numpy()[:, 20:], axis=0))
+
+
+def test_quantile_approx_bins(tmpdir):
+
+    infilename = "tests/testdata/eq.dfs2"
+    outfilename = os.path.join(tmpdir.dirname, "eq_q90.dfs2")
+    generic.quantile(infilename, outfilename, q=[0.1, 0.9], approx_bins=100)
+
+    ds = mikeio.read(infilename)
+    org = ds.quantile(q=[0.1, 0.9], axis=0)
+    qnt = mikeio.read(outfilename)
+    values = ds[0].to_numpy()
+    bin_width = (np.nanmax(values, axis=0) - np.nanmin(values, axis=0)) / 100
+    for da, da_org in zip(qnt, org):
+        err = np.abs(da.to_numpy() - da_org.to_numpy())
+        assert np.all((err <= bin_width + 1e-6) | np.isnan(err))
+
+    with pytest.raises(ValueError, match="buffer_size"):
+        generic.quantile(infilename, outfilename, q=0.5, approx_bins=100, buffer_size=1)
+
+
 def test_quantile_dfs2(tmpdir):
 
     infilename = "tests/testdata/eq.dfs2"
@@ -574,3 +649,67 @@ def test_quantile_dfsu_3d(tmpdir):
 
     qd = mikeio.open(outfilename)
     assert qd.n_timesteps == 1
+
+
+def test_stats_dfsu(tmpdir):
+
+    infilename = "tests/testdata/HD2D.dfsu"
+    outfilename = os.path.join(tmpdir.dirname, "stats.dfsu")
+    generic.stats(
+        infilename, outfilename, stats=["min", "max", "mean", "std", "count>0.5"]
+    )
+
+    org = mikeio.read(infilename)
+    stats = mikeio.read(outfilename)
+    assert stats.n_items == 5 * org.n_items
+    assert stats.n_timesteps == 1
+    assert stats.items[0].name == "min, Surface elevation"
+    assert stats.items[4].name == "count>0.5, Surface elevation"
+    assert stats.items[4].type == mikeio.EUMType.Undefined
+
+    values = org[0].to_numpy().astype(np.float64)
+    assert np.allclose(stats[0].to_numpy(), values.min(axis=0))
+    assert np.allclose(stats[1].to_numpy(), values.max(axis=0))
+    assert np.allclose(stats[2].to_numpy(), values.mean(axis=0))
+    assert np.allclose(stats[3].to_numpy(), values.std(axis=0), atol=1e-6)
+    assert np.all(stats[4].to_numpy() == (values > 0.5).sum(axis=0))
+
+
+def test_stats_deletevalues(tmpdir):
+
+    infilename = os.path.join(tmpdir.dirname, "with_nans.dfsu")
+    outfilename = os.path.join(tmpdir.dirname, "stats.dfsu")
+    org = mikeio.read("tests/testdata/HD2D.dfsu", items=0)
+    org[0][2, 10:20] = np.nan
+    org[0][:, 30] = np.nan
+    org.to_dfs(infilename)
+    values = mikeio.read(infilename)[0].to_numpy()
+
+    generic.stats(infilename, outfilename, stats=["mean", "count"], items=0)
+    stats = mikeio.read(outfilename)
+    assert np.allclose(stats[0].to_numpy(), np.nanmean(values, axis=0), equal_nan=True)
+    assert np.all(stats[1].to_numpy() == (~np.isnan(values)).sum(axis=0))
+
+    generic.stats(infilename, outfilename, stats="mean", items=0, skipna=False)
+    stats = mikeio.read(outfilename)
+    assert np.allclose(stats[0].to_numpy(), values.mean(axis=0), equal_nan=True)
+
+
+def test_stats_dfsu_3d(tmpdir):
+
+    infilename = "tests/testdata/oresund_sigma_z.dfsu"
+    outfilename = os.path.join(tmpdir, "oresund_sigma_z_stats.dfsu")
+    generic.stats(infilename, outfilename, stats=["min", "max"])
+
+    stats = mikeio.read(outfilename)
+    org = mikeio.read(infilename)
+    assert stats.n_items == 2 * org.n_items
+    assert np.allclose(stats[1].to_numpy(), org[0].max(axis=0).to_numpy())
+
+
+def test_stats_unknown_statistic(tmpdir):
+
+    infilename = "tests/testdata/HD2D.dfsu"
+    outfilename = os.path.join(tmpdir.dirname, "stats.dfsu")
+    with pytest.raises(ValueError, match="median"):
+        generic.stats(infilename, outfilename, stats=["median"])
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pytest
 from mikeio.spatial.FM_geometry import GeometryFM, GeometryFM3D
@@ -132,3 +134,275 @@ def test_layered():
     assert not g.is_2d
 
     assert len(g.top_elements) == 1
+
+
+def test_element_coordinates_mixed_tri_quad():
+    #     x     y    z
+    nc = [
+        (0.0, 0.0, 0.0),  # 0
+        (1.0, 0.0, -1.0),  # 1
+        (1.0, 1.0, -2.0),  # 2
+        (0.0, 1.0, -3.0),  # 3
+        (2.0, 0.5, -4.0),  # 4
+    ]
+
+    el = [(0, 1, 2, 3), (1, 4, 2)]
+
+    g = GeometryFM(nc, el)
+    assert g.max_nodes_per_element == 4
+
+    ec = g.element_coordinates
+    assert ec.shape == (2, 3)
+    for j, nodes in enumerate(el):
+        assert ec[j] == pytest.approx(np.mean(np.array(nc)[list(nodes)], axis=0))
+
+
+def test_element_coordinates_dynamic_zn():
+    nc = [
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 0.0, -1.0),
+        (1.0, 0.0, -1.0),
+        (1.0, 1.0, -1.0),
+        (0.0, 0.0, -2.0),
+        (1.0, 0.0, -2.0),
+        (1.0, 1.0, -2.0),
+    ]
+    el = [(6, 7, 8, 3, 4, 5), (3, 4, 5, 0, 1, 2)]
+    g = GeometryFM3D(node_coordinates=nc, element_table=el, n_layers=2, n_sigma=2)
+
+    zn = np.array([np.array(nc)[:, 2], 2.0 * np.array(nc)[:, 2]])
+
+    # batched over time steps, same as one step at a time
+    ec = g._calc_element_coordinates(zn=zn)
+    assert ec.shape == (2, 2, 3)
+    assert ec[0] == pytest.approx(g.element_coordinates)
+    assert ec[1] == pytest.approx(g._calc_element_coordinates(zn=zn[1]))
+    assert ec[1, :, 2] == pytest.approx([-3.0, -1.0])
+
+    dz = g._calc_dz(zn=zn)
+    assert dz.shape == (2, 2)
+    assert dz == pytest.approx(np.array([[1.0, 1.0], [2.0, 2.0]]))
+
+
+def test_element_area_mixed_tri_quad():
+    nc = [
+        (0.0, 0.0, 0.0),
+        (2.0, 0.0, 0.0),
+        (2.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (3.0, 0.5, 0.0),
+    ]
+    el = [(0, 1, 2, 3), (1, 4, 2)]
+
+    g = GeometryFM(nc, el, projection="LOCAL")
+    area = g.get_element_area()
+    assert area == pytest.approx([2.0, 0.5])
+
+    # cached, but not modified by the caller
+    area[0] = 0.0
+    assert g.get_element_area()[0] == 2.0
+
+
+def test_element_area_layered():
+    nc = [
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 0.0, -1.0),
+        (1.0, 0.0, -1.0),
+        (1.0, 1.0, -1.0),
+        (0.0, 0.0, -2.0),
+        (1.0, 0.0, -2.0),
+        (1.0, 1.0, -2.0),
+    ]
+    el = [(6, 7, 8, 3, 4, 5), (3, 4, 5, 0, 1, 2)]
+    g = GeometryFM3D(
+        node_coordinates=nc,
+        element_table=el,
+        projection="LOCAL",
+        n_layers=2,
+        n_sigma=2,
+    )
+
+    assert g.get_element_area() == pytest.approx([0.5, 0.5])
+
+
+def test_element_table_list_view():
+    nc = [
+        (0.0, 0.0, 0.0),
+        (2.0, 0.0, 0.0),
+        (2.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (3.0, 0.5, 0.0),
+    ]
+    el = [(0, 1, 2, 3), (1, 4, 2)]
+    g = GeometryFM(nc, el, projection="LOCAL")
+
+    table, n_nodes = g._element_table_padded
+    assert table.shape == (2, 4)
+    assert table[1, 3] == -1
+    assert list(n_nodes) == [4, 3]
+
+    assert len(g.element_table) == 2
+    assert list(g.element_table[0]) == [0, 1, 2, 3]
+    assert list(g.element_table[1]) == [1, 4, 2]
+
+    # a padded table is accepted as input as well
+    g2 = GeometryFM(nc, table, projection="LOCAL")
+    assert list(g2.element_table[1]) == [1, 4, 2]
+    assert g2.element_coordinates == pytest.approx(g.element_coordinates)
+
+
+def test_find_top_layer_elements():
+    # two columns: 2 prisms on top of each other and a single hexahedron
+    el = [
+        (0, 1, 2, 3, 4, 5),
+        (3, 4, 5, 6, 7, 8),
+        (9, 10, 11, 12, 13, 14, 15, 16),
+    ]
+    top = GeometryFM3D._findTopLayerElements(el)
+    assert list(top) == [1, 2]
+
+    # vertical profile, nodes of the top element are in reverse order
+    el = [(0, 1, 2, 3), (3, 2, 4, 5), (6, 7, 8, 9)]
+    top = GeometryFM3D._findTopLayerElements(el)
+    assert list(top) == [1, 2]
+
+
+def test_index_cache(tmp_path, monkeypatch):
+    import mikeio
+    from mikeio.spatial import FM_geometry
+    from mikeio.spatial.FM_cache import SpatialIndexCache
+
+    cache = SpatialIndexCache(tmp_path)
+    monkeypatch.setattr(GeometryFM, "index_cache", cache)
+
+    n_puts = []
+    put = cache.put
+    monkeypatch.setattr(cache, "put", lambda *args: n_puts.append(put(*args)))
+
+    g = mikeio.open("tests/testdata/oresund_sigma_z.dfsu").geometry
+    idx = g.find_index(x=340000, y=6160000)
+    bnd = g.boundary_polylines
+    e2_e3 = g.e2_e3_table
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+    assert len(n_puts) == 1  # written once
+
+    # derived geometries are not cached
+    g.geometry2d.boundary_polylines
+    g.isel(range(10)).find_index(x=340000, y=6160000)
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    # a new geometry object with the same mesh does not build the tree again
+    def no_tree(*args, **kwargs):
+        raise AssertionError("KD-tree should come from cache")
+
+    monkeypatch.setattr(FM_geometry, "cKDTree", no_tree)
+    g2 = mikeio.open("tests/testdata/oresund_sigma_z.dfsu").geometry
+    assert np.all(g2.find_index(x=340000, y=6160000) == idx)
+    assert g2.boundary_polylines.n_exteriors == bnd.n_exteriors
+    assert np.all(g2.boundary_polylines.exteriors[0].xy == bnd.exteriors[0].xy)
+    assert np.all(g2.layer_ids == g.layer_ids)
+    assert len(g2.e2_e3_table) == len(e2_e3)
+
+    # other meshes get their own entry
+    g3 = mikeio.open("tests/testdata/HD2D.dfsu").geometry
+    g3.boundary_polylines
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+
+def test_index_cache_lru(tmp_path):
+    from mikeio.spatial.FM_cache import SpatialIndexCache
+
+    cache = SpatialIndexCache(tmp_path, max_bytes=2500)
+    entry = {"data": np.zeros(100)}  # approx 1 kB per entry
+    cache.put("a", entry)
+    cache.put("b", entry)
+    os.utime(tmp_path / "a.pkl", (1, 1))
+    os.utime(tmp_path / "b.pkl", (2, 2))
+    assert cache.get("a") is not None  # a is now most recently used
+
+    cache.put("c", entry)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_boundary_polylines_with_holes():
+    import mikeio
+
+    g = mikeio.Grid2D(x0=0, y0=0, dx=1, nx=12, ny=12).to_geometryFM()
+
+    # remove every 4th element in every 4th row => 3 x 3 holes
+    ij = np.arange(g.n_elements)
+    is_hole = (ij % 12 % 4 == 1) & (ij // 12 % 4 == 1)
+    g = g.elements_to_geometry(ij[~is_hole])
+
+    bnd = g.boundary_polylines
+    assert bnd.n_exteriors == 1
+    assert bnd.n_interiors == 9
+    assert bnd.exteriors[0].area == pytest.approx(144.0)
+    for interior in bnd.interiors:
+        assert interior.n_nodes == 5  # closed: first node repeated
+        assert interior.nodes[0] == interior.nodes[-1]
+        assert interior.area == pytest.approx(-1.0)
+
+    # in a hole, inside, outside domain
+    inside = g.contains([[1.0, 1.0], [2.0, 1.0], [12.0, 1.0], [-1.0, -1.0]])
+    assert list(inside) == [False, True, False, False]
+
+
+def test_find_element_graded_mesh():
+    from scipy.spatial import Delaunay
+
+    # elements much smaller near the origin than elsewhere
+    rng = np.random.default_rng(1)
+    r = np.concatenate([rng.uniform(0, 1, 1000) ** 4, rng.uniform(0, 1, 100)])
+    xy = rng.uniform(0, 1, (len(r), 2)) * r[:, None] * 100
+    xy = np.vstack([xy, [[0, 0], [100, 0], [0, 100], [100, 100]]])
+    tri = Delaunay(xy)
+    el = tri.simplices.copy()
+    a = xy[el]
+    is_cw = np.cross(a[:, 1] - a[:, 0], a[:, 2] - a[:, 0]) < 0
+    el[is_cw] = el[is_cw, ::-1]
+    g = GeometryFM(np.column_stack([xy, np.zeros(len(xy))]), el, projection="LOCAL")
+
+    points = rng.uniform(-5, 105, (50_000, 2))
+    expected = tri.find_simplex(points)
+    assert np.all(g._find_element_2d(points) == expected)
+    assert np.all(g.contains(points) == (expected >= 0))
+
+
+def test_node_centered_data_mixed_tri_quad():
+    import mikeio
+
+    g = mikeio.Grid2D(x0=0.5, y0=0.5, dx=1, nx=6, ny=5).to_geometryFM()
+    ec = g.element_coordinates
+    nc = g.node_coordinates
+    data = 2 * ec[:, 0] - 3 * ec[:, 1] + 1
+
+    # linear field is reproduced in the interior nodes
+    zn = g.get_node_centered_data(data)
+    interior = (nc[:, 0] > 0) & (nc[:, 0] < 6) & (nc[:, 1] > 0) & (nc[:, 1] < 5)
+    assert interior.sum() == 20
+    expected = 2 * nc[:, 0] - 3 * nc[:, 1] + 1
+    assert zn[interior] == pytest.approx(expected[interior])
+
+    # all time steps at once
+    data2 = np.vstack([data, -data, np.random.random(g.n_elements)])
+    zn2 = g.get_node_centered_data(data2)
+    assert zn2.shape == (3, g.n_nodes)
+    for step in range(3):
+        assert zn2[step] == pytest.approx(g.get_node_centered_data(data2[step]))
+
+    # weights are computed once
+    assert g._get_node_centering_matrix() is g._get_node_centering_matrix()
+    M = g._get_node_centering_matrix(extrapolate=False)
+    assert M is not g._get_node_centering_matrix()
+    assert M.sum(axis=1) == pytest.approx(1.0)
+    assert M.min() >= 0.0
@@ -1,7 +1,13 @@
 from mikeio.dataset import Dataset
-from mikeio.interpolation import get_idw_interpolant, interp2d, _interp_itemstep
+from mikeio.interpolation import (
+    get_idw_interpolant,
+    get_sparse_interpolant,
+    interp2d,
+    _interp_itemstep,
+)
 import mikeio
 import numpy as np
+import pytest
 
 
 def test_get_idw_interpolant():
@@ -90,3 +96,183 @@ def test_interp_itemstep():
     dati = _interp_itemstep(dat, elem_ids, weights)
     assert len(dati) == npts
     assert dati[0] == 8.262675285339355
+
+
+def test_get_sparse_interpolant():
+    elem_ids = np.array([[0, 2], [3, 1]])
+    weights = np.array([[0.25, 0.75], [1.0, 0.0]])
+    M = get_sparse_interpolant(elem_ids, weights, n_elements=5)
+    assert M.shape == (2, 5)
+    assert np.all(M.toarray() == [[0.25, 0, 0.75, 0, 0], [0, 0, 0, 1.0, 0]])
+
+    # zero weight of nan value gives nan as np.dot does
+    dat = np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+    dati = M @ dat
+    assert dati[0] == 2.5
+    assert np.isnan(dati[1])
+
+    # nearest
+    M = get_sparse_interpolant([4, 0], n_elements=5)
+    assert np.all(M @ dat == [5.0, 1.0])
+
+
+def test_interp2d_sparse():
+    dfs = mikeio.open("tests/testdata/wind_north_sea.dfsu")
+    ds = dfs.read()
+    g = dfs.geometry.get_overset_grid(dx=0.5)
+
+    elem_ids, weights = dfs.geometry.get_2d_interpolant(g.xy, n_nearest=3)
+    M = dfs.geometry.get_2d_interpolant(g.xy, n_nearest=3, sparse=True)
+    assert M.shape == (g.nx * g.ny, dfs.n_elements)
+
+    dat = ds[0].to_numpy()
+    expected = np.array(
+        [
+            [np.dot(d[elem_ids[j]], weights[j]) for j in range(len(elem_ids))]
+            for d in dat
+        ]
+    )
+    dati = interp2d(dat, M)
+    assert dati.shape == (ds.n_timesteps, g.nx * g.ny)
+    assert np.allclose(dati, expected, equal_nan=True)
+    assert np.all(np.isnan(dati) == np.isnan(expected))
+
+    dati = interp2d(dat, elem_ids, weights, shape=(g.ny, g.nx))
+    assert dati.shape == (ds.n_timesteps, g.ny, g.nx)
+    assert np.allclose(dati.reshape(ds.n_timesteps, -1), expected, equal_nan=True)
+
+    dsi = interp2d(ds, M, shape=(g.ny, g.nx))
+    assert dsi.shape == (ds.n_timesteps, g.ny, g.nx)
+    assert np.allclose(dsi[0].to_numpy(), dati, equal_nan=True)
+
+    dsi2 = ds.interp_like(g, interpolant=M)
+    assert np.allclose(dsi2[0].to_numpy(), dati, equal_nan=True)
+    dai = ds[0].interp_like(g, interpolant=M)
+    assert np.allclose(dai.to_numpy(), dati, equal_nan=True)
+
+
+def test_interpolant_reused_for_same_mesh():
+    ds1 = mikeio.read("tests/testdata/wind_north_sea.dfsu")
+    ds2 = mikeio.read("tests/testdata/wind_north_sea.dfsu")  # other object
+    xy = np.array([[2.0, 52.0], [3.0, 53.0], [7.0, 54.0]])
+
+    interpolant = ds1.geometry.get_interpolant(xy, n_nearest=3)
+    assert ds2.geometry.get_interpolant(xy.tolist(), n_nearest=3) is interpolant
+    assert ds1.geometry.get_interpolant(xy, n_nearest=4) is not interpolant
+    assert ds1.geometry.get_interpolant(xy + 0.1, n_nearest=3) is not interpolant
+    assert not interpolant.weights.flags.writeable
+
+    elem_ids, weights = interpolant
+    expected = ds1.geometry.get_2d_interpolant(xy, n_nearest=3)
+    assert np.all(elem_ids == expected[0])
+    assert np.all(weights == expected[1])
+    assert interpolant.n_points == 3
+    assert interpolant.matrix.shape == (3, ds1.geometry.n_elements)
+    assert interpolant.nbytes > elem_ids.nbytes + weights.nbytes
+
+    dsi = interpolant.interp(ds1)
+    assert np.allclose(dsi[0].to_numpy(), interp2d(ds1[0].to_numpy(), *expected))
+    dai = ds2[0].interp(x=2.0, y=52.0, n_nearest=3)
+    assert np.isclose(dai.to_numpy()[0], dsi[0].to_numpy()[0, 0])
+    ds1.geometry.clear_interpolants()
+
+
+def test_interpolant_cache_size():
+    ds = mikeio.read("tests/testdata/wind_north_sea.dfsu")
+    g = ds.geometry
+    max_bytes = g.max_interpolant_bytes
+    try:
+        g.clear_interpolants()
+        first = g.get_interpolant([2.0, 52.0])
+        type(g).max_interpolant_bytes = 2 * first.nbytes
+        g.get_interpolant([3.0, 53.0])
+        assert g.get_interpolant([2.0, 52.0]) is first  # most recently used
+        g.get_interpolant([7.0, 54.0])
+        assert g.get_interpolant([2.0, 52.0]) is first
+        assert len(g._interpolants) == 2
+
+        # interp reuses stored interpolants, larger than the limit not stored
+        type(g).max_interpolant_bytes = max_bytes
+        g.clear_interpolants()
+        ds.interp(x=4.0, y=53.0)
+        ds[0].interp(x=4.0, y=53.0)
+        assert len(g._interpolants) == 1
+        grid = g.get_overset_grid(dx=0.5)
+        ds.interp_like(grid)
+        ds[0].interp_like(grid)
+        assert len(g._interpolants) == 2
+        type(g).max_interpolant_bytes = first.nbytes
+        g.clear_interpolants()
+        ds.interp_like(grid)
+        assert len(g._interpolants) == 0
+
+        type(g).max_interpolant_bytes = 0
+        assert g.get_interpolant([5.0, 54.0]) is not g.get_interpolant([5.0, 54.0])
+
+        g.clear_interpolants()
+        assert len(g._interpolants) == 0
+    finally:
+        type(g).max_interpolant_bytes = max_bytes
+        g.clear_interpolants()
+
+
+def test_linear_interpolant():
+    dfs = mikeio.open("tests/testdata/wind_north_sea.dfsu")
+    ds = dfs.read(items=["Wind speed"])
+    g = dfs.geometry
+    dat = ds[0].to_numpy()
+
+    # triangle centroids: mean of the node-centered values
+    xy = g.element_coordinates[:10, :2]
+    M = g.get_2d_interpolant(xy, method="linear", sparse=True)
+    dati = interp2d(dat, M)
+    nodes = np.stack(g.element_table[:10])
+    for step in (0, 5):
+        node_values = g.get_node_centered_data(dat[step])
+        assert np.allclose(dati[step], node_values[nodes].mean(axis=1))
+
+    # outside domain
+    xy = np.array([[2.0, 50.0], [3.0, 53.0]])
+    elem_ids, weights = g.get_2d_interpolant(xy, method="linear")
+    dati = interp2d(dat[0], elem_ids, weights)
+    assert np.isnan(dati[0])
+    assert not np.isnan(dati[1])
+    elem_ids, weights = g.get_2d_interpolant(xy, method="linear", extrapolate=True)
+    assert not np.any(np.isnan(interp2d(dat[0], elem_ids, weights)))
+
+    interpolant = g.get_interpolant(xy, method="linear")
+    assert interpolant.method == "linear"
+    assert np.allclose(interpolant.interp(dat[0]), dati, equal_nan=True)
+    g.clear_interpolants()
+
+    dai = ds[0].interp(x=3.0, y=53.0, method="linear")
+    assert np.isclose(dai.to_numpy()[0], dati[1])
+
+
+def test_linear_interpolant_quadrangles():
+    g = mikeio.Grid2D(x0=0.5, y0=0.5, dx=1, nx=6, ny=5).to_geometryFM()
+    dat = np.random.random(g.n_elements)
+    node_values = g.get_node_centered_data(dat)
+
+    # quadrangle with nodes (2,2), (3,2), (3,3), (2,3) split along 0-2
+    e = g.find_index(coords=[[2.5, 2.5]])[0]
+    v0, v1, v2, v3 = node_values[g.element_table[e]]
+    xy = np.array([[2.5, 2.5], [2.75, 2.25], [2.25, 2.75]])
+    M = g.get_2d_interpolant(xy, method="linear", sparse=True)
+    assert M.shape == (len(xy), g.n_elements)
+    expected = [
+        (v0 + v2) / 2,
+        0.25 * v0 + 0.5 * v1 + 0.25 * v2,
+        0.25 * v0 + 0.25 * v2 + 0.5 * v3,
+    ]
+    assert np.allclose(M @ dat, expected)
+
+    # linear field is exact away from the boundary
+    ec = g.element_coordinates
+    dat = 2 * ec[:, 0] - 3 * ec[:, 1] + 1
+    xy = np.array([[2.3, 2.7], [2.8, 2.1], [3.5, 2.5], [3.1, 2.95]])
+    M = g.get_2d_interpolant(xy, method="linear", sparse=True)
+    assert np.allclose(M @ dat, 2 * xy[:, 0] - 3 * xy[:, 1] + 1)
+
+    with pytest.raises(ValueError, match="method"):
+        g.get_2d_interpolant(xy, method="cubic")
@@ -1,5 +1,10 @@
+import os
+
+import numpy as np
+import pandas as pd
 import pytest
 import mikeio
+from mikeio.spatial.FM_geometry import GeometryFM
 
 
 def test_read_dfs0_generic_read():
@@ -53,3 +58,105 @@ def test_read_generic_read_unsupported_format():
 
     with pytest.raises(Exception):
         res = mikeio.read(filename)
+
+
+def test_read_many_dfsu(tmpdir):
+
+    ds = mikeio.read("tests/testdata/HD2D.dfsu")
+    ds1 = ds.isel(time=range(0, 4))
+    ds2 = ds.isel(time=range(3, 9)).copy()
+    ds2[0] = ds2[0] + 100.0  # overlapping time step must come from last file
+    fn1 = os.path.join(tmpdir, "HD_1.dfsu")
+    fn2 = os.path.join(tmpdir, "HD_2.dfsu")
+    ds1.to_dfs(fn1)
+    ds2.to_dfs(fn2)
+
+    expected = mikeio.Dataset.concat([ds1, ds2])
+    dsm = mikeio.read_many(os.path.join(tmpdir, "HD_*.dfsu"), parallel=2)
+    assert dsm.time.equals(expected.time)
+    for da, da_exp in zip(dsm, expected):
+        assert np.all(da.to_numpy() == da_exp.to_numpy())
+
+    dsm = mikeio.read_many([fn2, fn1], items=[3], elements=[4, 0, 100])
+    expected = mikeio.Dataset.concat([ds2, ds1])
+    assert dsm.shape == (9, 3)
+    assert np.all(dsm[0].to_numpy() == expected[3].to_numpy()[:, [4, 0, 100]])
+
+    with pytest.raises(NotImplementedError):
+        mikeio.read_many([fn1, fn2], keep="first")
+
+
+def test_extract_track_many_dfsu(tmpdir):
+
+    dfs = mikeio.open("tests/testdata/track_extraction_case02_indata.dfsu")
+    csv_file = "tests/testdata/track_extraction_case02_track.csv"
+    ds = dfs.read()
+    n = ds.n_timesteps
+    fn1 = os.path.join(tmpdir, "track_1.dfsu")
+    fn2 = os.path.join(tmpdir, "track_2.dfsu")
+    ds.isel(time=range(0, n // 2)).to_dfs(fn1)
+    ds.isel(time=range(n // 2, n)).to_dfs(fn2)
+
+    for method in ["nearest", "inverse_distance", "linear"]:
+        expected = dfs.extract_track(csv_file, method=method)
+        track = mikeio.extract_track(
+            os.path.join(tmpdir, "track_*.dfsu"), csv_file, method=method, parallel=2
+        )
+        assert track.n_items == expected.n_items
+        for da, da_exp in zip(track, expected):
+            assert np.allclose(da.to_numpy(), da_exp.to_numpy(), equal_nan=True)
+
+    # points between the files are interpolated across the file boundary
+    t_mid = ds.time[n // 2 - 1] + (ds.time[n // 2] - ds.time[n // 2 - 1]) / 2
+    x, y = ds.geometry.element_coordinates[5, :2]
+    df = pd.DataFrame({"x": [x], "y": [y]}, index=pd.DatetimeIndex([t_mid]))
+    tracks = mikeio.extract_track([fn1, fn2], [df, df], items=[0])
+    values = ds[0].to_numpy()[n // 2 - 1 : n // 2 + 1, 5]
+    assert len(tracks) == 2
+    assert tracks[1][2].values[0] == pytest.approx(values.mean())
+
+    with pytest.raises(ValueError, match="No time overlap"):
+        mikeio.extract_track([fn1], df.shift(periods=1, freq="D"))
+    tracks = mikeio.extract_track([fn1, fn2], [df, df.shift(periods=1, freq="D")])
+    assert tracks[0][2].values[0] == pytest.approx(values.mean())
+    assert np.all(np.isnan(tracks[1][2].to_numpy()))
+
+    with pytest.raises(NotImplementedError):
+        mikeio.extract_track("tests/testdata/oresund_sigma_z.dfsu", df)
+
+    # same number of elements, but another mesh
+    g = ds.geometry
+    g_moved = GeometryFM(
+        g.node_coordinates + [1.0, 0.0, 0.0], g.element_table, projection=g.projection
+    )
+    fn3 = os.path.join(tmpdir, "moved.dfsu")
+    ds_moved = mikeio.Dataset(
+        [
+            mikeio.DataArray(
+                da.to_numpy(), time=da.time, item=da.item, geometry=g_moved
+            )
+            for da in ds
+        ]
+    )
+    ds_moved.isel(time=range(n // 2, n)).to_dfs(fn3)
+    with pytest.raises(ValueError, match="Mesh"):
+        mikeio.extract_track([fn1, fn3], df)
+    with pytest.raises(ValueError, match="Mesh"):
+        mikeio.read_many([fn1, fn3])
+
+
+def test_read_many_dfs2_files_must_match(tmpdir):
+
+    ds = mikeio.read("tests/testdata/waves.dfs2")
+    fn1 = os.path.join(tmpdir, "waves_1.dfs2")
+    fn2 = os.path.join(tmpdir, "waves_2.dfs2")
+    ds.isel(time=[0, 1]).to_dfs(fn1)
+    ds.isel(time=[2]).to_dfs(fn2)
+
+    dsm = mikeio.read_many([fn1, fn2])
+    assert dsm.dims == ("time", "y", "x")
+    assert np.array_equal(dsm[0].to_numpy(), ds[0].to_numpy(), equal_nan=True)
+
+    ds.isel(time=[2])[[0]].to_dfs(fn2)
+    with pytest.raises(ValueError, match="Items"):
+        mikeio.read_many([fn1, fn2])